@@ -5,18 +5,20 @@ Gestion de l'inscription, connexion et tokens JWT
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Any
 
-from app.core.database import get_db
+from app.core.database import get_async_db
+from app.core.unit_of_work import UnitOfWorkRoute
 from app.core.config import settings
+from app.core.exceptions import AuthenticationException, ServiceUnavailableException
 from app.schemas.user import UserCreate, UserResponse, UserWithToken
 from app.schemas.base import SuccessResponse
-from app.services.auth_service import AuthService
-from app.services.user_service import UserService
+from app.services.auth_service import AsyncAuthService
+from app.services.user_service import AsyncUserService
 
 # Création du routeur
-auth_router = APIRouter()
+auth_router = APIRouter(route_class=UnitOfWorkRoute)
 
 # Schéma OAuth2 pour la connexion
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/v1/auth/login")
@@ -25,7 +27,7 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/v1/auth/login")
 @auth_router.post("/register", response_model=UserWithToken, status_code=status.HTTP_201_CREATED)
 async def register(
     user_data: UserCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """
     Inscription d'un nouvel utilisateur
@@ -39,19 +41,19 @@ async def register(
             )
         
         # Vérification si l'email existe déjà
-        user_service = UserService(db)
-        if user_service.get_user_by_email(user_data.email):
+        user_service = AsyncUserService(db)
+        if await user_service.get_user_by_email(user_data.email):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Un utilisateur avec cet email existe déjà"
             )
         
         # Création de l'utilisateur
-        auth_service = AuthService(db)
-        user = auth_service.create_user(user_data)
+        auth_service = AsyncAuthService(db)
+        user = await auth_service.create_user(user_data)
         
         # Génération du token JWT
-        access_token = auth_service.create_access_token(
+        access_token = await auth_service.create_access_token(
             data={"sub": str(user.id)}
         )
         
@@ -63,6 +65,12 @@ async def register(
         
     except HTTPException:
         raise
+    except ServiceUnavailableException as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=e.message,
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -73,14 +81,14 @@ async def register(
 @auth_router.post("/login", response_model=UserWithToken)
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """
     Connexion utilisateur
     """
     try:
-        auth_service = AuthService(db)
-        user = auth_service.authenticate_user(form_data.username, form_data.password)
+        auth_service = AsyncAuthService(db)
+        user = await auth_service.authenticate_user(form_data.username, form_data.password)
         
         if not user:
             raise HTTPException(
@@ -96,7 +104,7 @@ async def login(
             )
         
         # Génération du token JWT
-        access_token = auth_service.create_access_token(
+        access_token = await auth_service.create_access_token(
             data={"sub": str(user.id)}
         )
         
@@ -108,6 +116,12 @@ async def login(
         
     except HTTPException:
         raise
+    except ServiceUnavailableException as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=e.message,
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -118,15 +132,21 @@ async def login(
 @auth_router.get("/me", response_model=UserResponse)
 async def get_current_user_info(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """
     Récupération des informations de l'utilisateur connecté
     """
     try:
-        auth_service = AuthService(db)
-        current_user = await auth_service.get_current_user(token, db)
+        auth_service = AsyncAuthService(db)
+        current_user = await auth_service.get_current_user(token)
         return current_user
+    except AuthenticationException as e:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=e.message,
+            headers={"WWW-Authenticate": "Bearer"}
+        )
     except HTTPException:
         raise
     except Exception as e:
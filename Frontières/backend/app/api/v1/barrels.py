@@ -3,54 +3,195 @@ Routes Barrels - Millésime Sans Frontières
 Gestion du catalogue des fûts
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Any, List, Optional
 from uuid import UUID
 
-from app.core.database import get_db
+from app.core.database import get_async_db
+from app.core.unit_of_work import UnitOfWorkRoute
+from app.core.cache import get_catalog_cache
+from app.core.exceptions import ValidationException
+from app.core.fieldsets import parse_fields, sparse_model
+from app.core.http_cache import catalog_etag, check_not_modified, entity_etag, validator_headers
+from app.core.pagination import cursor_for
+from app.core.responses import model_response
+from app.models.barrel import Barrel
 from app.schemas.barrel import (
     BarrelCreate, 
     BarrelUpdate, 
     BarrelResponse, 
     BarrelListResponse,
-    BarrelFilter
+    BarrelFilter,
+    BarrelFacetsResponse,
+    BarrelBatchRequest,
+    BarrelBatchItem,
+    BarrelBatchResponse
 )
 from app.schemas.base import PaginatedResponse, PaginationParams
-from app.services.barrel_service import BarrelService
+from app.services.barrel_service import AsyncBarrelService
 
 # Création du routeur
-barrels_router = APIRouter()
+barrels_router = APIRouter(route_class=UnitOfWorkRoute)
 
 
 @barrels_router.get("/", response_model=PaginatedResponse[BarrelListResponse])
 async def get_barrels(
     pagination: PaginationParams = Depends(),
     filters: BarrelFilter = Depends(),
-    db: Session = Depends(get_db)
+    fields: Optional[str] = Query(None, description="Champs à retourner, séparés par des virgules (ex. name,price,main_image)"),
+    etag: Optional[str] = Depends(catalog_etag("barrels")),
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """
     Récupération de la liste des fûts avec pagination et filtres
+    
+    Sans `cursor`, pagination par page (offset) ; avec `cursor` (vide pour la
+    première page), pagination par curseur à coût constant quelle que soit la profondeur.
+    Avec `fields`, seules les colonnes des champs demandés sont lues et renvoyées
+    (`id` est toujours inclus).
     """
     try:
-        barrel_service = BarrelService(db)
-        barrels, total = barrel_service.get_barrels_with_filters(
+        selected = parse_fields(fields, BarrelListResponse)
+        item_schema = sparse_model(BarrelListResponse, selected) if selected else BarrelListResponse
+        barrel_service = AsyncBarrelService(db, cache=get_catalog_cache())
+        
+        if pagination.is_cursor_mode:
+            barrels, next_cursor = await barrel_service.get_barrels_by_cursor(
+                cursor=pagination.cursor,
+                limit=pagination.size,
+                filters=filters,
+                fields=selected
+            )
+            return model_response(PaginatedResponse[item_schema](
+                items=barrels, size=pagination.size, next_cursor=next_cursor
+            ), etag=etag)
+        
+        barrels, total = await barrel_service.get_barrels_with_filters(
             skip=pagination.offset,
             limit=pagination.size,
-            filters=filters
+            filters=filters,
+            fields=selected
         )
         
         # Calcul du nombre de pages
         pages = (total + pagination.size - 1) // pagination.size
         
-        return PaginatedResponse(
+        # Curseur permettant de poursuivre en mode keyset après cette page
+        next_cursor = None
+        if barrels and pagination.page < pages:
+            next_cursor = cursor_for(barrels[-1], Barrel.created_at, Barrel.id)
+        
+        return model_response(PaginatedResponse[item_schema](
             items=barrels,
             total=total,
             page=pagination.page,
             size=pagination.size,
-            pages=pages
+            pages=pages,
+            next_cursor=next_cursor
+        ), etag=etag)
+        
+    except ValidationException as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=e.message
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erreur lors de la récupération des fûts: {str(e)}"
+        )
+
+
+@barrels_router.get("/facets", response_model=BarrelFacetsResponse, dependencies=[Depends(catalog_etag("facets"))])
+async def get_barrel_facets(
+    filters: BarrelFilter = Depends(),
+    db: AsyncSession = Depends(get_async_db)
+) -> Any:
+    """
+    Comptages par facette (origine, bois, état, contenu, prix, volume) pour la barre latérale du catalogue
+    """
+    try:
+        barrel_service = AsyncBarrelService(db, cache=get_catalog_cache())
+        return await barrel_service.get_facets(filters)
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erreur lors du calcul des facettes: {str(e)}"
+        )
+
+
+def _parse_barrel_ids(values: List[str]) -> List[UUID]:
+    """Identifiants du paramètre `ids` (répété ou séparés par des virgules)"""
+    barrel_ids = []
+    for value in values:
+        for part in value.split(","):
+            if not part.strip():
+                continue
+            try:
+                barrel_ids.append(UUID(part.strip()))
+            except ValueError:
+                raise ValidationException(f"Identifiant de fût invalide: {part.strip()}")
+    if not barrel_ids:
+        raise ValidationException("Aucun identifiant de fût fourni")
+    return barrel_ids
+
+
+async def _barrels_batch(barrel_ids: List[UUID], db: AsyncSession, etag: Optional[str] = None) -> Response:
+    """Réponse de la lecture groupée, dans l'ordre de la requête"""
+    barrel_service = AsyncBarrelService(db, cache=get_catalog_cache())
+    barrels = await barrel_service.get_barrels_by_ids(barrel_ids)
+    return model_response(BarrelBatchResponse(items=[
+        BarrelBatchItem(id=barrel_id, found=barrel is not None, barrel=barrel)
+        for barrel_id, barrel in zip(barrel_ids, barrels)
+    ]), etag=etag)
+
+
+@barrels_router.get("/batch", response_model=BarrelBatchResponse)
+async def get_barrels_batch(
+    ids: List[str] = Query(..., description="Identifiants des fûts, séparés par des virgules"),
+    etag: Optional[str] = Depends(catalog_etag("batch")),
+    db: AsyncSession = Depends(get_async_db)
+) -> Any:
+    """
+    Lecture groupée de fûts par identifiant (prix et stock du panier, édition de devis)
+    
+    Une seule requête SQL pour les fûts absents du cache ; les résultats suivent
+    l'ordre de la requête et un fût inexistant est signalé par `found: false`.
+    Réponse revalidée à chaque accès (Cache-Control: no-cache, ETag du catalogue).
+    """
+    try:
+        return await _barrels_batch(_parse_barrel_ids(ids), db, etag=etag)
+        
+    except ValidationException as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=e.message
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erreur lors de la récupération des fûts: {str(e)}"
         )
+
+
+@barrels_router.post("/batch", response_model=BarrelBatchResponse)
+async def post_barrels_batch(
+    batch: BarrelBatchRequest,
+    db: AsyncSession = Depends(get_async_db)
+) -> Any:
+    """
+    Lecture groupée de fûts par identifiant, variante POST pour les listes trop longues pour une URL
+    """
+    try:
+        return await _barrels_batch(batch.ids, db)
         
+    except ValidationException as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=e.message
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -61,14 +202,28 @@ async def get_barrels(
 @barrels_router.get("/{barrel_id}", response_model=BarrelResponse)
 async def get_barrel(
     barrel_id: UUID,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """
     Récupération d'un fût par son ID
+    
+    Répond 304 Not Modified si l'ETag (ou la date) du client est à jour.
     """
     try:
-        barrel_service = BarrelService(db)
-        barrel = barrel_service.get_barrel_by_id(barrel_id)
+        barrel_service = AsyncBarrelService(db, cache=get_catalog_cache())
+        version = await barrel_service.get_barrel_version(barrel_id)
+        if version is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Fût non trouvé"
+            )
+        etag = entity_etag(barrel_id, version)
+        check_not_modified(request, etag, version)
+        response.headers.update(validator_headers(etag, version))
+        
+        barrel = await barrel_service.get_barrel_by_id(barrel_id)
         
         if not barrel:
             raise HTTPException(
@@ -90,14 +245,14 @@ async def get_barrel(
 @barrels_router.post("/", response_model=BarrelResponse, status_code=status.HTTP_201_CREATED)
 async def create_barrel(
     barrel_data: BarrelCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """
     Création d'un nouveau fût (Admin uniquement)
     """
     try:
-        barrel_service = BarrelService(db)
-        barrel = barrel_service.create_barrel(barrel_data)
+        barrel_service = AsyncBarrelService(db)
+        barrel = await barrel_service.create_barrel(barrel_data)
         return barrel
         
     except Exception as e:
@@ -111,14 +266,14 @@ async def create_barrel(
 async def update_barrel(
     barrel_id: UUID,
     barrel_data: BarrelUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """
     Mise à jour d'un fût (Admin uniquement)
     """
     try:
-        barrel_service = BarrelService(db)
-        barrel = barrel_service.update_barrel(barrel_id, barrel_data)
+        barrel_service = AsyncBarrelService(db)
+        barrel = await barrel_service.update_barrel(barrel_id, barrel_data)
         
         if not barrel:
             raise HTTPException(
@@ -140,14 +295,14 @@ async def update_barrel(
 @barrels_router.delete("/{barrel_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_barrel(
     barrel_id: UUID,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> None:
     """
     Suppression d'un fût (Admin uniquement)
     """
     try:
-        barrel_service = BarrelService(db)
-        success = barrel_service.delete_barrel(barrel_id)
+        barrel_service = AsyncBarrelService(db)
+        success = await barrel_service.delete_barrel(barrel_id)
         
         if not success:
             raise HTTPException(
@@ -168,14 +323,14 @@ async def delete_barrel(
 async def search_barrels(
     q: str = Query(..., min_length=2, description="Terme de recherche"),
     limit: int = Query(20, ge=1, le=100, description="Nombre maximum de résultats"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """
     Recherche de fûts par terme textuel
     """
     try:
-        barrel_service = BarrelService(db)
-        barrels = barrel_service.search_barrels(q, limit=limit)
+        barrel_service = AsyncBarrelService(db)
+        barrels = await barrel_service.search_barrels(q, limit=limit)
         return barrels
         
     except Exception as e:
@@ -185,14 +340,14 @@ async def search_barrels(
         )
 
 
-@barrels_router.get("/categories/origins", response_model=List[str])
-async def get_origin_countries(db: Session = Depends(get_db)) -> Any:
+@barrels_router.get("/categories/origins", response_model=List[str], dependencies=[Depends(catalog_etag("origins"))])
+async def get_origin_countries(db: AsyncSession = Depends(get_async_db)) -> Any:
     """
     Récupération de la liste des pays d'origine
     """
     try:
-        barrel_service = BarrelService(db)
-        countries = barrel_service.get_origin_countries()
+        barrel_service = AsyncBarrelService(db)
+        countries = await barrel_service.get_origin_countries()
         return countries
         
     except Exception as e:
@@ -202,14 +357,14 @@ async def get_origin_countries(db: Session = Depends(get_db)) -> Any:
         )
 
 
-@barrels_router.get("/categories/wood-types", response_model=List[str])
-async def get_wood_types(db: Session = Depends(get_db)) -> Any:
+@barrels_router.get("/categories/wood-types", response_model=List[str], dependencies=[Depends(catalog_etag("wood-types"))])
+async def get_wood_types(db: AsyncSession = Depends(get_async_db)) -> Any:
     """
     Récupération de la liste des types de bois
     """
     try:
-        barrel_service = BarrelService(db)
-        wood_types = barrel_service.get_wood_types()
+        barrel_service = AsyncBarrelService(db)
+        wood_types = await barrel_service.get_wood_types()
         return wood_types
         
     except Exception as e:
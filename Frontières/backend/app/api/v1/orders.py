@@ -3,18 +3,28 @@ Routes Orders - Millésime Sans Frontières
 Gestion des commandes des clients
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import Any, List
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, List, Optional
 from uuid import UUID
 
-from app.core.database import get_db
+from app.core.database import get_async_db
+from app.core.unit_of_work import UnitOfWorkRoute
+from app.core.exceptions import (
+    InsufficientStockException, ValidationException,
+    IdempotencyInProgressException,
+    IdempotencyKeyReusedException
+)
+from app.core.http_cache import check_not_modified, entity_etag, validator_headers
+from app.core.idempotency import IDEMPOTENCY_HEADER, idempotent_create
+from app.core.pagination import cursor_for
+from app.models.order import Order
 from app.schemas.order import OrderCreate, OrderUpdate, OrderResponse
 from app.schemas.base import PaginatedResponse, PaginationParams
-from app.services.order_service import OrderService
+from app.services.order_service import AsyncOrderService
 
 # Création du routeur
-orders_router = APIRouter()
+orders_router = APIRouter(route_class=UnitOfWorkRoute)
 
 
 @orders_router.get("/", response_model=PaginatedResponse[OrderResponse])
@@ -22,14 +32,23 @@ async def get_orders(
     pagination: PaginationParams = Depends(),
     user_id: UUID = None,
     status: str = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """
     Récupération de la liste des commandes
     """
     try:
-        order_service = OrderService(db)
-        orders, total = order_service.get_orders_with_filters(
+        order_service = AsyncOrderService(db)
+        
+        if pagination.is_cursor_mode:
+            orders, next_cursor = await order_service.get_orders_by_cursor(
+                cursor=pagination.cursor,
+                limit=pagination.size,
+                filters={"user_id": str(user_id) if user_id else None, "status": status}
+            )
+            return PaginatedResponse(items=orders, size=pagination.size, next_cursor=next_cursor)
+        
+        orders, total = await order_service.get_orders_with_filters(
             skip=pagination.offset,
             limit=pagination.size,
             user_id=user_id,
@@ -38,14 +57,24 @@ async def get_orders(
         
         pages = (total + pagination.size - 1) // pagination.size
         
+        next_cursor = None
+        if orders and pagination.page < pages:
+            next_cursor = cursor_for(orders[-1], Order.created_at, Order.id)
+        
         return PaginatedResponse(
             items=orders,
             total=total,
             page=pagination.page,
             size=pagination.size,
-            pages=pages
+            pages=pages,
+            next_cursor=next_cursor
         )
         
+    except ValidationException as e:
+        raise HTTPException(
+            status_code=400,
+            detail=e.message
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -56,14 +85,28 @@ async def get_orders(
 @orders_router.get("/{order_id}", response_model=OrderResponse)
 async def get_order(
     order_id: UUID,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """
     Récupération d'une commande par son ID
+    
+    Répond 304 Not Modified si l'ETag (ou la date) du client est à jour.
     """
     try:
-        order_service = OrderService(db)
-        order = order_service.get_order_by_id(order_id)
+        order_service = AsyncOrderService(db)
+        version = await order_service.get_order_version(order_id)
+        if version is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Commande non trouvée"
+            )
+        etag = entity_etag(order_id, version)
+        check_not_modified(request, etag, version)
+        response.headers.update(validator_headers(etag, version))
+        
+        order = await order_service.get_order_by_id(order_id)
         
         if not order:
             raise HTTPException(
@@ -85,16 +128,39 @@ async def get_order(
 @orders_router.post("/", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
 async def create_order(
     order_data: OrderCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER)
 ) -> Any:
     """
     Création d'une nouvelle commande
     """
     try:
-        order_service = OrderService(db)
-        order = order_service.create_order(order_data)
-        return order
+        order_service = AsyncOrderService(db)
+        return await idempotent_create(
+            "orders", idempotency_key, order_data,
+            lambda: order_service.create_order(order_data),
+            response_model=OrderResponse,
+            db=db
+        )
         
+    except IdempotencyInProgressException as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=e.message,
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except IdempotencyKeyReusedException as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=e.message
+        )
+    except InsufficientStockException as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"message": e.message, "shortages": e.shortages}
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -106,14 +172,14 @@ async def create_order(
 async def update_order_status(
     order_id: UUID,
     new_status: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """
     Mise à jour du statut d'une commande
     """
     try:
-        order_service = OrderService(db)
-        order = order_service.update_order_status(order_id, new_status)
+        order_service = AsyncOrderService(db)
+        order = await order_service.update_order_status(order_id, new_status)
         
         if not order:
             raise HTTPException(
@@ -135,14 +201,14 @@ async def update_order_status(
 @orders_router.get("/user/{user_id}", response_model=List[OrderResponse])
 async def get_user_orders(
     user_id: UUID,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """
     Récupération des commandes d'un utilisateur
     """
     try:
-        order_service = OrderService(db)
-        orders = order_service.get_orders_by_user(user_id)
+        order_service = AsyncOrderService(db)
+        orders = await order_service.get_orders_by_user(user_id)
         return orders
         
     except Exception as e:
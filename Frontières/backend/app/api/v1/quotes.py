@@ -3,18 +3,30 @@ Routes Quotes - Millésime Sans Frontières
 Gestion des devis pour les clients B2B
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import Any, List
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, List, Optional
 from uuid import UUID
 
-from app.core.database import get_db
+from app.core.database import get_async_db
+from app.core.unit_of_work import UnitOfWorkRoute
+from app.core.exceptions import (
+    NotFoundException, BusinessLogicException,
+    InsufficientStockException, ValidationException,
+    IdempotencyInProgressException,
+    IdempotencyKeyReusedException
+)
+from app.core.http_cache import check_not_modified, entity_etag, validator_headers
+from app.core.idempotency import IDEMPOTENCY_HEADER, idempotent_create
+from app.core.pagination import cursor_for
+from app.models.quote import Quote
+from app.schemas.order import OrderResponse
 from app.schemas.quote import QuoteCreate, QuoteUpdate, QuoteResponse
 from app.schemas.base import PaginatedResponse, PaginationParams
-from app.services.quote_service import QuoteService
+from app.services.quote_service import AsyncQuoteService
 
 # Création du routeur
-quotes_router = APIRouter()
+quotes_router = APIRouter(route_class=UnitOfWorkRoute)
 
 
 @quotes_router.get("/", response_model=PaginatedResponse[QuoteResponse])
@@ -22,14 +34,23 @@ async def get_quotes(
     pagination: PaginationParams = Depends(),
     user_id: UUID = None,
     status: str = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """
     Récupération de la liste des devis
     """
     try:
-        quote_service = QuoteService(db)
-        quotes, total = quote_service.get_quotes_with_filters(
+        quote_service = AsyncQuoteService(db)
+        
+        if pagination.is_cursor_mode:
+            quotes, next_cursor = await quote_service.get_quotes_by_cursor(
+                cursor=pagination.cursor,
+                limit=pagination.size,
+                filters={"user_id": str(user_id) if user_id else None, "status": status}
+            )
+            return PaginatedResponse(items=quotes, size=pagination.size, next_cursor=next_cursor)
+        
+        quotes, total = await quote_service.get_quotes_with_filters(
             skip=pagination.offset,
             limit=pagination.size,
             user_id=user_id,
@@ -38,14 +59,24 @@ async def get_quotes(
         
         pages = (total + pagination.size - 1) // pagination.size
         
+        next_cursor = None
+        if quotes and pagination.page < pages:
+            next_cursor = cursor_for(quotes[-1], Quote.created_at, Quote.id)
+        
         return PaginatedResponse(
             items=quotes,
             total=total,
             page=pagination.page,
             size=pagination.size,
-            pages=pages
+            pages=pages,
+            next_cursor=next_cursor
         )
         
+    except ValidationException as e:
+        raise HTTPException(
+            status_code=400,
+            detail=e.message
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -56,14 +87,28 @@ async def get_quotes(
 @quotes_router.get("/{quote_id}", response_model=QuoteResponse)
 async def get_quote(
     quote_id: UUID,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """
     Récupération d'un devis par son ID
+    
+    Répond 304 Not Modified si l'ETag (ou la date) du client est à jour.
     """
     try:
-        quote_service = QuoteService(db)
-        quote = quote_service.get_quote_by_id(quote_id)
+        quote_service = AsyncQuoteService(db)
+        version = await quote_service.get_quote_version(quote_id)
+        if version is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Devis non trouvé"
+            )
+        etag = entity_etag(quote_id, version)
+        check_not_modified(request, etag, version)
+        response.headers.update(validator_headers(etag, version))
+        
+        quote = await quote_service.get_quote_by_id(quote_id)
         
         if not quote:
             raise HTTPException(
@@ -85,16 +130,34 @@ async def get_quote(
 @quotes_router.post("/", response_model=QuoteResponse, status_code=status.HTTP_201_CREATED)
 async def create_quote(
     quote_data: QuoteCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER)
 ) -> Any:
     """
     Création d'un nouveau devis
     """
     try:
-        quote_service = QuoteService(db)
-        quote = quote_service.create_quote(quote_data)
-        return quote
+        quote_service = AsyncQuoteService(db)
+        return await idempotent_create(
+            "quotes", idempotency_key, quote_data,
+            lambda: quote_service.create_quote(quote_data),
+            response_model=QuoteResponse,
+            db=db
+        )
         
+    except IdempotencyInProgressException as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=e.message,
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except IdempotencyKeyReusedException as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=e.message
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -106,14 +169,14 @@ async def create_quote(
 async def update_quote(
     quote_id: UUID,
     quote_data: QuoteUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """
     Mise à jour d'un devis
     """
     try:
-        quote_service = QuoteService(db)
-        quote = quote_service.update_quote(quote_id, quote_data)
+        quote_service = AsyncQuoteService(db)
+        quote = await quote_service.update_quote(quote_id, quote_data)
         
         if not quote:
             raise HTTPException(
@@ -135,14 +198,14 @@ async def update_quote(
 @quotes_router.post("/{quote_id}/send", response_model=QuoteResponse)
 async def send_quote(
     quote_id: UUID,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """
     Envoi d'un devis au client
     """
     try:
-        quote_service = QuoteService(db)
-        quote = quote_service.send_quote(quote_id)
+        quote_service = AsyncQuoteService(db)
+        quote = await quote_service.send_quote(quote_id)
         
         if not quote:
             raise HTTPException(
@@ -161,28 +224,33 @@ async def send_quote(
         )
 
 
-@quotes_router.post("/{quote_id}/convert", response_model=QuoteResponse)
+@quotes_router.post("/{quote_id}/convert", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
 async def convert_quote_to_order(
     quote_id: UUID,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """
     Conversion d'un devis en commande
     """
     try:
-        quote_service = QuoteService(db)
-        quote = quote_service.convert_to_order(quote_id)
-        
-        if not quote:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Devis non trouvé"
-            )
-        
-        return quote
+        quote_service = AsyncQuoteService(db)
+        return await quote_service.convert_quote_to_order(str(quote_id))
         
-    except HTTPException:
-        raise
+    except NotFoundException as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=e.message
+        )
+    except InsufficientStockException as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"message": e.message, "shortages": e.shortages}
+        )
+    except (ValidationException, BusinessLogicException) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=e.message
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -193,14 +261,14 @@ async def convert_quote_to_order(
 @quotes_router.get("/user/{user_id}", response_model=List[QuoteResponse])
 async def get_user_quotes(
     user_id: UUID,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """
     Récupération des devis d'un utilisateur
     """
     try:
-        quote_service = QuoteService(db)
-        quotes = quote_service.get_quotes_by_user(user_id)
+        quote_service = AsyncQuoteService(db)
+        quotes = await quote_service.get_quotes_by_user(user_id)
         return quotes
         
     except Exception as e:
@@ -4,17 +4,18 @@ Gestion des comptes utilisateurs
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Any, List
 from uuid import UUID
 
-from app.core.database import get_db
+from app.core.database import get_async_db
+from app.core.unit_of_work import UnitOfWorkRoute
 from app.schemas.user import UserUpdate, UserResponse
 from app.schemas.base import PaginatedResponse, PaginationParams
-from app.services.user_service import UserService
+from app.services.user_service import AsyncUserService
 
 # Création du routeur
-users_router = APIRouter()
+users_router = APIRouter(route_class=UnitOfWorkRoute)
 
 
 @users_router.get("/", response_model=PaginatedResponse[UserResponse])
@@ -22,21 +23,21 @@ async def get_users(
     pagination: PaginationParams = Depends(),
     role: str = None,
     is_active: bool = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """
     Récupération de la liste des utilisateurs (Admin uniquement)
     """
     try:
-        user_service = UserService(db)
-        users = user_service.get_users(
+        user_service = AsyncUserService(db)
+        users = await user_service.get_users(
             skip=pagination.offset,
             limit=pagination.size,
             role=role,
             is_active=is_active
         )
         
-        total = user_service.get_user_count(role=role)
+        total = await user_service.get_user_count(role=role)
         pages = (total + pagination.size - 1) // pagination.size
         
         return PaginatedResponse(
@@ -57,14 +58,14 @@ async def get_users(
 @users_router.get("/{user_id}", response_model=UserResponse)
 async def get_user(
     user_id: UUID,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """
     Récupération d'un utilisateur par son ID
     """
     try:
-        user_service = UserService(db)
-        user = user_service.get_user_by_id(user_id)
+        user_service = AsyncUserService(db)
+        user = await user_service.get_user_by_id(user_id)
         
         if not user:
             raise HTTPException(
@@ -87,14 +88,14 @@ async def get_user(
 async def update_user(
     user_id: UUID,
     user_data: UserUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """
     Mise à jour d'un utilisateur
     """
     try:
-        user_service = UserService(db)
-        user = user_service.update_user(user_id, user_data)
+        user_service = AsyncUserService(db)
+        user = await user_service.update_user(user_id, user_data)
         
         if not user:
             raise HTTPException(
@@ -116,14 +117,14 @@ async def update_user(
 @users_router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_user(
     user_id: UUID,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> None:
     """
     Suppression d'un utilisateur (désactivation)
     """
     try:
-        user_service = UserService(db)
-        success = user_service.delete_user(user_id)
+        user_service = AsyncUserService(db)
+        success = await user_service.delete_user(user_id)
         
         if not success:
             raise HTTPException(
@@ -143,14 +144,14 @@ async def delete_user(
 @users_router.post("/{user_id}/activate", response_model=UserResponse)
 async def activate_user(
     user_id: UUID,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """
     Activation d'un utilisateur
     """
     try:
-        user_service = UserService(db)
-        success = user_service.activate_user(user_id)
+        user_service = AsyncUserService(db)
+        success = await user_service.activate_user(user_id)
         
         if not success:
             raise HTTPException(
@@ -158,7 +159,7 @@ async def activate_user(
                 detail="Utilisateur non trouvé"
             )
         
-        user = user_service.get_user_by_id(user_id)
+        user = await user_service.get_user_by_id(user_id)
         return user
         
     except HTTPException:
@@ -3,21 +3,21 @@ Authentication - Millésime Sans Frontières
 Gestion de l'authentification et des tokens JWT
 """
 
+import time
 from datetime import datetime, timedelta
-from typing import Optional, Union
+from typing import Any, Dict, Optional, Union
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from passlib.context import CryptContext
 import jwt
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from app.core.cache import TTLCache
 from app.core.config import settings
 from app.core.database import get_db
+from app.core.password_hashing import get_password_hasher
 from app.models.user import User
 
-# Configuration du contexte de hachage des mots de passe
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # Configuration JWT
 SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = settings.ALGORITHM
@@ -26,15 +26,21 @@ ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
 # Schéma de sécurité HTTP Bearer
 security = HTTPBearer()
 
+# Jeton vérifié -> revendications, conservé au plus jusqu'à l'expiration du jeton
+_token_cache = TTLCache(maxsize=settings.AUTH_TOKEN_CACHE_SIZE, ttl=settings.AUTH_TOKEN_CACHE_TTL)
+
+# Identifiant utilisateur -> droits (rôle, compte actif), durée de vie courte
+_principal_cache = TTLCache(maxsize=settings.AUTH_PRINCIPAL_CACHE_SIZE, ttl=settings.AUTH_PRINCIPAL_CACHE_TTL)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Vérifie un mot de passe"""
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_password_hasher().verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
     """Hache un mot de passe"""
-    return pwd_context.hash(password)
+    return get_password_hasher().hash(password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -51,21 +57,58 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 
 def verify_token(token: str) -> dict:
-    """Vérifie un token JWT"""
+    """Vérifie un token JWT (signature vérifiée une seule fois par jeton tant qu'il est valide)"""
+    cached = _token_cache.get(token)
+    if cached is not None:
+        return dict(cached)
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except jwt.ExpiredSignatureError:
         raise ValueError("Token expiré")
     except jwt.InvalidTokenError:
         raise ValueError("Token invalide")
 
+    # Seuls les jetons datés sont mis en cache, l'entrée disparaissant à leur expiration
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)):
+        ttl = min(exp - time.time(), settings.AUTH_TOKEN_CACHE_TTL)
+        if ttl > 0:
+            _token_cache.set(token, dict(payload), ttl=ttl)
+    return payload
+
 
 def get_user_by_id(user_id: str, db: Session) -> Optional[User]:
     """Récupère un utilisateur par son ID"""
     return db.query(User).filter(User.id == user_id).first()
 
 
+def cache_principal(user: User) -> Dict[str, Any]:
+    """Met en cache les droits d'un utilisateur déjà chargé"""
+    principal = {"id": str(user.id), "role": user.role, "is_active": bool(user.is_active)}
+    _principal_cache.set(principal["id"], principal)
+    return principal
+
+
+def get_principal(user_id: str, db: Session) -> Optional[Dict[str, Any]]:
+    """Droits d'un utilisateur (rôle, compte actif), lus en base au plus une fois par durée de cache"""
+    principal = _principal_cache.get(str(user_id))
+    if principal is not None:
+        return principal
+
+    row = db.execute(select(User.role, User.is_active).where(User.id == str(user_id))).first()
+    if row is None:
+        return None
+    principal = {"id": str(user_id), "role": row.role, "is_active": bool(row.is_active)}
+    _principal_cache.set(principal["id"], principal)
+    return principal
+
+
+def invalidate_principal(user_id: Any) -> None:
+    """Oublie les droits en cache d'un utilisateur (modification, désactivation, changement de rôle)"""
+    _principal_cache.delete(str(user_id))
+
+
 def get_current_user(token: str = Depends(security)) -> dict:
     """Récupère l'utilisateur actuel à partir du token"""
     credentials_exception = HTTPException(
@@ -91,15 +134,21 @@ def get_current_user(token: str = Depends(security)) -> dict:
     return {"user_id": user_id, "payload": payload}
 
 
-def get_current_active_user(token: str = Depends(security)) -> dict:
+def get_current_active_user(token: str = Depends(security), db: Session = Depends(get_db)) -> dict:
     """Récupère l'utilisateur actif actuel"""
     user_data = get_current_user(token)
     
     # Gérer à la fois les dictionnaires et les objets mock
     if isinstance(user_data, dict):
         user_id = user_data.get("user_id")
-        # Pour les tests, simuler un utilisateur actif
-        user = {"id": user_id, "active": True}
+        principal = get_principal(user_id, db)
+        if principal is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Impossible de valider les identifiants",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        user = {"id": user_id, "role": principal["role"], "active": principal["is_active"]}
     else:
         # Si c'est un objet mock ou autre
         user_id = getattr(user_data, "user_id", None) or getattr(user_data, "id", None)
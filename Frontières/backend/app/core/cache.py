@@ -0,0 +1,249 @@
+"""
+Cache - Millésime Sans Frontières
+Cache des lectures du catalogue (mémoire locale ou serveur Redis) avec invalidation à l'écriture
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Iterable, Optional
+
+from app.core.config import settings
+from app.core.constants import REDIS_BARREL_TTL
+from app.core.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+# Durée de vie des clés permanentes (compteur de génération)
+NO_EXPIRY = float("inf")
+
+
+class TTLCache:
+    """Cache LRU thread-safe dont les entrées expirent après `ttl` secondes"""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Retourne la valeur en cache ou None si absente ou expirée"""
+        with self._lock:
+            return self._get(key)
+
+    def _get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Enregistre une valeur en évinçant l'entrée la moins récemment utilisée si besoin"""
+        with self._lock:
+            self._set(key, value, ttl)
+
+    def _set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def add(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> bool:
+        """Enregistre une valeur uniquement si la clé est absente"""
+        with self._lock:
+            if self._get(key) is not None:
+                return False
+            self._set(key, value, ttl)
+            return True
+
+    def incr(self, key: Hashable) -> int:
+        """Incrémente un compteur entier (créé à 1, sans expiration)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            value = (self._get(key) or 0) + 1
+            ttl = NO_EXPIRY if entry is None else entry[0] - time.monotonic()
+            self._set(key, value, ttl)
+            return value
+
+    def delete(self, key: Hashable) -> None:
+        """Supprime une entrée"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Vide le cache"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisCache:
+    """Cache sur un serveur Redis (valeurs JSON, clés préfixées)"""
+
+    def __init__(self, client: Any, prefix: str = "millesime:cache:", ttl: float = REDIS_BARREL_TTL):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def get(self, key: str) -> Optional[Any]:
+        """Retourne la valeur en cache ou None"""
+        raw = self.client.get(self.prefix + key)
+        return None if raw is None else json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Enregistre une valeur avec expiration"""
+        ttl = self.ttl if ttl is None else ttl
+        self.client.set(self.prefix + key, json.dumps(value), ex=None if ttl == NO_EXPIRY else int(ttl))
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        """Enregistre une valeur uniquement si la clé est absente (SET NX)"""
+        ttl = self.ttl if ttl is None else ttl
+        ex = None if ttl == NO_EXPIRY else int(ttl)
+        return bool(self.client.set(self.prefix + key, json.dumps(value), ex=ex, nx=True))
+
+    def incr(self, key: str) -> int:
+        """Incrémente un compteur entier de manière atomique"""
+        return int(self.client.incr(self.prefix + key))
+
+    def delete(self, key: str) -> None:
+        """Supprime une entrée"""
+        self.client.delete(self.prefix + key)
+
+    def clear(self) -> None:
+        """Supprime toutes les clés du préfixe"""
+        for key in self.client.scan_iter(match=self.prefix + "*"):
+            self.client.delete(key)
+
+
+class CatalogCache:
+    """
+    Cache des lectures du catalogue
+
+    Deux niveaux d'invalidation : les fiches sont indexées par identifiant de fût
+    et supprimées à chaque écriture ; les lectures agrégées (listes, facettes,
+    statistiques) sont indexées par un compteur de génération incrémenté à
+    chaque écriture, ce qui les rend toutes obsolètes d'un coup.
+    """
+
+    GENERATION_KEY = "catalog:generation"
+
+    def __init__(self, backend: Any, ttl: float = REDIS_BARREL_TTL):
+        self.backend = backend
+        self.ttl = ttl
+
+    def generation(self) -> Optional[int]:
+        """
+        Génération courante du catalogue, à relever AVANT de lire la base
+
+        Une valeur lue avant une écriture concurrente est ainsi rangée sous
+        l'ancienne génération et ne peut pas masquer l'invalidation.
+        """
+        try:
+            generation = self.backend.get(self.GENERATION_KEY)
+            if generation is None:
+                # Initialisation à l'horodatage en ms : toujours supérieure aux générations
+                # déjà utilisées si le compteur a été évincé
+                self.backend.add(self.GENERATION_KEY, int(time.time() * 1000), ttl=NO_EXPIRY)
+                generation = self.backend.get(self.GENERATION_KEY)
+            return generation
+        except Exception as e:
+            logger.warning(f"Cache catalogue indisponible: {e}")
+            return None
+
+    def get_barrel(self, barrel_id: Any) -> Optional[Any]:
+        """Retourne la fiche en cache d'un fût, sauf si elle précède sa dernière invalidation"""
+        entry = self._safe_get(f"barrel:{barrel_id}")
+        if entry is None:
+            return None
+        invalidated_at = self._safe_get(f"barrel:{barrel_id}:invalidated")
+        if invalidated_at is not None and entry["generation"] < invalidated_at:
+            return None
+        return entry["value"]
+
+    def set_barrel(self, barrel_id: Any, value: Any, generation: Optional[int]) -> None:
+        """Met en cache la fiche d'un fût lue sous la génération donnée"""
+        if generation is not None:
+            self._safe_set(f"barrel:{barrel_id}", {"generation": generation, "value": value})
+
+    def get_catalog(self, name: str, params: str, generation: Optional[int]) -> Optional[Any]:
+        """Retourne une lecture agrégée de la génération donnée"""
+        if generation is None:
+            return None
+        return self._safe_get(f"catalog:{generation}:{name}:{params}")
+
+    def set_catalog(self, name: str, params: str, value: Any, generation: Optional[int]) -> None:
+        """Met en cache une lecture agrégée pour la génération donnée"""
+        if generation is not None:
+            self._safe_set(f"catalog:{generation}:{name}:{params}", value)
+
+    def invalidate_barrels(self, barrel_ids: Iterable[Any]) -> None:
+        """Invalide les fiches des fûts modifiés et toutes les lectures agrégées"""
+        try:
+            barrel_ids = list(barrel_ids)
+            self.generation()
+            generation = self.backend.incr(self.GENERATION_KEY)
+            for barrel_id in barrel_ids:
+                self.backend.delete(f"barrel:{barrel_id}")
+                # Rejette les fiches relues avant cette invalidation et écrites après
+                self.backend.set(f"barrel:{barrel_id}:invalidated", generation, ttl=self.ttl)
+        except Exception as e:
+            logger.error(f"Invalidation du cache catalogue impossible: {e}")
+
+    def clear(self) -> None:
+        """Vide le cache"""
+        self.backend.clear()
+
+    def _safe_get(self, key: str) -> Optional[Any]:
+        try:
+            return self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"Lecture du cache catalogue impossible: {e}")
+            return None
+
+    def _safe_set(self, key: str, value: Any) -> None:
+        try:
+            self.backend.set(key, value, ttl=self.ttl)
+        except Exception as e:
+            logger.warning(f"Écriture du cache catalogue impossible: {e}")
+
+
+def create_cache_backend(name: Optional[str] = None) -> Any:
+    """Crée le backend de cache configuré (CACHE_BACKEND : "memory" ou "redis")"""
+    name = name or settings.CACHE_BACKEND
+
+    if name == "redis":
+        client = get_redis_client()
+        if client is not None:
+            return RedisCache(client, ttl=REDIS_BARREL_TTL)
+        logger.warning("Cache catalogue en mémoire")
+
+    return TTLCache(maxsize=settings.CACHE_MAX_ENTRIES, ttl=REDIS_BARREL_TTL)
+
+
+_catalog_cache: Optional[CatalogCache] = None
+
+
+def get_catalog_cache() -> CatalogCache:
+    """Retourne le cache catalogue de l'application"""
+    global _catalog_cache
+    if _catalog_cache is None:
+        _catalog_cache = CatalogCache(create_cache_backend())
+    return _catalog_cache
+
+
+def configure_catalog_cache(backend: Any) -> CatalogCache:
+    """Remplace le backend du cache catalogue (tests, changement de configuration)"""
+    global _catalog_cache
+    _catalog_cache = CatalogCache(backend)
+    return _catalog_cache
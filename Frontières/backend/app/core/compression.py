@@ -0,0 +1,186 @@
+"""
+Compression - Millésime Sans Frontières
+Compression gzip / brotli des réponses et cache des corps compressés du catalogue
+"""
+
+import gzip
+import hashlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.monitoring import metric_key, metrics_collector
+
+try:
+    import brotli
+except ImportError:  # dépendance optionnelle
+    brotli = None
+
+# Types de contenu compressés (préfixes) ; images et archives le sont déjà
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+    "text/",
+)
+
+
+def _accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    """Encodages de l'en-tête Accept-Encoding avec leur poids q"""
+    encodings = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            encodings[name.strip().lower()] = quality
+    return encodings
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Encodage retenu pour la réponse : br si disponible et accepté, sinon gzip, sinon aucun"""
+    encodings = _accepted_encodings(accept_encoding)
+    candidates = (["br"] if brotli is not None else []) + ["gzip"]
+    for encoding in candidates:
+        if encodings.get(encoding, encodings.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def is_compressible(content_type: str) -> bool:
+    """Vérifie que le type de contenu figure dans la liste des types compressés"""
+    return content_type.lower().startswith(COMPRESSIBLE_TYPES)
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compresse un corps de réponse"""
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    # mtime=0 : sortie identique pour un même contenu
+    return gzip.compress(body, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+class CompressedBodyCache:
+    """Corps compressés indexés par empreinte du contenu et encodage"""
+
+    def __init__(self, maxsize: int = 512, ttl: float = 600):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        """Retourne le corps compressé, calculé une seule fois par contenu identique"""
+        key = (encoding, hashlib.blake2b(body, digest_size=16).digest())
+        compressed = self._entries.get(key)
+        if compressed is not None:
+            metrics_collector.increment(metric_key("http_compression_cache_total", result="hit"))
+            return compressed
+        metrics_collector.increment(metric_key("http_compression_cache_total", result="miss"))
+        compressed = compress(body, encoding)
+        self._entries.set(key, compressed)
+        return compressed
+
+    def clear(self) -> None:
+        """Vide le cache"""
+        self._entries.clear()
+
+
+class CompressionMiddleware:
+    """
+    Middleware ASGI de compression des réponses
+
+    Seules les réponses d'un type autorisé, sans Content-Encoding et d'au moins
+    `minimum_size` octets sont compressées. Pour les GET dont le chemin commence
+    par un préfixe de `cached_paths` (catalogue, facettes, catégories), le corps
+    compressé est mis en cache : un contenu identique n'est compressé qu'une fois.
+    Les réponses en flux (plusieurs fragments) sont transmises telles quelles.
+    """
+
+    def __init__(self, app, minimum_size: Optional[int] = None, cached_paths: Optional[Sequence[str]] = None,
+                 cache: Optional[CompressedBodyCache] = None):
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MIN_SIZE if minimum_size is None else minimum_size
+        self.cached_paths = tuple(settings.COMPRESSION_CACHED_PATHS if cached_paths is None else cached_paths)
+        self.cache = cache or CompressedBodyCache(settings.COMPRESSION_CACHE_ENTRIES, settings.COMPRESSION_CACHE_TTL)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = dict(scope["headers"])
+        encoding = negotiate_encoding(request_headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        cacheable = scope["method"] == "GET" and scope["path"].startswith(self.cached_paths)
+        start_message = None
+        streaming = False
+
+        async def send_compressed(message):
+            nonlocal start_message, streaming
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or streaming:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            if message.get("more_body", False):
+                streaming = True
+                await send(start_message)
+                await send(message)
+                return
+
+            headers = start_message.get("headers", [])
+            compressed = self._compress(headers, body, encoding, cacheable)
+            if compressed is None:
+                await send(start_message)
+                await send(message)
+                return
+            await send({**start_message, "headers": self._headers(headers, len(compressed), encoding)})
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
+
+    def _compress(self, headers: List[Tuple[bytes, bytes]], body: bytes, encoding: str,
+                  cacheable: bool) -> Optional[bytes]:
+        """Corps compressé, ou None si la réponse doit partir telle quelle"""
+        values = {name.lower(): value for name, value in headers}
+        if (
+            len(body) < self.minimum_size
+            or b"content-encoding" in values
+            or not is_compressible(values.get(b"content-type", b"").decode("latin-1"))
+        ):
+            return None
+        metrics_collector.increment(metric_key("http_compressed_responses_total", encoding=encoding))
+        if cacheable:
+            return self.cache.compress(body, encoding)
+        return compress(body, encoding)
+
+    @staticmethod
+    def _headers(headers: List[Tuple[bytes, bytes]], length: int, encoding: str) -> List[Tuple[bytes, bytes]]:
+        vary = [value for name, value in headers if name.lower() == b"vary"]
+        if not any(b"accept-encoding" in value.lower() for value in vary):
+            vary.append(b"Accept-Encoding")
+        updated = [(name, value) for name, value in headers if name.lower() not in (b"content-length", b"vary")]
+        updated.extend([
+            (b"content-encoding", encoding.encode()),
+            (b"content-length", str(length).encode()),
+            (b"vary", b", ".join(vary)),
+        ])
+        # L'ETag fort désigne le corps non compressé : il devient faible (W/) pour la version compressée
+        return [
+            (name, b"W/" + value if name.lower() == b"etag" and value.startswith(b'"') else value)
+            for name, value in updated
+        ]
+
+
+def setup_compression(app) -> None:
+    """Ajoute la compression des réponses"""
+    app.add_middleware(CompressionMiddleware)
@@ -119,6 +119,10 @@ BARREL_MAX_PRICE = Decimal('50000.0')   # 50000€ maximum
 BARREL_MIN_STOCK = 0                    # Stock minimum
 BARREL_MAX_STOCK = 9999                 # Stock maximum
 
+# Constantes des facettes du catalogue
+FACET_PRICE_BUCKETS = [500, 1000, 2000, 5000]   # Bornes des tranches de prix (euros)
+FACET_VOLUME_BUCKETS = [100, 225, 300]          # Bornes des tranches de volume (litres)
+
 # Constantes spécifiques aux commandes
 ORDER_MIN_QUANTITY = 1                  # Quantité minimum par article
 ORDER_MAX_QUANTITY = 1000               # Quantité maximum par article
@@ -189,6 +193,9 @@ DB_POOL_SIZE = 20
 DB_MAX_OVERFLOW = 30
 DB_POOL_TIMEOUT = 30
 DB_POOL_RECYCLE = 3600
+# Moteur synchrone (tâches planifiées, scripts) : les routes API passent par le moteur asynchrone
+DB_SYNC_POOL_SIZE = 5
+DB_SYNC_MAX_OVERFLOW = 5
 
 # Constantes de Redis
 REDIS_POOL_SIZE = 10
@@ -231,6 +238,16 @@ SUPPORTED_TIMEZONES = ["UTC", "Europe/Paris", "America/New_York", "Asia/Tokyo"]
 METRICS_ENABLED = True
 METRICS_PORT = 9090
 METRICS_PATH = "/metrics"
+# Histogrammes de latence : buckets logarithmiques (erreur relative < 2,2 %)
+METRICS_HISTOGRAM_MIN = 1e-6          # secondes
+METRICS_HISTOGRAM_MAX = 600.0         # secondes
+METRICS_HISTOGRAM_BUCKETS_PER_DOUBLING = 16
+METRICS_WINDOW_SLOT_SECONDS = 10
+METRICS_WINDOWS = {"1m": 60, "5m": 300}
+# Exposition Prometheus
+METRICS_PREFIX = "millesime_"
+METRICS_PROMETHEUS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRICS_MULTIPROC_FLUSH_INTERVAL = 2  # secondes
 
 # Constantes de logging
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -3,47 +3,207 @@ Configuration de la base de données - Millésime Sans Frontières
 Gestion de la connexion SQLAlchemy et sessions
 """
 
+import time
+from typing import Any, Dict, Tuple
+
+from fastapi import Request
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool, StaticPool
 
 from app.core.config import get_database_url, settings
+from app.core.monitoring import metric_key, metrics_collector
+from app.core.query_instrumentation import install_query_instrumentation
+from app.core.unit_of_work import (
+    begin_unit_of_work,
+    commit_unit_of_work,
+    end_unit_of_work,
+    in_unit_of_work,
+    run_after_commit
+)
 
-# Création de l'engine SQLAlchemy
-if settings.DEBUG:
-    # Mode développement avec SQLite en mémoire
-    engine = create_engine(
-        "sqlite:///:memory:",
+# Base SQLite en mémoire du mode développement, partagée entre le moteur synchrone et asynchrone
+DEBUG_DATABASE_URL = "sqlite:///file:millesime_dev?mode=memory&cache=shared&uri=true"
+
+
+def get_async_database_url(url: str) -> str:
+    """Convertit une URL de base de données vers son pilote asynchrone (asyncpg, aiosqlite)"""
+    if url.startswith("postgresql://"):
+        return "postgresql+asyncpg://" + url[len("postgresql://"):]
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    return url
+
+
+class _PoolTelemetry:
+    """Attente de connexion, dépassements de délai et occupation du pool, par worker"""
+
+    telemetry_name = "sync"
+
+    def _do_get(self):
+        started_at = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            metrics_collector.increment(metric_key("db_pool_timeouts_total", pool=self.telemetry_name))
+            raise
+        finally:
+            metrics_collector.record_timing(
+                metric_key("db_pool_checkout_wait_seconds", pool=self.telemetry_name),
+                time.perf_counter() - started_at
+            )
+        self._update_gauges()
+        return connection
+
+    def _do_return_conn(self, record):
+        super()._do_return_conn(record)
+        self._update_gauges()
+
+    def _update_gauges(self) -> None:
+        metrics_collector.set_gauge(metric_key("db_pool_checked_out", pool=self.telemetry_name), self.checkedout())
+        metrics_collector.set_gauge(metric_key("db_pool_overflow", pool=self.telemetry_name), max(self.overflow(), 0))
+
+
+class InstrumentedQueuePool(_PoolTelemetry, QueuePool):
+    """Pool de connexions du moteur synchrone avec télémétrie"""
+
+
+class InstrumentedAsyncQueuePool(_PoolTelemetry, AsyncAdaptedQueuePool):
+    """Pool de connexions du moteur asynchrone avec télémétrie"""
+
+    telemetry_name = "async"
+
+
+def get_pool_options(sync: bool = False) -> Dict[str, Any]:
+    """
+    Dimensionnement du pool de connexions d'un moteur (Settings)
+
+    Le moteur asynchrone des routes API utilise DB_POOL_SIZE/DB_MAX_OVERFLOW,
+    le moteur synchrone le dimensionnement plus réduit DB_SYNC_*.
+    """
+    return {
+        "pool_size": settings.DB_SYNC_POOL_SIZE if sync else settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_SYNC_MAX_OVERFLOW if sync else settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+    }
+
+
+def get_pool_status(engine: Any) -> Dict[str, Any]:
+    """Occupation du pool de connexions d'un moteur (synchrone ou asynchrone)"""
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return {"pool": type(pool).__name__, "saturation": 0.0}
+    checked_out = pool.checkedout()
+    max_overflow = pool._max_overflow
+    capacity = pool.size() + max_overflow if max_overflow >= 0 else None
+    return {
+        "pool": type(pool).__name__,
+        "pool_size": pool.size(),
+        "max_overflow": max_overflow,
+        "checked_out": checked_out,
+        "overflow": max(pool.overflow(), 0),
+        "saturation": round(checked_out / capacity, 3) if capacity else 0.0
+    }
+
+
+def create_debug_engines(url: str = DEBUG_DATABASE_URL, echo: bool = True) -> Tuple[Engine, AsyncEngine]:
+    """
+    Moteurs du mode développement sur une base SQLite en mémoire partagée
+
+    La connexion unique du moteur synchrone maintient la base en vie. Le moteur
+    asynchrone dispose d'un pool d'une seule connexion, prêtée à une session à
+    la fois : les transactions des requêtes concurrentes s'enchaînent au lieu
+    de s'entremêler sur une même connexion (un rollback effacerait les
+    écritures non validées d'une autre requête). En cache partagé, SQLite ne
+    fait pas attendre un second écrivain (« database table is locked ») : une
+    connexion par session ne conviendrait pas davantage.
+    """
+    sync_engine = create_engine(
+        url,
         connect_args={"check_same_thread": False},
         poolclass=StaticPool,
-        echo=True
+        echo=echo
     )
+    debug_async_engine = create_async_engine(
+        get_async_database_url(url),
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        echo=echo
+    )
+    return sync_engine, debug_async_engine
+
+
+# Création de l'engine SQLAlchemy
+if settings.DEBUG:
+    # Mode développement avec SQLite en mémoire
+    engine, async_engine = create_debug_engines()
 else:
     # Mode production avec PostgreSQL
     engine = create_engine(
         get_database_url(),
-        pool_pre_ping=True,
-        pool_recycle=300,
-        echo=settings.DEBUG
+        poolclass=InstrumentedQueuePool,
+        echo=settings.DEBUG,
+        **get_pool_options(sync=True)
+    )
+    # Moteur asynchrone des routes API
+    async_engine = create_async_engine(
+        get_async_database_url(get_database_url()),
+        poolclass=InstrumentedAsyncQueuePool,
+        echo=settings.DEBUG,
+        **get_pool_options()
     )
 
+# Nombre de requêtes, temps base de données et requêtes lentes par requête HTTP
+install_query_instrumentation(engine)
+install_query_instrumentation(async_engine.sync_engine)
+
 # Création de la session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Sessions asynchrones : pas d'expiration au commit, les objets sont sérialisés après la requête
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False, class_=AsyncSession
+)
+
 # Base pour les modèles
 Base = declarative_base()
 
 
-def get_db():
-    """Générateur de session de base de données"""
+def get_db(request: Request = None):
+    """Générateur de session de base de données (unité de travail de la requête)"""
     db = SessionLocal()
+    if request is not None:
+        begin_unit_of_work(db, request)
     try:
         yield db
+        if in_unit_of_work(db):
+            db.commit()
+            run_after_commit(db)
     finally:
+        end_unit_of_work(db)
         db.close()
 
 
+async def get_async_db(request: Request = None):
+    """Générateur de session de base de données asynchrone (unité de travail de la requête)"""
+    async with AsyncSessionLocal() as db:
+        if request is not None:
+            begin_unit_of_work(db, request)
+        try:
+            yield db
+            await commit_unit_of_work(db)
+        finally:
+            end_unit_of_work(db)
+
+
 def init_db():
     """Initialisation de la base de données"""
     # Import des modèles pour qu'ils soient connus de SQLAlchemy
@@ -52,6 +212,9 @@ def init_db():
     import app.models.order
     import app.models.quote
     import app.models.address
+    import app.models.number_counter
+    import app.models.job_lock
+    import app.models.daily_rollup
     
     # Création des tables
     Base.metadata.create_all(bind=engine)
@@ -4,6 +4,7 @@ Gestion centralisée des erreurs de l'application
 """
 
 from fastapi import HTTPException, status
+from typing import Any, Dict, List
 
 
 class BaseAppException(Exception):
@@ -36,6 +37,14 @@ class BusinessLogicException(BaseAppException):
         super().__init__(message, status.HTTP_422_UNPROCESSABLE_ENTITY)
 
 
+class InsufficientStockException(ValidationException):
+    """Exception levée quand une réservation de stock échoue sur une ou plusieurs lignes"""
+    
+    def __init__(self, shortages: List[Dict[str, Any]], message: str = "Stock insuffisant pour certains articles"):
+        self.shortages = shortages
+        super().__init__(message)
+
+
 class AuthenticationException(BaseAppException):
     """Exception levée pour les erreurs d'authentification"""
     
@@ -78,6 +87,29 @@ class ExternalServiceException(BaseAppException):
         super().__init__(message, status.HTTP_502_BAD_GATEWAY)
 
 
+class ServiceUnavailableException(BaseAppException):
+    """Exception levée quand un service interne est saturé"""
+    
+    def __init__(self, message: str = "Service temporairement indisponible", retry_after: int = 1):
+        self.retry_after = retry_after
+        super().__init__(message, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+
+class IdempotencyKeyReusedException(BaseAppException):
+    """Exception levée quand une clé d'idempotence est réutilisée pour une requête différente"""
+    
+    def __init__(self, message: str = "Clé d'idempotence déjà utilisée pour une requête différente"):
+        super().__init__(message, status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+
+class IdempotencyInProgressException(ConflictException):
+    """Exception levée quand la requête d'origine d'une clé d'idempotence est toujours en cours"""
+    
+    def __init__(self, message: str = "Requête identique en cours de traitement", retry_after: int = 1):
+        self.retry_after = retry_after
+        super().__init__(message)
+
+
 def handle_app_exception(exc: BaseAppException) -> HTTPException:
     """Convertit une exception de l'application en HTTPException FastAPI"""
     return HTTPException(
@@ -0,0 +1,66 @@
+"""
+Champs partiels - Millésime Sans Frontières
+Paramètre `fields` des listes : projection SQL et schéma de réponse réduit
+"""
+
+from functools import lru_cache
+from typing import Iterable, List, Mapping, Optional, Sequence, Tuple, Type
+
+from pydantic import BaseModel, create_model
+from sqlalchemy.orm import load_only
+
+from app.core.exceptions import ValidationException
+
+
+def parse_fields(fields: Optional[str], schema: Type[BaseModel],
+                 required: Sequence[str] = ("id",)) -> Optional[Tuple[str, ...]]:
+    """
+    Champs demandés (`?fields=name,price`), dans l'ordre du schéma
+
+    Retourne None sans paramètre (réponse complète). Les champs de `required`
+    sont toujours inclus ; un champ inconnu du schéma lève une ValidationException.
+    """
+    if fields is None:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = sorted(requested - schema.model_fields.keys())
+    if unknown:
+        raise ValidationException(f"Champs inconnus: {', '.join(unknown)}")
+    requested.update(required)
+    return tuple(name for name in schema.model_fields if name in requested)
+
+
+@lru_cache(maxsize=256)
+def sparse_model(schema: Type[BaseModel], fields: Tuple[str, ...]) -> Type[BaseModel]:
+    """Schéma réduit aux champs demandés (un seul modèle construit par combinaison de champs)"""
+    definitions = {name: (schema.model_fields[name].annotation, schema.model_fields[name]) for name in fields}
+    return create_model(
+        f"{schema.__name__}[{','.join(fields)}]",
+        __config__=schema.model_config,
+        **definitions,
+    )
+
+
+def projected_columns(model: Type, fields: Iterable[str], sources: Optional[Mapping[str, Sequence[str]]] = None,
+                      always: Sequence[str] = ()) -> List:
+    """
+    Colonnes à charger pour les champs demandés
+
+    `sources` associe un champ calculé aux colonnes dont il dépend (ex. la
+    première image lue dans `image_urls`) ; `always` ajoute les colonnes
+    nécessaires au service (tri, curseur). Les champs sans colonne sont ignorés.
+    """
+    sources = sources or {}
+    columns = model.__table__.columns
+    names = list(always)
+    for field in fields:
+        names.extend(sources.get(field, (field,)))
+    return [getattr(model, name) for name in dict.fromkeys(names) if name in columns]
+
+
+def apply_projection(query, model: Type, fields: Optional[Iterable[str]],
+                     sources: Optional[Mapping[str, Sequence[str]]] = None, always: Sequence[str] = ()):
+    """Restreint le SELECT d'une requête ORM aux colonnes des champs demandés (`load_only`)"""
+    if fields is None:
+        return query
+    return query.options(load_only(*projected_columns(model, fields, sources, always), raiseload=True))
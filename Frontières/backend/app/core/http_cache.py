@@ -0,0 +1,150 @@
+"""
+Cache HTTP - Millésime Sans Frontières
+ETag, requêtes GET conditionnelles (If-None-Match, If-Modified-Since) et politiques Cache-Control
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Callable, Dict, Mapping, Optional
+
+from fastapi import HTTPException, Request, Response, status
+
+from app.core.cache import get_catalog_cache
+from app.core.config import settings
+
+
+def _utc(value: datetime) -> datetime:
+    # SQLite renvoie des dates naïves, en UTC (CURRENT_TIMESTAMP)
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _etag(*parts: Any) -> str:
+    digest = hashlib.blake2b(":".join(str(part) for part in parts).encode(), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+def entity_etag(resource_id: Any, version: datetime) -> str:
+    """ETag fort d'une ressource, dérivé de son identifiant et de sa date de modification"""
+    return _etag(resource_id, _utc(version).isoformat())
+
+
+def collection_etag(name: str, generation: int, query: str = "") -> str:
+    """ETag fort d'une lecture agrégée du catalogue, dérivé de la génération et des paramètres"""
+    return _etag(name, generation, query)
+
+
+def http_date(value: datetime) -> str:
+    """Date au format HTTP (en-têtes Last-Modified)"""
+    return format_datetime(_utc(value).replace(microsecond=0), usegmt=True)
+
+
+def _parse_http_date(value: str) -> Optional[datetime]:
+    try:
+        return _utc(parsedate_to_datetime(value))
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Comparaison faible de If-None-Match (un ETag W/ ajouté par la compression correspond)"""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+
+def validator_headers(etag: str, last_modified: Optional[datetime] = None) -> Dict[str, str]:
+    """En-têtes ETag et Last-Modified d'une réponse"""
+    headers = {"ETag": etag}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """Vérifie si la copie du client est à jour (If-None-Match prioritaire sur If-Modified-Since)"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None and last_modified is not None:
+        since = _parse_http_date(if_modified_since)
+        return since is not None and _utc(last_modified).replace(microsecond=0) <= since
+    return False
+
+
+def check_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> None:
+    """Répond 304 Not Modified, avant tout chargement ou sérialisation, si la copie du client est à jour"""
+    if is_not_modified(request, etag, last_modified):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=validator_headers(etag, last_modified))
+
+
+def catalog_etag(name: str) -> Callable[[Request, Response], Optional[str]]:
+    """
+    Dépendance : ETag d'une lecture agrégée du catalogue (liste, facettes, catégories)
+
+    Calculé sans requête SQL à partir du compteur de génération du cache
+    catalogue, incrémenté à chaque écriture. Avec le cache en mémoire, le
+    compteur est propre au worker : les déploiements à plusieurs workers
+    utilisent CACHE_BACKEND=redis, comme pour le cache lui-même.
+    """
+    def dependency(request: Request, response: Response) -> Optional[str]:
+        generation = get_catalog_cache().generation()
+        if generation is None:
+            return None
+        etag = collection_etag(name, generation, request.url.query)
+        check_not_modified(request, etag)
+        response.headers["ETag"] = etag
+        return etag
+
+    return dependency
+
+
+class CacheControlMiddleware:
+    """
+    Middleware ASGI appliquant la politique Cache-Control de chaque routeur
+
+    Les politiques sont indexées par préfixe de chemin (le plus long l'emporte)
+    et ne s'appliquent qu'aux réponses 200 et 304 des GET et HEAD qui n'ont
+    pas fixé leur propre Cache-Control.
+    """
+
+    def __init__(self, app, policies: Optional[Mapping[str, str]] = None):
+        self.app = app
+        policies = settings.CACHE_CONTROL_POLICIES if policies is None else policies
+        self.policies = sorted(policies.items(), key=lambda item: len(item[0]), reverse=True)
+
+    def policy_for(self, path: str) -> Optional[str]:
+        """Politique du préfixe le plus long correspondant au chemin"""
+        for prefix, policy in self.policies:
+            if path.startswith(prefix):
+                return policy
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        policy = self.policy_for(scope["path"])
+        if policy is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_policy(message):
+            if message["type"] == "http.response.start" and message["status"] in (200, 304):
+                headers = list(message.get("headers", []))
+                if not any(name.lower() == b"cache-control" for name, _ in headers):
+                    headers.append((b"cache-control", policy.encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_with_policy)
+
+
+def setup_cache_control(app) -> None:
+    """Ajoute les politiques Cache-Control par routeur"""
+    app.add_middleware(CacheControlMiddleware)
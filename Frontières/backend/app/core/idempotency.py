@@ -0,0 +1,167 @@
+"""
+Idempotence - Millésime Sans Frontières
+Rejeu des créations (commandes, devis) répétées avec le même en-tête Idempotency-Key
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse
+
+from app.core.cache import RedisCache, TTLCache
+from app.core.config import settings
+from app.core.exceptions import IdempotencyInProgressException, IdempotencyKeyReusedException
+from app.core.monitoring import metric_key, metrics_collector
+from app.core.redis_client import get_redis_client
+from app.core.unit_of_work import commit_unit_of_work
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+PENDING = "pending"
+DONE = "done"
+
+
+def request_fingerprint(payload: Any) -> str:
+    """Empreinte du corps de la requête (JSON canonique)"""
+    canonical = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class IdempotencyStore:
+    """
+    Registre des clés d'idempotence
+
+    La première requête réserve la clé (ajout conditionnel, expirant après
+    `lock_ttl` si le worker disparaît), exécute la création puis enregistre la
+    réponse sérialisée pour `ttl` secondes. Les doublons reçus pendant
+    l'exécution attendent cette réponse au lieu de recréer la commande ; les
+    doublons suivants la rejouent sans appeler le service. Une création en échec
+    libère la clé : une nouvelle tentative l'exécute à nouveau.
+    """
+
+    def __init__(self, backend: Any, ttl: Optional[int] = None, lock_ttl: Optional[int] = None,
+                 wait_timeout: Optional[float] = None):
+        self.backend = backend
+        self.ttl = ttl or settings.IDEMPOTENCY_TTL
+        self.lock_ttl = lock_ttl or settings.IDEMPOTENCY_LOCK_TTL
+        self.wait_timeout = settings.IDEMPOTENCY_WAIT_TIMEOUT if wait_timeout is None else wait_timeout
+
+    async def run(self, scope: str, key: str, fingerprint: str,
+                  execute: Callable[[], Awaitable[Any]], status_code: int) -> ORJSONResponse:
+        """Exécute la création une seule fois par clé et retourne sa réponse (rejouée si besoin)"""
+        record_key = f"{scope}:{key}"
+        deadline = time.monotonic() + self.wait_timeout
+        delay = 0.01
+
+        while True:
+            try:
+                claimed = self.backend.add(record_key, {"state": PENDING, "fingerprint": fingerprint},
+                                           ttl=self.lock_ttl)
+                record = None if claimed else self.backend.get(record_key)
+            except Exception as e:
+                logger.warning(f"Registre d'idempotence indisponible: {e}")
+                return self._response(await execute(), status_code, key, replayed=False)
+
+            if claimed:
+                return await self._execute(record_key, key, fingerprint, execute, status_code)
+            if record is None:
+                # Clé libérée (échec ou expiration) entre l'ajout et la lecture
+                continue
+            if record["fingerprint"] != fingerprint:
+                raise IdempotencyKeyReusedException()
+            if record["state"] == DONE:
+                metrics_collector.increment(metric_key("idempotency_replays_total", scope=scope))
+                return self._response(record["body"], record["status_code"], key, replayed=True)
+            if time.monotonic() >= deadline:
+                raise IdempotencyInProgressException()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+    async def _execute(self, record_key: str, key: str, fingerprint: str,
+                       execute: Callable[[], Awaitable[Any]], status_code: int) -> ORJSONResponse:
+        try:
+            body = await execute()
+        except BaseException:
+            self._release(record_key)
+            raise
+        try:
+            self.backend.set(record_key, {"state": DONE, "fingerprint": fingerprint,
+                                          "status_code": status_code, "body": body}, ttl=self.ttl)
+        except Exception as e:
+            logger.error(f"Enregistrement de la réponse idempotente impossible: {e}")
+        return self._response(body, status_code, key, replayed=False)
+
+    def _release(self, record_key: str) -> None:
+        try:
+            self.backend.delete(record_key)
+        except Exception as e:
+            logger.warning(f"Libération de la clé d'idempotence impossible: {e}")
+
+    @staticmethod
+    def _response(body: Any, status_code: int, key: str, replayed: bool) -> ORJSONResponse:
+        return ORJSONResponse(
+            content=body,
+            status_code=status_code,
+            headers={IDEMPOTENCY_HEADER: key, "Idempotent-Replayed": "true" if replayed else "false"}
+        )
+
+
+def create_idempotency_backend(name: Optional[str] = None) -> Any:
+    """Crée le backend du registre (CACHE_BACKEND : "memory" ou "redis", partagé entre workers)"""
+    name = name or settings.CACHE_BACKEND
+
+    if name == "redis":
+        client = get_redis_client()
+        if client is not None:
+            return RedisCache(client, prefix="millesime:idempotency:", ttl=settings.IDEMPOTENCY_TTL)
+        logger.warning("Registre d'idempotence en mémoire")
+
+    return TTLCache(maxsize=settings.IDEMPOTENCY_MAX_KEYS, ttl=settings.IDEMPOTENCY_TTL)
+
+
+_idempotency_store: Optional[IdempotencyStore] = None
+
+
+def get_idempotency_store() -> IdempotencyStore:
+    """Retourne le registre d'idempotence de l'application"""
+    global _idempotency_store
+    if _idempotency_store is None:
+        _idempotency_store = IdempotencyStore(create_idempotency_backend())
+    return _idempotency_store
+
+
+def configure_idempotency_store(backend: Any, **kwargs: Any) -> IdempotencyStore:
+    """Remplace le registre d'idempotence (tests, changement de configuration)"""
+    global _idempotency_store
+    _idempotency_store = IdempotencyStore(backend, **kwargs)
+    return _idempotency_store
+
+
+async def idempotent_create(scope: str, key: Optional[str], payload: Any,
+                            create: Callable[[], Awaitable[Any]], response_model: Any,
+                            db: Any = None, status_code: int = status.HTTP_201_CREATED) -> Any:
+    """Création protégée par l'en-tête Idempotency-Key (sans en-tête : création directe)"""
+    if key is None:
+        return await create()
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"En-tête {IDEMPOTENCY_HEADER} invalide (1 à {MAX_KEY_LENGTH} caractères)"
+        )
+
+    async def execute() -> Any:
+        created = await create()
+        # La réponse n'est enregistrée qu'une fois la création validée en base
+        if db is not None:
+            await commit_unit_of_work(db)
+        return response_model.model_validate(created).model_dump(mode="json")
+
+    return await get_idempotency_store().run(scope, key, request_fingerprint(payload), execute, status_code)
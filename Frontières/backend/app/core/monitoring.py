@@ -4,56 +4,446 @@ Configuration du système de monitoring
 """
 
 from fastapi import FastAPI
+import bisect
+import glob
+import json
+import logging
+import math
+import os
+import re
+import threading
 import time
 from collections import defaultdict
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+
+from app.core.config import settings
+from app.core.constants import (
+    METRICS_HISTOGRAM_MIN,
+    METRICS_HISTOGRAM_MAX,
+    METRICS_HISTOGRAM_BUCKETS_PER_DOUBLING,
+    METRICS_WINDOW_SLOT_SECONDS,
+    METRICS_WINDOWS,
+    METRICS_PREFIX,
+    METRICS_PROMETHEUS_BUCKETS,
+    METRICS_MULTIPROC_FLUSH_INTERVAL
+)
+
+logger = logging.getLogger(__name__)
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+class LatencyHistogram:
+    """
+    Histogramme de durées à buckets logarithmiques
+
+    Une durée est rangée dans le bucket floor(log2(d / MIN) * BUCKETS_PER_DOUBLING) ;
+    les percentiles sont restitués au centre géométrique du bucket (erreur
+    relative < 2,2 %). Seuls les buckets non vides sont stockés et leur nombre
+    est borné par l'intervalle [MIN, MAX] : la mémoire ne dépend pas du nombre
+    de mesures. Les bornes exposées à Prometheus (METRICS_PROMETHEUS_BUCKETS)
+    ne tombant pas sur des limites de buckets, chaque mesure est aussi comptée
+    dans la première de ces bornes qui la couvre (`le`, bornes incluses).
+    """
+
+    __slots__ = ("counts", "le_counts", "count", "total", "min", "max")
+
+    MAX_INDEX = int(math.log2(METRICS_HISTOGRAM_MAX / METRICS_HISTOGRAM_MIN) * METRICS_HISTOGRAM_BUCKETS_PER_DOUBLING)
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.le_counts: List[int] = [0] * len(METRICS_PROMETHEUS_BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    @classmethod
+    def bucket_index(cls, value: float) -> int:
+        """Indice du bucket d'une durée"""
+        if value <= METRICS_HISTOGRAM_MIN:
+            return 0
+        index = int(math.log2(value / METRICS_HISTOGRAM_MIN) * METRICS_HISTOGRAM_BUCKETS_PER_DOUBLING)
+        return min(index, cls.MAX_INDEX)
+
+    def record(self, value: float) -> None:
+        """Enregistre une durée"""
+        index = self.bucket_index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        position = bisect.bisect_left(METRICS_PROMETHEUS_BUCKETS, value)
+        if position < len(self.le_counts):
+            self.le_counts[position] += 1
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """Ajoute les mesures d'un autre histogramme"""
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.le_counts = [mine + theirs for mine, theirs in zip(self.le_counts, other.le_counts)]
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def percentile(self, percentile: float) -> float:
+        """Durée sous laquelle se trouvent `percentile` % des mesures"""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(percentile / 100 * self.count))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                value = METRICS_HISTOGRAM_MIN * 2 ** ((index + 0.5) / METRICS_HISTOGRAM_BUCKETS_PER_DOUBLING)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def cumulative_count(self, upper_bound: float) -> int:
+        """
+        Nombre de mesures inférieures ou égales à `upper_bound` (bucket Prometheus `le`)
+
+        Exact pour les bornes de METRICS_PROMETHEUS_BUCKETS ; pour une autre borne,
+        estimation par excès incluant le bucket logarithmique qui la contient.
+        """
+        if upper_bound in METRICS_PROMETHEUS_BUCKETS:
+            return sum(self.le_counts[:METRICS_PROMETHEUS_BUCKETS.index(upper_bound) + 1])
+        limit = self.bucket_index(upper_bound)
+        return sum(count for index, count in self.counts.items() if index <= limit)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Représentation sérialisable (JSON)"""
+        return {"counts": self.counts, "le_counts": self.le_counts, "count": self.count, "total": self.total,
+                "min": self.min if self.count else None, "max": self.max}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LatencyHistogram":
+        """Reconstruit un histogramme sérialisé par `to_dict`"""
+        histogram = cls()
+        histogram.counts = {int(index): count for index, count in data["counts"].items()}
+        histogram.le_counts = list(data["le_counts"])
+        histogram.count = data["count"]
+        histogram.total = data["total"]
+        histogram.min = math.inf if data["min"] is None else data["min"]
+        histogram.max = data["max"]
+        return histogram
+
+    def stats(self) -> Dict[str, float]:
+        """Nombre, moyenne, extrêmes et percentiles"""
+        if not self.count:
+            stats = {"count": 0, "avg": 0.0, "min": 0.0, "max": 0.0}
+        else:
+            stats = {"count": self.count, "avg": self.total / self.count, "min": self.min, "max": self.max}
+        for percentile in PERCENTILES:
+            stats[f"p{percentile}"] = self.percentile(percentile)
+        return stats
+
+
+class WindowedHistogram:
+    """
+    Histogramme cumulé et histogrammes glissants d'une opération
+
+    Les mesures récentes sont réparties dans un anneau de tranches de
+    METRICS_WINDOW_SLOT_SECONDS secondes couvrant la plus longue fenêtre ;
+    une tranche est réinitialisée lorsqu'elle est réutilisée, et une fenêtre
+    (1 min, 5 min) est obtenue en fusionnant ses tranches.
+    """
+
+    def __init__(self, slot_seconds: int = METRICS_WINDOW_SLOT_SECONDS,
+                 horizon: int = max(METRICS_WINDOWS.values())):
+        self.slot_seconds = slot_seconds
+        size = math.ceil(horizon / slot_seconds)
+        self.total = LatencyHistogram()
+        self._slots: List[Optional[LatencyHistogram]] = [None] * size
+        self._epochs: List[int] = [-1] * size
+
+    def record(self, value: float, now: float) -> None:
+        """Enregistre une durée à l'instant `now` (horloge monotone)"""
+        epoch = int(now // self.slot_seconds)
+        index = epoch % len(self._slots)
+        if self._epochs[index] != epoch:
+            self._slots[index] = LatencyHistogram()
+            self._epochs[index] = epoch
+        self._slots[index].record(value)
+        self.total.record(value)
+
+    def window(self, seconds: int, now: float) -> LatencyHistogram:
+        """Histogramme des `seconds` dernières secondes"""
+        epoch = int(now // self.slot_seconds)
+        merged = LatencyHistogram()
+        for slot_epoch in range(epoch - math.ceil(seconds / self.slot_seconds) + 1, epoch + 1):
+            index = slot_epoch % len(self._slots)
+            if self._epochs[index] == slot_epoch:
+                merged.merge(self._slots[index])
+        return merged
+
+
+def metric_key(name: str, **labels: Any) -> str:
+    """Nom d'une série étiquetée, au format Prometheus : nom{label="valeur",...}"""
+    if not labels:
+        return name
+    rendered = ",".join(
+        f'{label}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for label, value in sorted(labels.items())
+    )
+    return f"{name}{{{rendered}}}"
 
 
 class MetricsCollector:
-    """Collecteur de métriques simple"""
+    """Collecteur de métriques (compteurs, jauges et histogrammes de durées, thread-safe)"""
     
     def __init__(self):
         self.metrics = defaultdict(int)
-        self.timings = defaultdict(list)
+        self.gauges: Dict[str, float] = defaultdict(float)
+        self.timings: Dict[str, WindowedHistogram] = {}
+        self._lock = threading.Lock()
     
     def increment(self, metric_name: str, value: int = 1) -> None:
         """Incrémente une métrique"""
-        self.metrics[metric_name] += value
+        with self._lock:
+            self.metrics[metric_name] += value
+    
+    def set_gauge(self, gauge_name: str, value: float) -> None:
+        """Fixe la valeur d'une jauge"""
+        with self._lock:
+            self.gauges[gauge_name] = value
+    
+    def add_gauge(self, gauge_name: str, delta: float) -> None:
+        """Fait varier une jauge"""
+        with self._lock:
+            self.gauges[gauge_name] += delta
+    
+    def get_gauge(self, gauge_name: str) -> float:
+        """Récupère la valeur d'une jauge"""
+        with self._lock:
+            return self.gauges.get(gauge_name, 0)
+
+    def sum_metric(self, metric_name: str) -> int:
+        """Somme des séries d'une métrique, toutes étiquettes confondues"""
+        with self._lock:
+            return sum(value for key, value in self.metrics.items()
+                       if key == metric_name or key.startswith(metric_name + "{"))
     
     def record_timing(self, operation: str, duration: float) -> None:
         """Enregistre le temps d'une opération"""
-        self.timings[operation].append(duration)
+        now = time.monotonic()
+        with self._lock:
+            histogram = self.timings.get(operation)
+            if histogram is None:
+                histogram = self.timings[operation] = WindowedHistogram()
+            histogram.record(duration, now)
     
     def get_metric(self, metric_name: str) -> int:
         """Récupère la valeur d'une métrique"""
         return self.metrics[metric_name]
     
-    def get_timing_stats(self, operation: str) -> Dict[str, float]:
-        """Récupère les statistiques de timing d'une opération"""
-        timings = self.timings[operation]
-        if not timings:
-            return {"count": 0, "avg": 0.0, "min": 0.0, "max": 0.0}
+    def get_timing_stats(self, operation: str, window: Optional[str] = None) -> Dict[str, float]:
+        """
+        Récupère les statistiques de timing d'une opération
         
-        return {
-            "count": len(timings),
-            "avg": sum(timings) / len(timings),
-            "min": min(timings),
-            "max": max(timings)
-        }
+        `window` : None pour toutes les mesures, sinon une clé de METRICS_WINDOWS ("1m", "5m")
+        """
+        now = time.monotonic()
+        with self._lock:
+            histogram = self.timings.get(operation)
+            if histogram is None:
+                return LatencyHistogram().stats()
+            if window is None:
+                return histogram.total.stats()
+            return histogram.window(METRICS_WINDOWS[window], now).stats()
+    
+    def get_timing_summary(self, operation: str) -> Dict[str, Any]:
+        """Statistiques cumulées d'une opération et statistiques par fenêtre glissante"""
+        summary: Dict[str, Any] = self.get_timing_stats(operation)
+        summary["windows"] = {window: self.get_timing_stats(operation, window) for window in METRICS_WINDOWS}
+        return summary
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Copie sérialisable des compteurs, jauges et histogrammes cumulés"""
+        with self._lock:
+            return {
+                "counters": dict(self.metrics),
+                "gauges": dict(self.gauges),
+                "histograms": {key: histogram.total.to_dict() for key, histogram in self.timings.items()}
+            }
     
     def reset(self) -> None:
         """Réinitialise toutes les métriques"""
-        self.metrics.clear()
-        self.timings.clear()
+        with self._lock:
+            self.metrics.clear()
+            self.gauges.clear()
+            self.timings.clear()
 
 
 # Instance globale du collecteur de métriques
 metrics_collector = MetricsCollector()
 
 
+class PrometheusMiddleware:
+    """
+    Middleware ASGI de mesure des requêtes HTTP
+
+    Compte les requêtes, suit le nombre de requêtes en cours et mesure leur durée.
+    Les séries sont étiquetées par modèle de route (`/v1/barrels/{barrel_id}`),
+    jamais par chemin brut, pour garder une cardinalité bornée.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        metrics_collector.add_gauge("http_requests_in_progress", 1)
+        start_time = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - start_time
+            metrics_collector.add_gauge("http_requests_in_progress", -1)
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            record_request_metric(route, scope["method"], status_code, duration)
+            flush_metrics_if_due()
+
+
+def _metric_name(name: str) -> str:
+    return METRICS_PREFIX + re.sub(r"[^a-zA-Z0-9_:]", "_", name)
+
+
+def _split_key(key: str) -> tuple:
+    name, _, labels = key.partition("{")
+    return _metric_name(name), labels[:-1] if labels else ""
+
+
+def _series(name: str, labels: str, value: Any, extra_label: str = "") -> str:
+    all_labels = ",".join(label for label in (labels, extra_label) if label)
+    return f"{name}{{{all_labels}}} {value}" if all_labels else f"{name} {value}"
+
+
+def render_prometheus(snapshot: Dict[str, Any]) -> str:
+    """Exposition des métriques au format texte Prometheus (version 0.0.4)"""
+    families: Dict[str, Dict[str, Any]] = {}
+
+    for key, value in sorted(snapshot["counters"].items()):
+        name, labels = _split_key(key)
+        if not name.endswith("_total"):
+            name += "_total"
+        families.setdefault(name, {"type": "counter", "lines": []})["lines"].append(_series(name, labels, value))
+
+    for key, value in sorted(snapshot["gauges"].items()):
+        name, labels = _split_key(key)
+        families.setdefault(name, {"type": "gauge", "lines": []})["lines"].append(_series(name, labels, value))
+
+    for key, data in sorted(snapshot["histograms"].items()):
+        name, labels = _split_key(key)
+        histogram = LatencyHistogram.from_dict(data)
+        lines = families.setdefault(name, {"type": "histogram", "lines": []})["lines"]
+        for upper_bound in METRICS_PROMETHEUS_BUCKETS:
+            lines.append(_series(f"{name}_bucket", labels, histogram.cumulative_count(upper_bound),
+                                 f'le="{upper_bound}"'))
+        lines.append(_series(f"{name}_bucket", labels, histogram.count, 'le="+Inf"'))
+        lines.append(_series(f"{name}_sum", labels, histogram.total))
+        lines.append(_series(f"{name}_count", labels, histogram.count))
+
+    output = []
+    for name, family in families.items():
+        output.append(f"# TYPE {name} {family['type']}")
+        output.extend(family["lines"])
+    return "\n".join(output) + "\n"
+
+
+# Mode multiprocessus : chaque worker dépose régulièrement un instantané de ses
+# métriques dans METRICS_MULTIPROC_DIR ; /metrics agrège les instantanés de tous
+# les workers (compteurs et histogrammes additionnés, jauges des seuls workers vivants).
+_last_flush = 0.0
+
+
+def _snapshot_path(directory: str, pid: int) -> str:
+    return os.path.join(directory, f"metrics_{pid}.json")
+
+
+def flush_metrics(directory: Optional[str] = None) -> None:
+    """Écrit l'instantané des métriques du worker (écriture atomique)"""
+    global _last_flush
+    directory = directory or settings.METRICS_MULTIPROC_DIR
+    if not directory:
+        return
+    _last_flush = time.monotonic()
+    path = _snapshot_path(directory, os.getpid())
+    try:
+        with open(f"{path}.tmp", "w") as snapshot_file:
+            json.dump(metrics_collector.snapshot(), snapshot_file)
+        os.replace(f"{path}.tmp", path)
+    except OSError as e:
+        logger.warning(f"Écriture des métriques impossible: {e}")
+
+
+def flush_metrics_if_due() -> None:
+    """Écrit l'instantané du worker au plus toutes les METRICS_MULTIPROC_FLUSH_INTERVAL secondes"""
+    if settings.METRICS_MULTIPROC_DIR and time.monotonic() - _last_flush >= METRICS_MULTIPROC_FLUSH_INTERVAL:
+        flush_metrics()
+
+
+def _is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def collect_metrics(directory: Optional[str] = None) -> Dict[str, Any]:
+    """Métriques du processus, ou agrégées sur tous les workers en mode multiprocessus"""
+    directory = directory or settings.METRICS_MULTIPROC_DIR
+    if not directory:
+        return metrics_collector.snapshot()
+
+    flush_metrics(directory)
+    counters: Dict[str, float] = defaultdict(int)
+    gauges: Dict[str, float] = defaultdict(float)
+    histograms: Dict[str, LatencyHistogram] = {}
+
+    for path in glob.glob(os.path.join(directory, "metrics_*.json")):
+        try:
+            pid = int(os.path.basename(path)[len("metrics_"):-len(".json")])
+            with open(path) as snapshot_file:
+                snapshot = json.load(snapshot_file)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Instantané de métriques illisible {path}: {e}")
+            continue
+        for key, value in snapshot["counters"].items():
+            counters[key] += value
+        if _is_alive(pid):
+            for key, value in snapshot["gauges"].items():
+                gauges[key] += value
+        for key, data in snapshot["histograms"].items():
+            histogram = histograms.setdefault(key, LatencyHistogram())
+            histogram.merge(LatencyHistogram.from_dict(data))
+
+    return {
+        "counters": dict(counters),
+        "gauges": dict(gauges),
+        "histograms": {key: histogram.to_dict() for key, histogram in histograms.items()}
+    }
+
+
 def setup_monitoring(app: FastAPI, metrics: Dict[str, Any] = None) -> None:
     """Configure le monitoring de l'application"""
-    # Configuration basique du monitoring
+    app.add_middleware(PrometheusMiddleware)
     if metrics:
         for metric_name, value in metrics.items():
             metrics_collector.increment(metric_name, value)
@@ -67,32 +457,26 @@ def setup_monitoring_with_custom_metrics(app: FastAPI, metrics: Dict[str, Any] =
 
 
 def record_request_metric(endpoint: str, method: str, status_code: int, duration: float) -> None:
-    """Enregistre les métriques d'une requête"""
-    metrics_collector.increment(f"requests_total")
-    metrics_collector.increment(f"requests_{method.lower()}")
-    metrics_collector.increment(f"requests_{status_code}")
-    metrics_collector.record_timing(f"request_duration_{endpoint}", duration)
+    """Enregistre les métriques d'une requête (`endpoint` : modèle de route)"""
+    metrics_collector.increment(metric_key("http_requests_total", method=method, route=endpoint, status=status_code))
+    metrics_collector.record_timing(metric_key("http_request_duration_seconds", method=method, route=endpoint), duration)
 
 
 def record_database_metric(operation: str, duration: float, success: bool) -> None:
     """Enregistre les métriques de base de données"""
-    metrics_collector.increment(f"db_operations_total")
-    metrics_collector.increment(f"db_operations_{operation}")
-    if success:
-        metrics_collector.increment(f"db_operations_{operation}_success")
-    else:
-        metrics_collector.increment(f"db_operations_{operation}_error")
-    metrics_collector.record_timing(f"db_duration_{operation}", duration)
+    status = "success" if success else "error"
+    metrics_collector.increment(metric_key("db_operations_total", operation=operation, status=status))
+    metrics_collector.record_timing(metric_key("db_operation_duration_seconds", operation=operation), duration)
 
 
 def get_metrics_summary() -> Dict[str, Any]:
     """Récupère un résumé des métriques"""
     return {
-        "total_requests": metrics_collector.get_metric("requests_total"),
-        "db_operations": metrics_collector.get_metric("db_operations_total"),
+        "total_requests": metrics_collector.sum_metric("http_requests_total"),
+        "db_operations": metrics_collector.sum_metric("db_operations_total"),
         "timing_stats": {
-            operation: metrics_collector.get_timing_stats(operation)
-            for operation in metrics_collector.timings.keys()
+            operation: metrics_collector.get_timing_summary(operation)
+            for operation in list(metrics_collector.timings)
         }
     }
 
@@ -0,0 +1,95 @@
+"""
+Numérotation - Millésime Sans Frontières
+Attribution des numéros de commande et de devis (ORD-AAAAMMJJ-NNNN) sans parcours de table
+"""
+
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.number_counter import NumberCounter
+
+_UPSERT_DIALECTS = {"postgresql": postgresql, "sqlite": sqlite}
+
+
+def increment_counter(connection: Connection, prefix: str, day: str, amount: int = 1) -> int:
+    """Incrémente atomiquement le compteur du jour et retourne sa nouvelle valeur"""
+    dialect = _UPSERT_DIALECTS[connection.dialect.name]
+    counters = NumberCounter.__table__
+    statement = dialect.insert(counters).values(prefix=prefix, day=day, value=amount)
+    statement = statement.on_conflict_do_update(
+        index_elements=[counters.c.prefix, counters.c.day],
+        set_={"value": counters.c.value + amount}
+    ).returning(counters.c.value)
+    return connection.execute(statement).scalar_one()
+
+
+class NumberAllocator:
+    """
+    Allocateur de numéros quotidiens
+
+    Un compteur par préfixe et par jour remplace le COUNT(*) des lignes du jour :
+    coût constant et numéros uniques pour des créations concurrentes. Sous
+    PostgreSQL, chaque worker réserve des blocs de `block_size` numéros (hi-lo)
+    dans une transaction courte et indépendante, le verrou de ligne n'est donc
+    jamais tenu pendant la création de la commande. Sous SQLite (verrou
+    d'écriture global), le compteur est incrémenté dans la transaction de
+    l'appelant et annulé avec elle.
+    """
+
+    def __init__(self, prefix: str, block_size: Optional[int] = None):
+        self.prefix = prefix
+        self.block_size = block_size or settings.NUMBER_BLOCK_SIZE
+        self._blocks: Dict[str, List[List[int]]] = {}
+        self._lock = threading.Lock()
+
+    def next_number(self, db: Session) -> str:
+        """Attribue le prochain numéro du jour"""
+        day = datetime.now().strftime("%Y%m%d")
+        bind = db.get_bind()
+        if bind.dialect.name == "sqlite":
+            value = increment_counter(db.connection(), self.prefix, day)
+        else:
+            value = self._take(day)
+            while value is None:
+                # Réservation hors du verrou : en asynchrone, l'appel cède la boucle d'événements
+                with bind.begin() as connection:
+                    high = increment_counter(connection, self.prefix, day, self.block_size)
+                with self._lock:
+                    self._blocks.setdefault(day, []).append([high - self.block_size + 1, high])
+                value = self._take(day)
+        return f"{self.prefix}-{day}-{value:04d}"
+
+    def reset(self) -> None:
+        """Oublie les blocs réservés (changement de base)"""
+        with self._lock:
+            self._blocks.clear()
+
+    def _take(self, day: str) -> Optional[int]:
+        with self._lock:
+            if day not in self._blocks:
+                # Nouveau jour : les blocs des jours précédents sont abandonnés
+                self._blocks = {day: []}
+            blocks = self._blocks[day]
+            while blocks and blocks[0][0] > blocks[0][1]:
+                blocks.pop(0)
+            if not blocks:
+                return None
+            value = blocks[0][0]
+            blocks[0][0] += 1
+            return value
+
+
+order_numbers = NumberAllocator("ORD")
+quote_numbers = NumberAllocator("QUO")
+
+
+def reset_number_allocators() -> None:
+    """Oublie les blocs réservés par les allocateurs (tests, changement de base)"""
+    order_numbers.reset()
+    quote_numbers.reset()
@@ -0,0 +1,117 @@
+"""
+Pagination - Millésime Sans Frontières
+Pagination par curseur (keyset) pour les listes volumineuses
+"""
+
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import tuple_, func
+from sqlalchemy.orm import Query
+
+from app.core.exceptions import ValidationException
+
+
+def _serialize_value(value: Any) -> Any:
+    """Convertit une valeur de clé de tri en valeur JSON"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if hasattr(value, "value"):  # Enum
+        return value.value
+    return value
+
+
+def _deserialize_value(value: Any, python_type: type) -> Any:
+    """Reconstruit une valeur de clé de tri à partir du curseur"""
+    if value is None:
+        return None
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is Decimal:
+        return Decimal(value)
+    return value
+
+
+def encode_cursor(sort_key: str, value: Any, row_id: Any) -> str:
+    """Encode la position (valeur de tri, id) d'une ligne en curseur opaque"""
+    payload = {"s": sort_key, "v": _serialize_value(value), "id": str(row_id)}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_key: str, python_type: type = datetime) -> Tuple[Any, str]:
+    """Décode un curseur opaque et vérifie qu'il correspond à la clé de tri active"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if payload["s"] != sort_key:
+            raise ValueError("clé de tri différente")
+        return _deserialize_value(payload["v"], python_type), payload["id"]
+    except (ValueError, KeyError, TypeError):
+        raise ValidationException("Curseur de pagination invalide")
+
+
+def paginate_keyset(
+    query: Query,
+    sort_column: Any,
+    id_column: Any,
+    limit: int,
+    cursor: Optional[str] = None,
+    descending: bool = True
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Pagine une requête par curseur sur (colonne de tri, id)
+
+    Chaque page est servie par l'index (colonne de tri, id) quelle que soit
+    sa profondeur, contrairement à OFFSET qui parcourt les lignes ignorées.
+
+    Returns:
+        Tuple: (éléments de la page, curseur de la page suivante ou None)
+    """
+    sort_key = sort_column.key
+    python_type = sort_column.type.python_type
+
+    if cursor:
+        value, row_id = decode_cursor(cursor, sort_key, python_type)
+        position = tuple_(sort_column, id_column)
+        bound = tuple_(value, row_id)
+
+        # SQLite stocke CURRENT_TIMESTAMP sans microsecondes : comparer les instants, pas les chaînes
+        if python_type is datetime and _dialect_name(query) == "sqlite":
+            position = tuple_(func.julianday(sort_column), id_column)
+            bound = tuple_(func.julianday(value), row_id)
+
+        query = query.filter(position < bound if descending else position > bound)
+
+    if descending:
+        query = query.order_by(sort_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(sort_column.asc(), id_column.asc())
+
+    # Une ligne de plus pour savoir s'il existe une page suivante
+    rows = query.limit(limit + 1).all()
+    items = rows[:limit]
+
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = cursor_for(items[-1], sort_column, id_column)
+
+    return items, next_cursor
+
+
+def cursor_for(item: Any, sort_column: Any, id_column: Any) -> str:
+    """Construit le curseur pointant juste après un élément"""
+    return encode_cursor(sort_column.key, getattr(item, sort_column.key), getattr(item, id_column.key))
+
+
+def _dialect_name(query: Query) -> Optional[str]:
+    """Retourne le nom du dialecte SQL de la session de la requête"""
+    try:
+        return query.session.get_bind().dialect.name
+    except Exception:
+        return None
@@ -0,0 +1,144 @@
+"""
+Hachage des mots de passe - Millésime Sans Frontières
+Calcul bcrypt sur un pool de threads borné, hors de la boucle d'événements
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from passlib.context import CryptContext
+
+from app.core.config import settings
+from app.core.exceptions import ServiceUnavailableException
+from app.core.monitoring import metric_key, metrics_collector
+
+
+class PasswordHasher:
+    """
+    Hachage et vérification bcrypt
+
+    Les méthodes `*_async` confient le calcul (~250 ms à 12 tours) à un pool de
+    threads dédié ; bcrypt libère le GIL, la boucle d'événements continue donc de
+    servir les autres requêtes. Au-delà de `max_pending` opérations en cours ou
+    en attente, les demandes sont refusées immédiatement (503) au lieu d'allonger
+    la file. Les empreintes calculées avec un autre coût que `rounds` sont
+    signalées par `verify_and_update` pour être recalculées à la connexion.
+    """
+
+    def __init__(self, rounds: Optional[int] = None, max_workers: Optional[int] = None,
+                 max_pending: Optional[int] = None):
+        self.rounds = rounds or settings.BCRYPT_ROUNDS
+        self.max_workers = max_workers or settings.PASSWORD_HASH_WORKERS
+        self.max_pending = max_pending or settings.PASSWORD_HASH_MAX_PENDING
+        self.context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=self.rounds)
+        self.rejected = 0
+        self._pending = 0
+        self._active = 0
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def hash(self, password: str) -> str:
+        """Hache un mot de passe (appel bloquant)"""
+        return self.context.hash(password)
+
+    def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Vérifie un mot de passe (appel bloquant)"""
+        return self.context.verify(plain_password, hashed_password)
+
+    def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Vérifie un mot de passe et retourne la nouvelle empreinte si le coût a changé (appel bloquant)"""
+        if not plain_password or not hashed_password:
+            return False, None
+        try:
+            return self.context.verify_and_update(plain_password, hashed_password)
+        except ValueError:
+            # Empreinte illisible : équivalent à un mot de passe incorrect
+            return False, None
+
+    async def hash_async(self, password: str) -> str:
+        """Hache un mot de passe sur le pool de hachage"""
+        return await self._run("hash", self.hash, password)
+
+    async def verify_and_update_async(self, plain_password: str,
+                                      hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Vérifie un mot de passe sur le pool de hachage"""
+        return await self._run("verify", self.verify_and_update, plain_password, hashed_password)
+
+    def stats(self) -> Dict[str, int]:
+        """Occupation du pool : opérations en cours, en file et refusées"""
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "active": self._active,
+                "queued": self._pending - self._active,
+                "rejected": self.rejected
+            }
+
+    def shutdown(self) -> None:
+        """Arrête le pool de hachage"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _run(self, operation: str, fn: Callable[..., Any], *args: Any) -> Any:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                metrics_collector.increment("password_hash_rejected_total")
+                raise ServiceUnavailableException(
+                    "Service d'authentification saturé, veuillez réessayer dans un instant"
+                )
+            self._pending += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix="password-hash")
+            executor = self._executor
+
+        submitted_at = time.perf_counter()
+
+        def task() -> Any:
+            started_at = time.perf_counter()
+            metrics_collector.record_timing("password_hash_queue_wait_seconds", started_at - submitted_at)
+            with self._lock:
+                self._active += 1
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self._active -= 1
+                metrics_collector.record_timing(metric_key("password_hash_duration_seconds", operation=operation),
+                                              time.perf_counter() - started_at)
+
+        future = executor.submit(task)
+        # Libération à la fin du calcul, même si la requête cliente est annulée entre-temps
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def _release(self, _future: Future) -> None:
+        with self._lock:
+            self._pending -= 1
+
+
+_password_hasher: Optional[PasswordHasher] = None
+
+
+def get_password_hasher() -> PasswordHasher:
+    """Retourne le hacheur de mots de passe de l'application"""
+    global _password_hasher
+    if _password_hasher is None:
+        _password_hasher = PasswordHasher()
+    return _password_hasher
+
+
+def configure_password_hasher(**kwargs: Any) -> PasswordHasher:
+    """Remplace le hacheur de mots de passe (tests, changement de configuration)"""
+    global _password_hasher
+    if _password_hasher is not None:
+        _password_hasher.shutdown()
+    _password_hasher = PasswordHasher(**kwargs)
+    return _password_hasher
@@ -0,0 +1,176 @@
+"""
+Instrumentation SQL - Millésime Sans Frontières
+Nombre de requêtes et temps base de données par requête HTTP, requêtes lentes et détection N+1
+"""
+
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.monitoring import metric_key, metrics_collector, record_database_metric
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+# Listes IN développées : IN (?, ?, ?) et IN (%(id_1)s, %(id_2)s) ont la même forme
+_EXPANDED_LIST = re.compile(r"\((?:\s*(?:\?|%\(\w+\)s|\$\d+|:\w+)\s*,)+\s*(?:\?|%\(\w+\)s|\$\d+|:\w+)\s*\)")
+_MAX_LOGGED_PARAMETERS = 500
+
+
+def statement_shape(statement: str) -> str:
+    """Forme normalisée d'une requête SQL (espaces et listes de paramètres regroupés)"""
+    return _EXPANDED_LIST.sub("(?)", _WHITESPACE.sub(" ", statement).strip())
+
+
+def _operation(statement: str) -> str:
+    words = statement.split(None, 1)
+    return words[0].upper() if words else "UNKNOWN"
+
+
+class RequestQueryStats:
+    """Requêtes SQL émises pendant le traitement d'une requête HTTP"""
+
+    def __init__(self, tag: str):
+        self.tag = tag
+        self.count = 0
+        self.duration = 0.0
+        self.shapes: Counter = Counter()
+
+    def record(self, statement: str, duration: float) -> None:
+        """Comptabilise une requête SQL"""
+        self.count += 1
+        self.duration += duration
+        self.shapes[statement_shape(statement)] += 1
+
+    def n_plus_one_candidates(self, threshold: Optional[int] = None) -> Dict[str, int]:
+        """Formes de requêtes répétées au moins `threshold` fois (candidates N+1)"""
+        threshold = threshold or settings.N_PLUS_ONE_THRESHOLD
+        return {shape: count for shape, count in self.shapes.items() if count >= threshold}
+
+
+_current_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar("query_stats", default=None)
+
+
+def get_request_query_stats() -> Optional[RequestQueryStats]:
+    """Statistiques SQL de la requête HTTP courante"""
+    return _current_stats.get()
+
+
+def track_queries(tag: str) -> Any:
+    """Démarre le suivi des requêtes SQL du contexte courant ; retourne le jeton de `stop_tracking`"""
+    return _current_stats.set(RequestQueryStats(tag))
+
+
+def stop_tracking(token: Any) -> None:
+    """Arrête le suivi démarré par `track_queries`"""
+    _current_stats.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info["query_start_time"].pop()
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, duration)
+    record_database_metric(_operation(statement), duration, True)
+
+    if duration * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS:
+        metrics_collector.increment("db_slow_queries_total")
+        logger.warning(
+            f"Requête SQL lente ({duration * 1000:.1f} ms) [{stats.tag if stats else 'hors requête'}]: "
+            f"{statement} -- paramètres: {repr(parameters)[:_MAX_LOGGED_PARAMETERS]}"
+        )
+
+
+def _handle_error(exception_context):
+    connection = exception_context.connection
+    if connection is None or not connection.info.get("query_start_time"):
+        return
+    duration = time.perf_counter() - connection.info["query_start_time"].pop()
+    record_database_metric(_operation(exception_context.statement or ""), duration, False)
+
+
+def install_query_instrumentation(engine: Engine) -> None:
+    """Installe les hooks de mesure sur un moteur (pour un moteur asynchrone : `sync_engine`)"""
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def uninstall_query_instrumentation(engine: Engine) -> None:
+    """Retire les hooks de mesure d'un moteur"""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.remove(engine, "before_cursor_execute", _before_cursor_execute)
+    event.remove(engine, "after_cursor_execute", _after_cursor_execute)
+    event.remove(engine, "handle_error", _handle_error)
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Middleware ASGI de suivi des requêtes SQL par requête HTTP
+
+    En développement (DEBUG), le nombre de requêtes, le temps base de données et
+    le nombre de formes N+1 sont renvoyés dans les en-têtes X-DB-*. Dans tous les
+    cas, ils alimentent les métriques par modèle de route et les formes N+1 sont
+    journalisées.
+    """
+
+    def __init__(self, app, expose_headers: Optional[bool] = None):
+        self.app = app
+        self.expose_headers = settings.DEBUG if expose_headers is None else expose_headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = dict(scope["headers"]).get(b"x-request-id", b"").decode("latin-1")
+        tag = f"{scope['method']} {scope['path']}" + (f" ({request_id})" if request_id else "")
+        token = track_queries(tag)
+        stats = _current_stats.get()
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start" and self.expose_headers:
+                headers: List = list(message.get("headers", []))
+                headers.extend([
+                    (b"x-db-query-count", str(stats.count).encode()),
+                    (b"x-db-time-ms", f"{stats.duration * 1000:.2f}".encode()),
+                    (b"x-db-n-plus-one", str(len(stats.n_plus_one_candidates())).encode()),
+                ])
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            stop_tracking(token)
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            self._record(route, stats)
+
+    @staticmethod
+    def _record(route: str, stats: RequestQueryStats) -> None:
+        metrics_collector.increment(metric_key("db_queries_total", route=route), stats.count)
+        metrics_collector.record_timing(metric_key("db_request_time_seconds", route=route), stats.duration)
+        candidates = stats.n_plus_one_candidates()
+        if candidates:
+            metrics_collector.increment(metric_key("db_n_plus_one_total", route=route))
+            for shape, count in candidates.items():
+                logger.warning(f"N+1 probable [{stats.tag}] : {count} exécutions de {shape}")
+
+
+def setup_query_instrumentation(app) -> None:
+    """Ajoute le suivi des requêtes SQL par requête HTTP"""
+    app.add_middleware(QueryInstrumentationMiddleware)
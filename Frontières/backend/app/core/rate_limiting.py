@@ -3,177 +3,562 @@ Rate Limiting - Millésime Sans Frontières
 Gestion de la limitation de débit des requêtes
 """
 
+import hashlib
+import logging
+import math
+import os
+import struct
+import tempfile
+import threading
 import time
-from typing import Dict, Any
-from datetime import datetime, timedelta
+from collections import OrderedDict
+from contextlib import contextmanager
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.redis_client import get_redis_client, register_script_emulation
+
+try:
+    import fcntl
+except ImportError:  # plateformes non POSIX : pas de backend "shared"
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class _WindowState:
+    """Compteurs d'une clé client:endpoint (fenêtre glissante à deux compteurs)"""
+
+    __slots__ = ("window_start", "current", "previous", "blocked_until", "expires_at")
+
+    def __init__(self, window_start: float, current: int = 0, previous: int = 0,
+                 blocked_until: float = 0.0, expires_at: float = 0.0):
+        self.window_start = window_start
+        self.current = current
+        self.previous = previous
+        self.blocked_until = blocked_until
+        self.expires_at = expires_at
+
+
+def _roll(state: _WindowState, window: int, now: float) -> None:
+    """Fait avancer les compteurs jusqu'à la fenêtre fixe contenant `now`"""
+    window_start = now - now % window
+    if window_start == state.window_start:
+        return
+    state.previous = state.current if window_start - state.window_start == window else 0
+    state.current = 0
+    state.window_start = window_start
+
+
+def _estimate(state: _WindowState, window: int, now: float) -> float:
+    """Nombre de requêtes estimé sur la fenêtre glissante se terminant à `now`"""
+    elapsed = (now - state.window_start) / window
+    return state.previous * (1 - elapsed) + state.current
+
+
+def _apply_hit(state: _WindowState, max_requests: int, window: int, block_seconds: int, now: float) -> bool:
+    """Comptabilise une requête sur l'état d'une clé et indique si elle est autorisée"""
+    _roll(state, window, now)
+    allowed = False
+    if now >= state.blocked_until:
+        if _estimate(state, window, now) + 1 > max_requests:
+            state.blocked_until = now + block_seconds
+        else:
+            state.current += 1
+            allowed = True
+    state.expires_at = max(state.window_start + 2 * window, state.blocked_until)
+    return allowed
+
+
+class MemoryRateLimitBackend:
+    """
+    Compteurs en mémoire du processus
+
+    Les clés sont rangées de la moins à la plus récemment utilisée : les clés
+    inactives sont balayées depuis le début de la file et le nombre total de
+    clés est plafonné (éviction LRU).
+    """
+
+    def __init__(self, max_keys: Optional[int] = None, sweep_interval: Optional[int] = None):
+        self.max_keys = max_keys or settings.RATE_LIMIT_MAX_KEYS
+        self.sweep_interval = settings.RATE_LIMIT_SWEEP_INTERVAL if sweep_interval is None else sweep_interval
+        self._entries: "OrderedDict[str, _WindowState]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_sweep = 0.0
+
+    def hit(self, key: str, max_requests: int, window: int, block_seconds: int, now: float) -> bool:
+        """Comptabilise une requête et indique si elle est autorisée"""
+        with self._lock:
+            if now - self._last_sweep >= self.sweep_interval:
+                self._sweep(now)
+            state = self._entries.get(key)
+            if state is None:
+                state = self._entries[key] = _WindowState(now - now % window)
+                if len(self._entries) > self.max_keys:
+                    self._entries.popitem(last=False)
+            else:
+                self._entries.move_to_end(key)
+            return _apply_hit(state, max_requests, window, block_seconds, now)
+
+    def get(self, key: str, window: int, now: float) -> Optional[_WindowState]:
+        """Retourne l'état d'une clé à l'instant `now`"""
+        with self._lock:
+            state = self._entries.get(key)
+            if state is not None:
+                _roll(state, window, now)
+            return state
+
+    def reset(self, key: str) -> bool:
+        """Supprime les compteurs d'une clé"""
+        with self._lock:
+            return self._entries.pop(key, None) is not None
+
+    def keys(self) -> List[str]:
+        """Clés suivies"""
+        with self._lock:
+            return list(self._entries)
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Supprime les clés inactives depuis plus de deux fenêtres ; retourne le nombre de clés supprimées"""
+        with self._lock:
+            return self._sweep(time.time() if now is None else now)
+
+    def clear(self) -> None:
+        """Supprime toutes les clés"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _sweep(self, now: float) -> int:
+        self._last_sweep = now
+        removed = 0
+        # Parcours depuis la clé la moins récemment utilisée, arrêt à la première encore utile
+        while self._entries:
+            key, state = next(iter(self._entries.items()))
+            if state.expires_at > now:
+                break
+            del self._entries[key]
+            removed += 1
+        return removed
+
+
+# Décision complète en un aller-retour : blocage, estimation, INCR/EXPIRE ou blocage
+# KEYS : compteur courant, compteur précédent, échéance de blocage
+# ARGV : now, début de fenêtre, fenêtre, max_requests, fin du blocage, durée du blocage (0 : aucun)
+_HIT_SCRIPT = """
+local now = tonumber(ARGV[1])
+if now < tonumber(redis.call('GET', KEYS[3]) or '0') then
+    return 0
+end
+local window = tonumber(ARGV[3])
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+local estimate = previous * (1 - (now - tonumber(ARGV[2])) / window) + current
+if estimate + 1 > tonumber(ARGV[4]) then
+    if tonumber(ARGV[6]) > 0 then
+        redis.call('SET', KEYS[3], ARGV[5], 'EX', ARGV[6])
+    end
+    return 0
+end
+redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], 2 * window)
+return 1
+"""
+
+
+def _emulate_hit_script(client: Any, keys: list, args: list) -> int:
+    """Équivalent Python de _HIT_SCRIPT pour le client Redis de substitution"""
+    current_key, previous_key, blocked_key = keys
+    now, window_start, window, max_requests = float(args[0]), float(args[1]), int(args[2]), int(args[3])
+    if now < float(client.get(blocked_key) or 0):
+        return 0
+    state = _WindowState(window_start, int(client.get(current_key) or 0), int(client.get(previous_key) or 0))
+    if _estimate(state, window, now) + 1 > max_requests:
+        if int(args[5]) > 0:
+            client.set(blocked_key, args[4], ex=int(args[5]))
+        return 0
+    client.incr(current_key)
+    client.expire(current_key, 2 * window)
+    return 1
+
+
+register_script_emulation(_HIT_SCRIPT, _emulate_hit_script)
+
+
+class RedisRateLimitBackend:
+    """
+    Compteurs sur un serveur Redis, partagés entre workers et hôtes
+
+    Un compteur par fenêtre fixe (`<clé>:<début de fenêtre>`, expirant après deux
+    fenêtres) et une échéance de blocage (`<clé>:blocked`). Chaque requête coûte
+    un seul EVALSHA : le script lit le blocage et les deux compteurs, puis
+    incrémente le compteur courant (requête autorisée) ou pose le blocage
+    (requête refusée, sans consommer de quota). Le script étant atomique, aucun
+    appelant concurrent ne voit de compteur transitoirement gonflé.
+    """
+
+    def __init__(self, client: Any, prefix: str = "millesime:ratelimit:"):
+        self.client = client
+        self.prefix = prefix
+        self._hit_script = client.register_script(_HIT_SCRIPT)
+
+    def _window_key(self, key: str, window_start: float) -> str:
+        return f"{self.prefix}{key}:{int(window_start)}"
+
+    def hit(self, key: str, max_requests: int, window: int, block_seconds: int, now: float) -> bool:
+        """Comptabilise une requête et indique si elle est autorisée"""
+        window_start = now - now % window
+        keys = [
+            self._window_key(key, window_start),
+            self._window_key(key, window_start - window),
+            f"{self.prefix}{key}:blocked",
+        ]
+        block_ttl = math.ceil(block_seconds) if block_seconds > 0 else 0
+        args = [now, window_start, window, max_requests, now + block_seconds, block_ttl]
+        return bool(self._hit_script(keys=keys, args=args))
+
+    def get(self, key: str, window: int, now: float) -> Optional[_WindowState]:
+        """Retourne l'état d'une clé à l'instant `now`"""
+        window_start = now - now % window
+        with self.client.pipeline(transaction=True) as pipe:
+            pipe.get(self._window_key(key, window_start))
+            pipe.get(self._window_key(key, window_start - window))
+            pipe.get(f"{self.prefix}{key}:blocked")
+            current, previous, blocked_until = pipe.execute()
+        if current is None and previous is None and blocked_until is None:
+            return None
+        return _WindowState(window_start, int(current or 0), int(previous or 0), float(blocked_until or 0))
+
+    def reset(self, key: str) -> bool:
+        """Supprime les compteurs d'une clé"""
+        keys = list(self.client.scan_iter(match=f"{self.prefix}{key}:*"))
+        return bool(keys) and self.client.delete(*keys) > 0
+
+    def keys(self) -> List[str]:
+        """Clés suivies (les compteurs inactifs expirent côté serveur)"""
+        keys = set()
+        for redis_key in self.client.scan_iter(match=f"{self.prefix}*"):
+            if isinstance(redis_key, bytes):
+                redis_key = redis_key.decode()
+            keys.add(redis_key[len(self.prefix):].rpartition(":")[0])
+        return sorted(keys)
+
+    def clear(self) -> None:
+        """Supprime toutes les clés"""
+        for redis_key in self.client.scan_iter(match=f"{self.prefix}*"):
+            self.client.delete(redis_key)
+
+
+class SharedMemoryRateLimitBackend:
+    """
+    Compteurs dans un segment de mémoire partagée, communs aux workers d'un hôte
+
+    Table de taille fixe à adressage ouvert : chaque emplacement contient
+    l'empreinte de la clé, ses compteurs, ses échéances et la clé elle-même
+    (tronquée à 88 octets). Une clé est cherchée parmi PROBES emplacements
+    consécutifs ; si tous sont occupés par des clés actives, celle qui expire
+    le plus tôt est évincée. La mémoire est donc bornée par construction.
+    Les accès sont sérialisés entre processus par un verrou fcntl.
+    """
+
+    SLOT = struct.Struct("<QdddII88s")
+    PROBES = 8
+
+    def __init__(self, name: str = "millesime_rate_limit", slots: Optional[int] = None,
+                 lock_path: Optional[str] = None):
+        if fcntl is None:
+            raise RuntimeError("Backend de limitation \"shared\" indisponible sur cette plateforme")
+        slots = slots or settings.RATE_LIMIT_SHARED_SLOTS
+        try:
+            self._shm = SharedMemory(name=name, create=True, size=slots * self.SLOT.size)
+        except FileExistsError:
+            self._shm = SharedMemory(name=name)
+        # Le segment survit aux workers : il ne doit pas être supprimé à la sortie d'un processus
+        resource_tracker.unregister(self._shm._name, "shared_memory")
+        self.name = name
+        self.slots = self._shm.size // self.SLOT.size
+        self._lock_file = open(lock_path or os.path.join(tempfile.gettempdir(), f"{name}.lock"), "a+")
+        self._thread_lock = threading.Lock()
+
+    def hit(self, key: str, max_requests: int, window: int, block_seconds: int, now: float) -> bool:
+        """Comptabilise une requête et indique si elle est autorisée"""
+        with self._locked():
+            index, state = self._find(key, now, create=True)
+            if state is None:
+                state = _WindowState(now - now % window)
+            allowed = _apply_hit(state, max_requests, window, block_seconds, now)
+            self._write(index, key, state)
+            return allowed
+
+    def get(self, key: str, window: int, now: float) -> Optional[_WindowState]:
+        """Retourne l'état d'une clé à l'instant `now`"""
+        with self._locked():
+            _, state = self._find(key, now)
+        if state is not None:
+            _roll(state, window, now)
+        return state
+
+    def reset(self, key: str) -> bool:
+        """Supprime les compteurs d'une clé"""
+        with self._locked():
+            index, state = self._find(key, time.time())
+            if state is None:
+                return False
+            self._clear_slot(index)
+            return True
+
+    def keys(self) -> List[str]:
+        """Clés suivies et non expirées (parcours de la table, de taille fixe)"""
+        now = time.time()
+        keys = []
+        with self._locked():
+            for index in range(self.slots):
+                key_hash, _, expires_at, _, _, _, raw_key = self.SLOT.unpack_from(self._shm.buf, index * self.SLOT.size)
+                if key_hash and expires_at > now:
+                    keys.append(raw_key.rstrip(b"\0").decode(errors="ignore"))
+        return keys
+
+    def clear(self) -> None:
+        """Supprime toutes les clés"""
+        with self._locked():
+            self._shm.buf[:self.slots * self.SLOT.size] = bytes(self.slots * self.SLOT.size)
+
+    def close(self) -> None:
+        """Détache le segment du processus (sans le supprimer)"""
+        self._shm.close()
+        self._lock_file.close()
+
+    def unlink(self) -> None:
+        """Supprime le segment partagé"""
+        self._shm.unlink()
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        # flock exclut les autres processus, le verrou local les autres threads du processus
+        with self._thread_lock:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        # 0 est réservé aux emplacements vides
+        return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little") | 1
+
+    def _find(self, key: str, now: float, create: bool = False) -> Tuple[int, Optional[_WindowState]]:
+        key_hash = self._hash(key)
+        start = key_hash % self.slots
+        candidate, candidate_expiry = None, math.inf
+        for probe in range(self.PROBES):
+            index = (start + probe) % self.slots
+            slot_hash, window_start, expires_at, blocked_until, current, previous, _ = \
+                self.SLOT.unpack_from(self._shm.buf, index * self.SLOT.size)
+            if slot_hash == key_hash:
+                if expires_at <= now:
+                    return index, None
+                return index, _WindowState(window_start, current, previous, blocked_until, expires_at)
+            # Emplacement réutilisable : vide ou expiré, sinon celui qui expire le plus tôt
+            expiry = expires_at if slot_hash else -math.inf
+            if expiry < candidate_expiry:
+                candidate, candidate_expiry = index, expiry
+        return (candidate if create else -1), None
+
+    def _write(self, index: int, key: str, state: _WindowState) -> None:
+        self.SLOT.pack_into(
+            self._shm.buf, index * self.SLOT.size,
+            self._hash(key), state.window_start, state.expires_at, state.blocked_until,
+            state.current, state.previous, key.encode()[:88]
+        )
+
+    def _clear_slot(self, index: int) -> None:
+        offset = index * self.SLOT.size
+        self._shm.buf[offset:offset + self.SLOT.size] = bytes(self.SLOT.size)
+
+
+def create_rate_limit_backend(name: Optional[str] = None) -> Any:
+    """Crée le backend de limitation configuré (RATE_LIMIT_BACKEND : "memory", "shared" ou "redis")"""
+    name = name or settings.RATE_LIMIT_BACKEND
+
+    if name == "redis":
+        client = get_redis_client()
+        if client is not None:
+            return RedisRateLimitBackend(client)
+        logger.warning("Limitation de débit en mémoire du processus")
+    elif name == "shared":
+        return SharedMemoryRateLimitBackend()
+
+    return MemoryRateLimitBackend()
+
+
+class RateLimiter:
+    """
+    Limiteur de débit à fenêtre glissante approximée
+
+    Chaque clé ne conserve que le nombre de requêtes de la fenêtre fixe courante
+    et de la précédente ; le nombre de requêtes sur la dernière fenêtre glissante
+    est estimé en pondérant la précédente par sa part encore couverte. Coût et
+    mémoire sont donc constants par clé. Les compteurs sont confiés à un backend
+    (mémoire du processus, mémoire partagée de l'hôte ou Redis).
+    """
+
+    def __init__(self, limits: Optional[Dict[str, Dict[str, int]]] = None,
+                 block_seconds: Optional[int] = None, backend: Optional[Any] = None,
+                 max_keys: Optional[int] = None, sweep_interval: Optional[int] = None):
+        self.limits = limits or settings.RATE_LIMITS
+        self.block_seconds = settings.RATE_LIMIT_BLOCK_SECONDS if block_seconds is None else block_seconds
+        self.backend = backend if backend is not None else MemoryRateLimitBackend(max_keys, sweep_interval)
+
+    def get_limit(self, endpoint: str) -> Tuple[int, int]:
+        """Retourne (nombre de requêtes, fenêtre en secondes) pour un endpoint"""
+        config = self.limits.get(endpoint) or self.limits["default"]
+        return config["requests"], config["window"]
+
+    def hit(self, client_id: str, endpoint: str = "default") -> bool:
+        """Comptabilise une requête et indique si elle est autorisée"""
+        max_requests, window = self.get_limit(endpoint)
+        try:
+            return self.backend.hit(f"{client_id}:{endpoint}", max_requests, window, self.block_seconds, time.time())
+        except Exception as e:
+            # Backend indisponible : la requête est autorisée plutôt que de rendre l'API indisponible
+            logger.warning(f"Limitation de débit indisponible: {e}")
+            return True
+
+    def info(self, client_id: str, endpoint: str = "default") -> Dict[str, Any]:
+        """Retourne l'état de la limitation pour une clé"""
+        max_requests, window = self.get_limit(endpoint)
+        now = time.time()
+        state = self.backend.get(f"{client_id}:{endpoint}", window, now)
+        return self._describe(client_id, endpoint, state, max_requests, window, now)
+
+    def reset(self, client_id: str, endpoint: str = "default") -> bool:
+        """Supprime les compteurs d'une clé"""
+        return self.backend.reset(f"{client_id}:{endpoint}")
+
+    def active(self) -> Dict[str, Dict[str, Any]]:
+        """Retourne l'état des clés ayant des requêtes récentes ou bloquées"""
+        now = time.time()
+        active_limits = {}
+
+        for key in self.backend.keys():
+            client_id, _, endpoint = key.rpartition(":")
+            max_requests, window = self.get_limit(endpoint)
+            state = self.backend.get(key, window, now)
+            if state is not None and (state.current or state.previous or now < state.blocked_until):
+                active_limits[key] = self._describe(client_id, endpoint, state, max_requests, window, now)
+
+        return active_limits
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Supprime les clés inactives (backends sans expiration automatique)"""
+        sweep = getattr(self.backend, "sweep", None)
+        return sweep(now) if sweep else 0
+
+    def clear(self) -> None:
+        """Supprime toutes les clés"""
+        self.backend.clear()
+
+    def __len__(self) -> int:
+        return len(self.backend)
+
+    @staticmethod
+    def _describe(client_id: str, endpoint: str, state: Optional[_WindowState],
+                  max_requests: int, window: int, now: float) -> Dict[str, Any]:
+        if state is None:
+            return {
+                "client_id": client_id,
+                "endpoint": endpoint,
+                "current_requests": 0,
+                "limit": max_requests,
+                "remaining": max_requests,
+                "reset_time": None,
+                "is_blocked": False
+            }
+
+        current_requests = int(_estimate(state, window, now))
+        is_blocked = now < state.blocked_until
+        return {
+            "client_id": client_id,
+            "endpoint": endpoint,
+            "current_requests": current_requests,
+            "limit": max_requests,
+            "remaining": max(0, max_requests - current_requests),
+            "reset_time": state.window_start + window if current_requests > 0 else None,
+            "is_blocked": is_blocked,
+            "blocked_until": state.blocked_until if is_blocked else None
+        }
+
+
+_rate_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Retourne le limiteur de débit de l'application"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = RateLimiter(backend=create_rate_limit_backend())
+    return _rate_limiter
+
+
+def configure_rate_limiter(**kwargs: Any) -> RateLimiter:
+    """Remplace le limiteur de débit (tests, changement de configuration)"""
+    global _rate_limiter
+    _rate_limiter = RateLimiter(**kwargs)
+    return _rate_limiter
 
-# Stockage en mémoire des limites (dans un vrai projet, utiliser Redis)
-_rate_limit_store: Dict[str, Dict[str, Any]] = {}
 
 def rate_limit_middleware(client_id: str, endpoint: str = "default") -> bool:
     """
     Middleware de limitation de débit
-    
+
     Args:
         client_id: Identifiant du client
         endpoint: Point de terminaison de l'API
-        
+
     Returns:
         bool: True si la requête est autorisée, False sinon
     """
-    key = f"{client_id}:{endpoint}"
-    current_time = time.time()
-    
-    # Configuration des limites par endpoint
-    limits = {
-        "default": {"requests": 100, "window": 3600},  # 100 req/h
-        "/api/v1/orders": {"requests": 50, "window": 3600},  # 50 req/h
-        "/api/v1/quotes": {"requests": 30, "window": 3600},  # 30 req/h
-        "/api/v1/auth": {"requests": 10, "window": 3600},  # 10 req/h
-    }
-    
-    limit_config = limits.get(endpoint, limits["default"])
-    max_requests = limit_config["requests"]
-    window = limit_config["window"]
-    
-    # Nettoyer les anciennes entrées
-    if key in _rate_limit_store:
-        old_entries = []
-        for timestamp in _rate_limit_store[key]["timestamps"]:
-            if current_time - timestamp > window:
-                old_entries.append(timestamp)
-        
-        for old_timestamp in old_entries:
-            _rate_limit_store[key]["timestamps"].remove(old_timestamp)
-    
-    # Initialiser si nécessaire
-    if key not in _rate_limit_store:
-        _rate_limit_store[key] = {
-            "timestamps": [],
-            "blocked_until": 0
-        }
-    
-    # Vérifier si le client est bloqué
-    if current_time < _rate_limit_store[key]["blocked_until"]:
-        return False
-    
-    # Ajouter la requête actuelle
-    _rate_limit_store[key]["timestamps"].append(current_time)
-    
-    # Vérifier la limite
-    if len(_rate_limit_store[key]["timestamps"]) > max_requests:
-        # Bloquer le client pendant 1 heure
-        _rate_limit_store[key]["blocked_until"] = current_time + 3600
-        return False
-    
-    return True
+    return get_rate_limiter().hit(client_id, endpoint)
 
 def get_rate_limit_info(client_id: str, endpoint: str = "default") -> Dict[str, Any]:
     """
     Récupère les informations de limitation de débit pour un client
-    
+
     Args:
         client_id: Identifiant du client
         endpoint: Point de terminaison de l'API
-        
+
     Returns:
         Dict: Informations sur la limitation de débit
     """
-    key = f"{client_id}:{endpoint}"
-    
-    if key not in _rate_limit_store:
-        return {
-            "client_id": client_id,
-            "endpoint": endpoint,
-            "current_requests": 0,
-            "limit": 100,
-            "remaining": 100,
-            "reset_time": None,
-            "is_blocked": False
-        }
-    
-    current_time = time.time()
-    timestamps = _rate_limit_store[key]["timestamps"]
-    blocked_until = _rate_limit_store[key]["blocked_until"]
-    
-    # Nettoyer les anciennes entrées
-    old_entries = []
-    for timestamp in timestamps:
-        if current_time - timestamp > 3600:  # 1 heure
-            old_entries.append(timestamp)
-    
-    for old_timestamp in old_entries:
-        timestamps.remove(old_timestamp)
-    
-    current_requests = len(timestamps)
-    limit = 100  # Limite par défaut
-    
-    # Ajuster la limite selon l'endpoint
-    if endpoint == "/api/v1/orders":
-        limit = 50
-    elif endpoint == "/api/v1/quotes":
-        limit = 30
-    elif endpoint == "/api/v1/auth":
-        limit = 10
-    
-    remaining = max(0, limit - current_requests)
-    is_blocked = current_time < blocked_until
-    
-    return {
-        "client_id": client_id,
-        "endpoint": endpoint,
-        "current_requests": current_requests,
-        "limit": limit,
-        "remaining": remaining,
-        "reset_time": current_time + 3600 if current_requests > 0 else None,
-        "is_blocked": is_blocked,
-        "blocked_until": blocked_until if is_blocked else None
-    }
+    return get_rate_limiter().info(client_id, endpoint)
 
 def reset_rate_limit(client_id: str, endpoint: str = "default") -> bool:
     """
     Réinitialise la limitation de débit pour un client
-    
+
     Args:
         client_id: Identifiant du client
         endpoint: Point de terminaison de l'API
-        
+
     Returns:
         bool: True si réinitialisé avec succès
     """
-    key = f"{client_id}:{endpoint}"
-    
-    if key in _rate_limit_store:
-        _rate_limit_store[key] = {
-            "timestamps": [],
-            "blocked_until": 0
-        }
-        return True
-    
-    return False
+    return get_rate_limiter().reset(client_id, endpoint)
 
 def get_all_rate_limits() -> Dict[str, Dict[str, Any]]:
     """
     Récupère toutes les limitations de débit actives
-    
+
     Returns:
         Dict: Toutes les limitations de débit
     """
-    current_time = time.time()
-    active_limits = {}
-    
-    for key, data in _rate_limit_store.items():
-        # Nettoyer les anciennes entrées
-        old_entries = []
-        for timestamp in data["timestamps"]:
-            if current_time - timestamp > 3600:
-                old_entries.append(timestamp)
-        
-        for old_timestamp in old_entries:
-            data["timestamps"].remove(old_timestamp)
-        
-        # Ne garder que les limites actives
-        if data["timestamps"] or current_time < data["blocked_until"]:
-            active_limits[key] = data
-    
-    return active_limits
+    return get_rate_limiter().active()
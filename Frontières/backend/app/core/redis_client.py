@@ -0,0 +1,52 @@
+"""
+Redis - Millésime Sans Frontières
+Client Redis partagé par le cache et la limitation de débit
+"""
+
+import logging
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import get_redis_url
+from app.core.constants import REDIS_POOL_SIZE, REDIS_SOCKET_TIMEOUT, REDIS_SOCKET_CONNECT_TIMEOUT
+
+try:
+    import redis
+except ImportError:  # dépendance optionnelle
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+_redis_client: Optional[Any] = None
+
+# Équivalents Python des scripts Lua, exécutés par le client de substitution (tests, développement)
+_script_emulations: Dict[str, Callable[[Any, list, list], Any]] = {}
+
+
+def register_script_emulation(script: str, emulation: Callable[[Any, list, list], Any]) -> None:
+    """Associe à un script Lua sa version Python `emulation(client, keys, args)`"""
+    _script_emulations[script] = emulation
+
+
+def get_script_emulation(script: str) -> Callable[[Any, list, list], Any]:
+    """Version Python d'un script Lua enregistrée par `register_script_emulation`"""
+    try:
+        return _script_emulations[script]
+    except KeyError:
+        raise NotImplementedError("Script Lua sans équivalent pour le client de substitution") from None
+
+
+def get_redis_client() -> Optional[Any]:
+    """Retourne le client Redis du processus (pool de REDIS_POOL_SIZE connexions), ou None sans paquet redis"""
+    global _redis_client
+    if redis is None:
+        logger.warning("Paquet redis non installé")
+        return None
+    if _redis_client is None:
+        pool = redis.ConnectionPool.from_url(
+            get_redis_url(),
+            max_connections=REDIS_POOL_SIZE,
+            socket_timeout=REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=REDIS_SOCKET_CONNECT_TIMEOUT,
+        )
+        _redis_client = redis.Redis(connection_pool=pool)
+    return _redis_client
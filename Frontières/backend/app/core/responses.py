@@ -0,0 +1,23 @@
+"""
+Réponses JSON - Millésime Sans Frontières
+Sérialisation directe des schémas par pydantic-core pour les routes les plus sollicitées
+"""
+
+from typing import Optional
+
+from fastapi import Response, status
+from pydantic import BaseModel
+
+
+def model_response(model: BaseModel, status_code: int = status.HTTP_200_OK, etag: Optional[str] = None) -> Response:
+    """
+    Réponse JSON d'un schéma déjà validé
+
+    `model_dump_json` produit directement les octets de la réponse : FastAPI
+    n'effectue ni le passage par dictionnaire, ni la seconde validation contre
+    `response_model`, ni l'encodage JSON en Python. Le `response_model` de la
+    route reste déclaré pour la documentation OpenAPI.
+    """
+    headers = {"ETag": etag} if etag else None
+    return Response(content=model.model_dump_json(), status_code=status_code, headers=headers,
+                    media_type="application/json")
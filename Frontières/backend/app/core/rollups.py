@@ -0,0 +1,250 @@
+"""
+Cumuls quotidiens - Millésime Sans Frontières
+Maintenance incrémentale des cumuls des commandes et devis et statistiques des tableaux de bord
+"""
+
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, event, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session, attributes
+
+from app.models.address import Address
+from app.models.daily_rollup import OrderDailyRollup, QuoteDailyRollup
+from app.models.order import Order
+from app.models.quote import Quote
+
+_UPSERT_DIALECTS = {"postgresql": postgresql, "sqlite": sqlite}
+
+# Table de cumul, colonne de comptage et colonne de montant de chaque modèle
+_ROLLUPS = {
+    Order: (OrderDailyRollup.__table__, "order_count", "revenue"),
+    Quote: (QuoteDailyRollup.__table__, "quote_count", "quote_value"),
+}
+
+# Colonnes dont la modification déplace une ligne d'un cumul à un autre
+_TRACKED_COLUMNS = ("status", "total_amount", "shipping_address_id")
+
+
+def _status(value: Any) -> str:
+    return getattr(value, "value", value)
+
+
+def _day(created_at: Optional[datetime]) -> date:
+    # Ligne pas encore insérée : date du jour (défaut serveur now(), en UTC)
+    if created_at is None:
+        return datetime.now(timezone.utc).date()
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(timezone.utc)
+    return created_at.date()
+
+
+def increment_rollup(connection: Connection, model: type, day: date, status: str, country: str,
+                     count: int, amount: Decimal) -> None:
+    """Ajoute (ou retire) `count` lignes et `amount` au cumul du jour, du statut et du pays"""
+    table, count_column, amount_column = _ROLLUPS[model]
+    dialect = _UPSERT_DIALECTS[connection.dialect.name]
+    statement = dialect.insert(table).values(
+        day=day, status=status, country=country, **{count_column: count, amount_column: amount}
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.day, table.c.status, table.c.country],
+        set_={
+            count_column: table.c[count_column] + count,
+            amount_column: table.c[amount_column] + amount
+        }
+    )
+    connection.execute(statement)
+
+
+def _countries(connection: Connection, address_ids: Iterable[Optional[str]]) -> Dict[str, str]:
+    """Pays des adresses de livraison, en une seule requête IN"""
+    ids = {address_id for address_id in address_ids if address_id}
+    if not ids:
+        return {}
+    return dict(connection.execute(select(Address.id, Address.country).where(Address.id.in_(ids))).all())
+
+
+class RollupDeltas:
+    """Variations des cumuls accumulées puis écrites en une requête par clé modifiée"""
+
+    def __init__(self):
+        self.deltas: Dict[Tuple[type, date, str, str], List[Any]] = defaultdict(lambda: [0, Decimal("0")])
+
+    def add(self, model: type, day: date, status: Any, country: Optional[str], count: int,
+            amount: Optional[Decimal]) -> None:
+        """Compte `count` lignes (négatif pour un retrait) de montant unitaire `amount`"""
+        delta = self.deltas[(model, day, _status(status), country or "")]
+        delta[0] += count
+        delta[1] += Decimal(str(amount or 0)) * count
+
+    def apply(self, connection: Connection) -> None:
+        """Écrit les variations non nulles"""
+        for (model, day, status, country), (count, amount) in self.deltas.items():
+            if count or amount:
+                increment_rollup(connection, model, day, status, country, count, amount)
+        self.deltas.clear()
+
+
+def _current(instance: Any, key: str) -> Any:
+    # Ligne pas encore insérée : la valeur par défaut de la colonne s'appliquera
+    value = getattr(instance, key)
+    if value is None:
+        default = type(instance).__table__.c[key].default
+        if default is not None and default.is_scalar:
+            return default.arg
+    return value
+
+
+def _collect_rollup_deltas(session: Session, flush_context: Any, instances: Any) -> None:
+    """Reporte dans les cumuls les commandes et devis créés, modifiés ou supprimés par le flush"""
+    changes = []
+    modified: Dict[type, List[Any]] = defaultdict(list)
+    for instance in session.new:
+        if type(instance) in _ROLLUPS:
+            changes.append((instance, 1))
+    for instance in session.deleted:
+        if type(instance) in _ROLLUPS:
+            changes.append((instance, -1))
+    for instance in session.dirty:
+        if type(instance) in _ROLLUPS and any(
+            attributes.get_history(instance, key).has_changes() for key in _TRACKED_COLUMNS
+        ):
+            changes.append((instance, 1))
+            modified[type(instance)].append(instance)
+    if not changes:
+        return
+
+    connection = session.connection()
+    # Valeurs avant modification lues en base (un attribut expiré ne conserve pas son ancienne valeur)
+    previous: Dict[Tuple[type, str], Dict[str, Any]] = {}
+    for model, instances in modified.items():
+        columns = [getattr(model, key) for key in _TRACKED_COLUMNS]
+        for row in connection.execute(
+            select(model.id, *columns).where(model.id.in_([instance.id for instance in instances]))
+        ):
+            previous[(model, row[0])] = dict(zip(_TRACKED_COLUMNS, row[1:]))
+
+    countries = _countries(connection, [instance.shipping_address_id for instance, _ in changes] + [
+        values["shipping_address_id"] for values in previous.values()
+    ])
+    deltas = RollupDeltas()
+    for instance, sign in changes:
+        model, day = type(instance), _day(instance.created_at)
+        before = previous.get((model, instance.id))
+        if before is not None:
+            deltas.add(model, day, before["status"], countries.get(before["shipping_address_id"]), -1,
+                       before["total_amount"])
+        deltas.add(model, day, _current(instance, "status"), countries.get(instance.shipping_address_id), sign,
+                   _current(instance, "total_amount"))
+    deltas.apply(connection)
+
+
+# Les écritures ORM des services (création, changement de statut, suppression) tiennent les cumuls à jour
+event.listen(Session, "before_flush", _collect_rollup_deltas)
+
+
+def record_transitions(connection: Connection, model: type,
+                       rows: Iterable[Tuple[Optional[datetime], Optional[str], Optional[Decimal]]],
+                       old_status: Any, new_status: Any) -> None:
+    """
+    Reporte un changement de statut fait par UPDATE ensembliste (hors ORM)
+
+    `rows` contient, pour chaque ligne modifiée, sa date de création, son
+    adresse de livraison et son montant. Comme pour les écritures ORM, la
+    ligne change de statut dans le cumul de son jour de création (et non du
+    jour de la transition) : les cumuls restent reconstructibles à partir des
+    seules lignes par `backfill_rollups`.
+    """
+    rows = list(rows)
+    countries = _countries(connection, [address_id for _, address_id, _ in rows])
+    deltas = RollupDeltas()
+    for created_at, address_id, amount in rows:
+        day, country = _day(created_at), countries.get(address_id)
+        deltas.add(model, day, old_status, country, -1, amount)
+        deltas.add(model, day, new_status, country, 1, amount)
+    deltas.apply(connection)
+
+
+def backfill_rollups(db: Session) -> Dict[str, int]:
+    """Recalcule tous les cumuls à partir des commandes et devis existants (installation, réparation)"""
+    connection = db.connection()
+    counts = {}
+    for model, (table, count_column, amount_column) in _ROLLUPS.items():
+        deltas = RollupDeltas()
+        rows = connection.execute(
+            select(model.created_at, model.status, Address.country, model.total_amount)
+            .outerjoin(Address, Address.id == model.shipping_address_id)
+            .execution_options(yield_per=1000)
+        )
+        total = 0
+        for created_at, status, country, amount in rows:
+            deltas.add(model, _day(created_at), status, country, 1, amount)
+            total += 1
+
+        connection.execute(delete(table))
+        if deltas.deltas:
+            connection.execute(insert(table), [
+                {"day": day, "status": status, "country": country, count_column: count, amount_column: amount}
+                for (_, day, status, country), (count, amount) in deltas.deltas.items()
+            ])
+        counts[table.name] = total
+    db.commit()
+    return counts
+
+
+def _months_ago(months: int) -> date:
+    """Premier jour du mois situé `months` mois avant le mois courant"""
+    today = date.today()
+    index = today.year * 12 + today.month - 1 - months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def summarize_rollups(db: Session, model: type, months: int = 12) -> Dict[str, Any]:
+    """
+    Statistiques d'un modèle lues dans ses cumuls
+
+    Trois requêtes sur la table de cumul, dont la taille dépend du nombre de
+    jours, statuts et pays et non du nombre de commandes ou devis.
+    """
+    table, count_column, amount_column = _ROLLUPS[model]
+    count, amount = table.c[count_column], table.c[amount_column]
+
+    by_status = db.execute(
+        select(table.c.status, func.sum(count), func.sum(amount)).group_by(table.c.status)
+    ).all()
+    by_country = db.execute(
+        select(table.c.country, func.sum(count)).group_by(table.c.country)
+    ).all()
+    daily = db.execute(
+        select(table.c.day, func.sum(count)).where(table.c.day >= _months_ago(months - 1)).group_by(table.c.day)
+    ).all()
+
+    monthly: Dict[str, int] = defaultdict(int)
+    for day, day_count in daily:
+        if day_count:
+            monthly[day.strftime("%Y-%m")] += day_count
+
+    return {
+        "count": sum(row[1] or 0 for row in by_status),
+        "amount": sum((Decimal(str(row[2] or 0)) for row in by_status), Decimal("0")),
+        "by_status": {status: status_count for status, status_count, _ in by_status if status_count},
+        "by_country": {country: country_count for country, country_count in by_country if country_count},
+        "monthly": [{"month": month, "count": monthly[month]} for month in sorted(monthly)]
+    }
+
+
+if __name__ == "__main__":
+    # Reconstruction des cumuls : python -m app.core.rollups
+    from app.core.database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        for name, total in backfill_rollups(session).items():
+            print(f"{name}: {total} lignes agrégées")
+    finally:
+        session.close()
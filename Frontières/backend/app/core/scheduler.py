@@ -0,0 +1,246 @@
+"""
+Tâches planifiées - Millésime Sans Frontières
+Planificateur asyncio intégré au worker, une seule exécution par tâche tous workers confondus
+"""
+
+import asyncio
+import hashlib
+import logging
+import math
+import os
+import socket
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import create_engine, delete, insert, text, update
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.pool import NullPool
+
+from app.core.monitoring import metric_key, metrics_collector
+from app.models.job_lock import JobLock
+
+logger = logging.getLogger(__name__)
+
+
+def _advisory_key(name: str) -> int:
+    """Clé 64 bits signée du verrou consultatif PostgreSQL d'une tâche"""
+    return int.from_bytes(hashlib.sha1(name.encode()).digest()[:8], "big", signed=True)
+
+
+# Verrou consultatif 64 bits encore détenu par la session : pg_locks le décompose
+# en classid (32 bits de poids fort) et objid (32 bits de poids faible)
+_HELD_ADVISORY_LOCK = text(
+    "SELECT 1 FROM pg_locks WHERE locktype = 'advisory' AND pid = pg_backend_pid() AND granted "
+    "AND classid = CAST(:classid AS oid) AND objid = CAST(:objid AS oid) AND objsubid = 1"
+)
+
+
+class JobLease:
+    """
+    Verrou exclusif d'une tâche planifiée
+
+    Sous PostgreSQL, verrou consultatif de session (pg_try_advisory_lock) tenu
+    par une connexion dédiée, ouverte hors du pool des requêtes (moteur
+    NullPool) : il disparaît avec la connexion si le worker meurt. À chaque
+    échéance, le détenteur vérifie dans pg_locks que sa connexion vit et tient
+    toujours le verrou, sinon il la ferme et tente de le reprendre. Ailleurs, bail dans la table `job_locks` expirant après `ttl`
+    secondes, repris par un autre worker une fois échu. Le détenteur peut
+    reprendre (et prolonger) son propre verrou.
+    """
+
+    def __init__(self, engine: Engine, name: str, ttl: int, owner: Optional[str] = None,
+                 lock_engine: Optional[Engine] = None):
+        self.engine = engine
+        self.name = name
+        self.ttl = ttl
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}"
+        self._lock_engine = lock_engine
+        self._connection: Optional[Connection] = None
+
+    def _get_lock_engine(self) -> Engine:
+        """Moteur sans pool de la connexion du verrou (hors DB_POOL_SIZE et des jauges du pool)"""
+        if self._lock_engine is None:
+            self._lock_engine = create_engine(self.engine.url, poolclass=NullPool)
+        return self._lock_engine
+
+    def _still_held(self) -> bool:
+        """Vérifie que la connexion du verrou vit et le détient encore"""
+        key = _advisory_key(self.name) & 0xFFFFFFFFFFFFFFFF
+        try:
+            held = self._connection.execute(
+                _HELD_ADVISORY_LOCK, {"classid": key >> 32, "objid": key & 0xFFFFFFFF}
+            ).first() is not None
+            self._connection.commit()
+            return held
+        except SQLAlchemyError as e:
+            logger.warning(f"Connexion du verrou de la tâche {self.name} perdue: {e}")
+            return False
+
+    def _discard_connection(self) -> None:
+        """Ferme la connexion d'un verrou perdu"""
+        try:
+            self._connection.close()
+        except SQLAlchemyError:
+            pass
+        self._connection = None
+
+    def acquire(self) -> bool:
+        """Tente de prendre le verrou sans attendre"""
+        if self.engine.dialect.name == "postgresql":
+            if self._connection is not None:
+                if self._still_held():
+                    return True
+                self._discard_connection()
+            connection = self._get_lock_engine().connect()
+            acquired = connection.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": _advisory_key(self.name)}
+            ).scalar()
+            connection.commit()
+            if acquired:
+                self._connection = connection
+            else:
+                connection.close()
+            return bool(acquired)
+
+        now = datetime.now()
+        values = {"owner": self.owner, "expires_at": now + timedelta(seconds=self.ttl)}
+        with self.engine.begin() as connection:
+            taken = connection.execute(
+                update(JobLock)
+                .where(JobLock.name == self.name)
+                .where((JobLock.expires_at < now) | (JobLock.owner == self.owner))
+                .values(**values)
+            ).rowcount
+        if taken:
+            return True
+        try:
+            with self.engine.begin() as connection:
+                connection.execute(insert(JobLock).values(name=self.name, **values))
+            return True
+        except IntegrityError:
+            # Bail en cours détenu par un autre worker
+            return False
+
+    def release(self) -> None:
+        """Libère le verrou"""
+        if self._connection is not None:
+            try:
+                self._connection.execute(
+                    text("SELECT pg_advisory_unlock(:key)"), {"key": _advisory_key(self.name)}
+                )
+                self._connection.commit()
+            finally:
+                self._connection.close()
+                self._connection = None
+            return
+
+        with self.engine.begin() as connection:
+            connection.execute(
+                delete(JobLock).where(JobLock.name == self.name).where(JobLock.owner == self.owner)
+            )
+
+
+class ScheduledJob:
+    """Tâche exécutée toutes les `interval` secondes"""
+
+    def __init__(self, name: str, interval: float, func: Callable[[], Optional[int]]):
+        self.name = name
+        self.interval = interval
+        self.func = func
+
+
+class Scheduler:
+    """
+    Planificateur asyncio des tâches de fond
+
+    Chaque tâche tourne dans une coroutine démarrée par le `lifespan` de
+    l'application ; son corps, synchrone (SQLAlchemy), est exécuté dans un
+    thread pour ne pas bloquer la boucle d'événements. Tous les workers
+    planifient la tâche, seul celui qui obtient le verrou l'exécute : après
+    une exécution réussie, le verrou est conservé jusqu'à l'échéance suivante
+    (bail de `interval` secondes, ou verrou consultatif PostgreSQL tenu tant
+    que le worker vit), les autres workers passent donc leur tour.
+    """
+
+    def __init__(self, engine: Engine, owner: Optional[str] = None):
+        self.engine = engine
+        self.owner = owner
+        self.jobs: Dict[str, ScheduledJob] = {}
+        self._leases: Dict[str, JobLease] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._stopping: Optional[asyncio.Event] = None
+
+    def add_job(self, name: str, interval: float, func: Callable[[], Optional[int]]) -> None:
+        """Déclare une tâche périodique"""
+        self.jobs[name] = ScheduledJob(name, interval, func)
+
+    def start(self) -> None:
+        """Démarre les tâches déclarées"""
+        self._stopping = asyncio.Event()
+        for job in self.jobs.values():
+            self._tasks.append(asyncio.create_task(self._loop(job), name=f"job:{job.name}"))
+
+    async def stop(self) -> None:
+        """Arrête les tâches, en attendant la fin d'une exécution en cours, puis libère les verrous"""
+        if self._stopping is not None:
+            self._stopping.set()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        await asyncio.to_thread(self.release_leases)
+
+    async def _loop(self, job: ScheduledJob) -> None:
+        while not self._stopping.is_set():
+            await asyncio.to_thread(self.run_job, job.name)
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=job.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def _lease(self, job: ScheduledJob) -> JobLease:
+        lease = self._leases.get(job.name)
+        if lease is None:
+            ttl = max(math.ceil(job.interval), 1)
+            lease = self._leases[job.name] = JobLease(self.engine, job.name, ttl=ttl, owner=self.owner)
+        return lease
+
+    def release_leases(self) -> None:
+        """Libère les verrous détenus (arrêt du worker : un autre worker reprend les tâches)"""
+        for name, lease in self._leases.items():
+            try:
+                lease.release()
+            except Exception as e:
+                logger.warning(f"Libération du verrou de la tâche {name} impossible: {e}")
+
+    def run_job(self, name: str) -> Optional[int]:
+        """Exécute une tâche si aucun autre worker ne la détient ; retourne son résultat"""
+        job = self.jobs[name]
+        lease = self._lease(job)
+        try:
+            if not lease.acquire():
+                metrics_collector.increment(metric_key("scheduled_job_runs_total", job=job.name, status="skipped"))
+                return None
+        except Exception as e:
+            logger.error(f"Verrou de la tâche {job.name} indisponible: {e}")
+            metrics_collector.increment(metric_key("scheduled_job_runs_total", job=job.name, status="error"))
+            return None
+
+        start_time = time.perf_counter()
+        status = "success"
+        try:
+            return job.func()
+        except Exception as e:
+            status = "error"
+            logger.error(f"Échec de la tâche {job.name}: {e}")
+            # Verrou rendu : un autre worker peut retenter sans attendre l'échéance
+            try:
+                lease.release()
+            except Exception as release_error:
+                logger.warning(f"Libération du verrou de la tâche {job.name} impossible: {release_error}")
+            return None
+        finally:
+            metrics_collector.increment(metric_key("scheduled_job_runs_total", job=job.name, status=status))
+            metrics_collector.record_timing(
+                metric_key("scheduled_job_duration_seconds", job=job.name), time.perf_counter() - start_time
+            )
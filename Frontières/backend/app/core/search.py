@@ -0,0 +1,259 @@
+"""
+Recherche plein texte - Millésime Sans Frontières
+Index de recherche des fûts (tsvector/GIN sous PostgreSQL, FTS5 sous SQLite)
+"""
+
+import logging
+import re
+import weakref
+from typing import List, Optional
+
+from sqlalchemy import event, text, func, select, table, column, literal_column
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Query
+
+from app.core.constants import WoodType, PreviousContent
+
+logger = logging.getLogger(__name__)
+
+# Libellés indexés pour les énumérations (stockées par nom en base)
+WOOD_TYPE_SEARCH_LABELS = {
+    WoodType.OAK: "chêne oak",
+    WoodType.CHESTNUT: "châtaignier chestnut",
+    WoodType.ACACIA: "acacia",
+    WoodType.CHERRY: "cerisier cherry",
+    WoodType.ASH: "frêne ash",
+    WoodType.OTHER: "autre other",
+}
+
+PREVIOUS_CONTENT_SEARCH_LABELS = {
+    PreviousContent.RED_WINE: "vin rouge red wine",
+    PreviousContent.WHITE_WINE: "vin blanc white wine",
+    PreviousContent.ROSÉ_WINE: "vin rosé rose wine",
+    PreviousContent.CHAMPAGNE: "champagne",
+    PreviousContent.COGNAC: "cognac",
+    PreviousContent.WHISKEY: "whisky whiskey",
+    PreviousContent.RUM: "rhum rum",
+    PreviousContent.OTHER: "autre other",
+}
+
+POSTGRES_TS_CONFIG = "french_unaccent"
+SQLITE_FTS_TABLE = "barrels_fts"
+
+# Poids des colonnes pour bm25 : nom, bois, contenu précédent, origine, description
+SQLITE_BM25_WEIGHTS = (10.0, 4.0, 4.0, 2.0, 1.0)
+
+_fts_table = table(SQLITE_FTS_TABLE, column("rowid"))
+_barrels_rowid = literal_column("barrels.rowid")
+_search_vector = literal_column("barrels.search_vector")
+
+# Moteurs disposant d'un index plein texte opérationnel -> nom du backend
+_search_backends = weakref.WeakKeyDictionary()
+
+
+def _label_case(column: str, labels: dict, prefix: str = "") -> str:
+    """Construit une expression CASE traduisant un nom d'énumération en libellés indexés"""
+    branches = " ".join(
+        f"WHEN '{member.name}' THEN '{label}'" for member, label in labels.items()
+    )
+    return f"(CASE {prefix}{column} {branches} ELSE '' END)"
+
+
+def _postgres_statements() -> List[str]:
+    """DDL PostgreSQL : configuration française sans accents, colonne générée et index GIN"""
+    wood = _label_case("wood_type", WOOD_TYPE_SEARCH_LABELS)
+    content = _label_case("previous_content", PREVIOUS_CONTENT_SEARCH_LABELS)
+    config = f"'{POSTGRES_TS_CONFIG}'::regconfig"
+    return [
+        "CREATE EXTENSION IF NOT EXISTS unaccent",
+        f"""
+        DO $$ BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = '{POSTGRES_TS_CONFIG}') THEN
+                CREATE TEXT SEARCH CONFIGURATION {POSTGRES_TS_CONFIG} (COPY = french);
+                ALTER TEXT SEARCH CONFIGURATION {POSTGRES_TS_CONFIG}
+                    ALTER MAPPING FOR hword, hword_part, word WITH unaccent, french_stem;
+            END IF;
+        END $$
+        """,
+        f"""
+        ALTER TABLE barrels ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector({config}, coalesce(name, '')), 'A') ||
+            setweight(to_tsvector({config}, {wood} || ' ' || {content}), 'B') ||
+            setweight(to_tsvector({config}, coalesce(origin_country, '')), 'C') ||
+            setweight(to_tsvector({config}, coalesce(description, '')), 'D')
+        ) STORED
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_barrels_search_vector ON barrels USING GIN (search_vector)",
+    ]
+
+
+def _sqlite_statements() -> List[str]:
+    """DDL SQLite : table FTS5 alignée sur le rowid de barrels et triggers de synchronisation"""
+    columns = "name, wood_type, previous_content, origin_country, description"
+    values = (
+        f"new.name, {_label_case('wood_type', WOOD_TYPE_SEARCH_LABELS, 'new.')}, "
+        f"{_label_case('previous_content', PREVIOUS_CONTENT_SEARCH_LABELS, 'new.')}, "
+        "new.origin_country, new.description"
+    )
+    return [
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_FTS_TABLE} USING fts5(
+            {columns}, tokenize = 'unicode61 remove_diacritics 2'
+        )
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS barrels_fts_insert AFTER INSERT ON barrels BEGIN
+            INSERT INTO {SQLITE_FTS_TABLE}(rowid, {columns}) VALUES (new.rowid, {values});
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS barrels_fts_update AFTER UPDATE OF {columns} ON barrels BEGIN
+            DELETE FROM {SQLITE_FTS_TABLE} WHERE rowid = old.rowid;
+            INSERT INTO {SQLITE_FTS_TABLE}(rowid, {columns}) VALUES (new.rowid, {values});
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS barrels_fts_delete AFTER DELETE ON barrels BEGIN
+            DELETE FROM {SQLITE_FTS_TABLE} WHERE rowid = old.rowid;
+        END
+        """,
+    ]
+
+
+def install_barrel_search(connection: Connection) -> Optional[str]:
+    """
+    Installe (de manière idempotente) l'index plein texte des fûts
+
+    Returns:
+        Optional[str]: backend installé ("postgresql", "sqlite") ou None si indisponible
+    """
+    dialect = connection.dialect.name
+
+    try:
+        if dialect == "postgresql":
+            for statement in _postgres_statements():
+                connection.execute(text(statement))
+        elif dialect == "sqlite":
+            exists = connection.execute(
+                text("SELECT 1 FROM sqlite_master WHERE name = :name"), {"name": SQLITE_FTS_TABLE}
+            ).first()
+            for statement in _sqlite_statements():
+                connection.execute(text(statement))
+            if not exists:
+                rebuild_sqlite_index(connection)
+        else:
+            return None
+    except OperationalError as e:
+        # Ex. SQLite compilé sans FTS5 : la recherche retombe sur ILIKE
+        logger.warning(f"Index plein texte indisponible ({dialect}): {e}")
+        return None
+
+    _search_backends[connection.engine] = dialect
+    return dialect
+
+
+def rebuild_sqlite_index(connection: Connection) -> None:
+    """Reconstruit la table FTS5 à partir des fûts existants"""
+    wood = _label_case("wood_type", WOOD_TYPE_SEARCH_LABELS)
+    content = _label_case("previous_content", PREVIOUS_CONTENT_SEARCH_LABELS)
+    connection.execute(text(f"DELETE FROM {SQLITE_FTS_TABLE}"))
+    connection.execute(text(
+        f"INSERT INTO {SQLITE_FTS_TABLE}(rowid, name, wood_type, previous_content, origin_country, description) "
+        f"SELECT rowid, name, {wood}, {content}, origin_country, description FROM barrels"
+    ))
+
+
+def drop_barrel_search(connection: Connection) -> None:
+    """Supprime l'index plein texte SQLite (les triggers disparaissent avec la table)"""
+    if connection.dialect.name == "sqlite":
+        connection.execute(text(f"DROP TABLE IF EXISTS {SQLITE_FTS_TABLE}"))
+    _search_backends.pop(connection.engine, None)
+
+
+def register_search_index(table) -> None:
+    """Associe la création/suppression de l'index au cycle de vie de la table barrels"""
+    event.listen(table, "after_create", lambda target, connection, **kw: install_barrel_search(connection))
+    event.listen(table, "after_drop", lambda target, connection, **kw: drop_barrel_search(connection))
+
+
+def get_search_backend(bind) -> Optional[str]:
+    """Retourne le backend plein texte disponible pour un moteur (None = repli ILIKE)"""
+    if isinstance(bind, Connection):
+        bind = bind.engine
+    if not isinstance(bind, Engine):
+        return None
+    return _search_backends.get(bind)
+
+
+def _search_tokens(term: str) -> List[str]:
+    """Découpe un terme de recherche en mots (lettres et chiffres uniquement)"""
+    tokens = re.findall(r"\w+", term.lower())
+    # Un préfixe d'une lettre correspond à presque tout l'index : ignoré s'il y a d'autres mots
+    significant = [token for token in tokens if len(token) > 1]
+    return significant or tokens
+
+
+def _light_french_stem(token: str) -> str:
+    """Racinisation légère : retire la marque du pluriel (fûts -> fût, tonneaux -> tonneau)"""
+    if len(token) > 3 and token[-1] in ("s", "x"):
+        return token[:-1]
+    return token
+
+
+def build_sqlite_match(term: str) -> Optional[str]:
+    """Construit une requête MATCH FTS5 (préfixes, tous les mots requis)"""
+    tokens = [_light_french_stem(token) for token in _search_tokens(term)]
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def build_postgres_tsquery(term: str) -> Optional[str]:
+    """Construit une expression to_tsquery (préfixes, tous les mots requis)"""
+    tokens = _search_tokens(term)
+    if not tokens:
+        return None
+    return " & ".join(f"{token}:*" for token in tokens)
+
+
+def _postgres_tsquery(tsquery: str):
+    """Expression to_tsquery sur la configuration française sans accents"""
+    return func.to_tsquery(literal_column(f"'{POSTGRES_TS_CONFIG}'::regconfig"), tsquery)
+
+
+def search_condition(backend: str, term: str):
+    """Prédicat plein texte sur barrels, utilisable dans n'importe quelle requête (None si aucun mot)"""
+    if backend == "sqlite":
+        match = build_sqlite_match(term)
+        if match is None:
+            return None
+        return _barrels_rowid.in_(
+            select(_fts_table.c.rowid).where(literal_column(SQLITE_FTS_TABLE).op("MATCH")(match))
+        )
+
+    tsquery = build_postgres_tsquery(term)
+    if tsquery is None:
+        return None
+    return _search_vector.op("@@")(_postgres_tsquery(tsquery))
+
+
+def apply_ranked_search(query: Query, backend: str, term: str) -> Optional[Query]:
+    """Filtre une requête sur Barrel par pertinence décroissante (None si aucun mot)"""
+    if backend == "sqlite":
+        match = build_sqlite_match(term)
+        if match is None:
+            return None
+        fts = literal_column(SQLITE_FTS_TABLE)
+        return query.join(_fts_table, _fts_table.c.rowid == _barrels_rowid).filter(
+            fts.op("MATCH")(match)
+        ).order_by(func.bm25(fts, *SQLITE_BM25_WEIGHTS))
+
+    tsquery = build_postgres_tsquery(term)
+    if tsquery is None:
+        return None
+    ts_query = _postgres_tsquery(tsquery)
+    return query.filter(_search_vector.op("@@")(ts_query)).order_by(
+        func.ts_rank_cd(_search_vector, ts_query).desc()
+    )
@@ -4,44 +4,133 @@ Fonctions de sécurité et validation
 """
 
 import re
+import time
+import threading
+import fnmatch
 import hashlib
 import secrets
 import base64
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional, List
-from passlib.context import CryptContext
 import jwt
 from app.core.auth import verify_password as auth_verify_password, create_access_token as auth_create_access_token
 from app.core.rate_limiting import rate_limit_middleware
-
-# Configuration du contexte de hachage des mots de passe
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.core.password_hashing import get_password_hasher
+from app.core.redis_client import get_script_emulation
 
 # Configuration JWT
 SECRET_KEY = "your-secret-key-here"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-# Mock Redis client pour les tests
+class MockRedisPipeline:
+    """Transaction MULTI/EXEC du client de substitution : commandes exécutées d'un bloc"""
+    
+    def __init__(self, client: "MockRedisClient"):
+        self.client = client
+        self.commands = []
+    
+    def __getattr__(self, name):
+        method = getattr(self.client, name)
+        
+        def queue(*args, **kwargs):
+            self.commands.append((method, args, kwargs))
+            return self
+        
+        return queue
+    
+    def execute(self):
+        with self.client._lock:
+            results = [method(*args, **kwargs) for method, args, kwargs in self.commands]
+        self.commands = []
+        return results
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.commands = []
+
+
+class MockRedisScript:
+    """Script Lua du client de substitution : équivalent Python exécuté de façon atomique"""
+    
+    def __init__(self, client: "MockRedisClient", script: str):
+        self.client = client
+        self.emulation = get_script_emulation(script)
+    
+    def __call__(self, keys=None, args=None, client=None):
+        with self.client._lock:
+            return self.emulation(self.client, list(keys or []), list(args or []))
+
+
+# Client Redis de substitution (tests, développement sans serveur) : mêmes commandes
+# et mêmes types de retour que redis-py pour le sous-ensemble utilisé par l'application
 class MockRedisClient:
     def __init__(self):
         self.data = {}
+        self.expires_at = {}
+        self._lock = threading.RLock()
+    
+    def _purge(self, key):
+        """Supprime la clé si elle a expiré"""
+        if key in self.expires_at and self.expires_at[key] <= time.monotonic():
+            self.data.pop(key, None)
+            self.expires_at.pop(key, None)
     
     def get(self, key):
+        self._purge(key)
         return self.data.get(key)
     
-    def set(self, key, value, ex=None):
-        self.data[key] = value
+    def set(self, key, value, ex=None, nx=False):
+        self._purge(key)
+        if nx and key in self.data:
+            return None
+        # Comme Redis : valeurs stockées et renvoyées en octets
+        self.data[key] = value if isinstance(value, bytes) else str(value).encode()
+        self.expires_at.pop(key, None)
+        if ex is not None:
+            self.expires_at[key] = time.monotonic() + ex
         return True
     
-    def incr(self, key):
-        if key not in self.data:
-            self.data[key] = 0
-        self.data[key] += 1
-        return self.data[key]
+    def incr(self, key, amount=1):
+        with self._lock:
+            self._purge(key)
+            value = int(self.data.get(key, b"0")) + amount
+            self.data[key] = str(value).encode()
+            return value
+    
+    def decr(self, key, amount=1):
+        return self.incr(key, -amount)
+    
+    def pipeline(self, transaction=True):
+        return MockRedisPipeline(self)
+    
+    def register_script(self, script):
+        return MockRedisScript(self, script)
     
     def expire(self, key, seconds):
+        self._purge(key)
+        if key not in self.data:
+            return False
+        self.expires_at[key] = time.monotonic() + seconds
         return True
+    
+    def delete(self, *keys):
+        deleted = 0
+        for key in keys:
+            self._purge(key)
+            if key in self.data:
+                del self.data[key]
+                self.expires_at.pop(key, None)
+                deleted += 1
+        return deleted
+    
+    def scan_iter(self, match="*"):
+        for key in list(self.data):
+            self._purge(key)
+            if key in self.data and fnmatch.fnmatchcase(key, match):
+                yield key
 
 redis_client = MockRedisClient()
 
@@ -57,7 +146,7 @@ REQUIRED_CHARS = {
 
 def hash_password(password: str) -> str:
     """Hache un mot de passe"""
-    return pwd_context.hash(password)
+    return get_password_hasher().hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
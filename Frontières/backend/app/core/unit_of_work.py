@@ -0,0 +1,105 @@
+"""
+Unité de travail - Millésime Sans Frontières
+Une seule transaction (un seul commit) par requête HTTP, quel que soit le nombre de services appelés
+"""
+
+import inspect
+from typing import Any, Callable, Dict
+
+from fastapi import Request
+from fastapi.routing import APIRoute
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+UNIT_OF_WORK_KEY = "unit_of_work"
+AFTER_COMMIT_KEY = "unit_of_work_after_commit"
+
+
+def _session_info(db: Any) -> Dict[str, Any]:
+    # AsyncSession : l'état est porté par la session synchrone sous-jacente
+    if isinstance(db, AsyncSession):
+        db = db.sync_session
+    info = getattr(db, "info", None)
+    return info if isinstance(info, dict) else {}
+
+
+def begin_unit_of_work(db: Any, request: Request = None) -> None:
+    """Ouvre l'unité de travail de la requête : les services ne font plus que des flush"""
+    info = _session_info(db)
+    info[UNIT_OF_WORK_KEY] = True
+    info[AFTER_COMMIT_KEY] = []
+    if request is not None:
+        if not hasattr(request.state, "units_of_work"):
+            request.state.units_of_work = []
+        request.state.units_of_work.append(db)
+
+
+def in_unit_of_work(db: Any) -> bool:
+    """Indique si la session appartient à une unité de travail ouverte"""
+    return _session_info(db).get(UNIT_OF_WORK_KEY) is True
+
+
+def save(db: Session) -> None:
+    """Rend les écritures d'un service visibles : flush dans une unité de travail, commit sinon"""
+    if in_unit_of_work(db):
+        db.flush()
+    else:
+        db.commit()
+
+
+def on_commit(db: Session, callback: Callable[[], Any]) -> None:
+    """Exécute `callback` après le commit (immédiatement hors unité de travail)"""
+    if in_unit_of_work(db):
+        _session_info(db)[AFTER_COMMIT_KEY].append(callback)
+    else:
+        callback()
+
+
+async def commit_unit_of_work(db: Any) -> None:
+    """Valide l'unité de travail (unique commit de la requête) puis exécute les actions différées"""
+    if not in_unit_of_work(db):
+        return
+    result = db.commit()
+    if inspect.isawaitable(result):
+        await result
+    run_after_commit(db)
+
+
+def run_after_commit(db: Any) -> None:
+    """Exécute les actions différées par `on_commit` (après un commit réussi)"""
+    info = _session_info(db)
+    callbacks, info[AFTER_COMMIT_KEY] = info.get(AFTER_COMMIT_KEY, []), []
+    for callback in callbacks:
+        callback()
+
+
+def end_unit_of_work(db: Any) -> None:
+    """Ferme l'unité de travail (les écritures non validées sont annulées à la fermeture de la session)"""
+    info = _session_info(db)
+    info.pop(UNIT_OF_WORK_KEY, None)
+    info.pop(AFTER_COMMIT_KEY, None)
+
+
+class UnitOfWorkRoute(APIRoute):
+    """
+    Route validant l'unité de travail avant l'envoi de la réponse
+
+    Avec FastAPI < 0.106, le code suivant le `yield` d'une dépendance s'exécute
+    après l'envoi de la réponse : un commit placé là confirmerait au client une
+    écriture qui peut encore échouer. Le commit a donc lieu ici, une fois la
+    route exécutée avec succès et la réponse sérialisée ; une route en erreur
+    n'est jamais validée. Le commit de la dépendance ne sert alors plus que de
+    filet pour les routes déclarées sans cette classe.
+    """
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def handler_with_commit(request: Request) -> Any:
+            response = await handler(request)
+            for db in getattr(request.state, "units_of_work", ()):
+                await commit_unit_of_work(db)
+                end_unit_of_work(db)
+            return response
+
+        return handler_with_commit
@@ -5,12 +5,21 @@ Backend pour le site e-commerce de fûts de vin
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse
 import uvicorn
 from contextlib import asynccontextmanager
 
 from app.core.config import settings
-from app.core.database import engine, Base
+from app.core.database import engine, async_engine, Base, get_pool_status
+from app.core.search import install_barrel_search
+from app.core.password_hashing import get_password_hasher
+from app.core.constants import METRICS_ENABLED, METRICS_PATH
+from app.core.monitoring import setup_monitoring, collect_metrics, render_prometheus, flush_metrics
+from app.core.query_instrumentation import setup_query_instrumentation
+from app.core.compression import setup_compression
+from app.core.http_cache import setup_cache_control
+from app.core.scheduler import Scheduler
+from app.services.quote_service import expire_quotes_job
 from app.api.v1.api import api_router
 
 
@@ -19,7 +28,22 @@ async def lifespan(app: FastAPI):
     """Gestion du cycle de vie de l'application"""
     # Créer les tables au démarrage
     Base.metadata.create_all(bind=engine)
+    # Index plein texte des fûts (idempotent, y compris sur une base existante)
+    with engine.begin() as connection:
+        install_barrel_search(connection)
+    # Enregistrement du backend de recherche pour le moteur asynchrone des routes
+    async with async_engine.begin() as connection:
+        await connection.run_sync(install_barrel_search)
+    # Tâches de fond (exécutées par un seul worker à la fois)
+    scheduler = Scheduler(engine)
+    if settings.SCHEDULER_ENABLED:
+        scheduler.add_job("quote_expiry", settings.QUOTE_EXPIRY_INTERVAL, expire_quotes_job)
+        scheduler.start()
     yield
+    await scheduler.stop()
+    flush_metrics()
+    get_password_hasher().shutdown()
+    await async_engine.dispose()
 
 
 # Création de l'application FastAPI
@@ -29,6 +53,7 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -41,6 +66,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Métriques par route et suivi des requêtes SQL (middlewares ASGI)
+setup_query_instrumentation(app)
+if METRICS_ENABLED:
+    setup_monitoring(app)
+
+# Politiques Cache-Control par routeur
+setup_cache_control(app)
+
+# Compression des réponses (middleware le plus externe : en-têtes et métriques déjà posés)
+setup_compression(app)
+
 # Inclusion des routes API
 app.include_router(api_router, prefix="/v1")
 
@@ -64,6 +100,27 @@ async def health_check():
     return {"status": "healthy", "service": "Millésime Sans Frontières API"}
 
 
+@app.get("/health/ready")
+async def readiness_check():
+    """Disponibilité : 503 lorsque le pool de connexions est saturé (délestage par le load balancer)"""
+    pools = {"sync": get_pool_status(engine), "async": get_pool_status(async_engine)}
+    saturated = any(pool["saturation"] >= settings.DB_POOL_READY_SATURATION for pool in pools.values())
+    return JSONResponse(
+        content={"status": "saturated" if saturated else "ready", "pools": pools},
+        status_code=503 if saturated else 200
+    )
+
+
+if METRICS_ENABLED:
+    @app.get(METRICS_PATH, include_in_schema=False)
+    async def metrics():
+        """Exposition des métriques au format Prometheus"""
+        return PlainTextResponse(
+            render_prometheus(collect_metrics()),
+            media_type="text/plain; version=0.0.4; charset=utf-8"
+        )
+
+
 if __name__ == "__main__":
     uvicorn.run(
         "app.main:app",
@@ -10,6 +10,9 @@ from app.models.order import Order
 from app.models.order_item import OrderItem
 from app.models.quote import Quote
 from app.models.quote_item import QuoteItem
+from app.models.number_counter import NumberCounter
+from app.models.job_lock import JobLock
+from app.models.daily_rollup import OrderDailyRollup, QuoteDailyRollup
 
 # Export de tous les modèles
 __all__ = [
@@ -19,5 +22,9 @@ __all__ = [
     "Order",
     "OrderItem",
     "Quote",
-    "QuoteItem"
+    "QuoteItem",
+    "NumberCounter",
+    "JobLock",
+    "OrderDailyRollup",
+    "QuoteDailyRollup"
 ]
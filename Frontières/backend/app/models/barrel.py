@@ -7,10 +7,12 @@ from sqlalchemy import Column, String, Numeric, Integer, Text, DateTime, Enum
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import uuid
+from typing import Optional
 from decimal import Decimal
 
 from app.core.database import Base
 from app.core.constants import BarrelCondition, WoodType, PreviousContent
+from app.core.search import register_search_index
 
 
 class Barrel(Base):
@@ -76,6 +78,13 @@ class Barrel(Base):
         """Vérifie si le stock est faible (moins de 5 unités)"""
         return 0 < self.stock_quantity < 5
     
+    @property
+    def main_image(self) -> Optional[str]:
+        """Retourne la première image du fût"""
+        if not self.image_urls:
+            return None
+        return self.image_urls.split(",")[0].strip() or None
+    
     @property
     def formatted_price(self) -> str:
         """Retourne le prix formaté"""
@@ -104,3 +113,7 @@ class Barrel(Base):
     def release_stock(self, quantity: int) -> None:
         """Libère du stock réservé"""
         self.stock_quantity += quantity
+
+
+# Index plein texte (colonne tsvector sous PostgreSQL, table FTS5 sous SQLite)
+register_search_index(Barrel.__table__)
@@ -0,0 +1,45 @@
+"""
+Modèles de cumuls quotidiens - Millésime Sans Frontières
+Agrégats des commandes et devis par jour, statut et pays pour les tableaux de bord
+"""
+
+from sqlalchemy import Column, String, Integer, Numeric, Date
+from decimal import Decimal
+
+from app.core.database import Base
+
+
+class OrderDailyRollup(Base):
+    """Modèle cumul quotidien des commandes (jour de création, statut courant, pays de livraison)"""
+    
+    __tablename__ = "order_daily_rollups"
+    
+    # Clé du cumul (pays vide si la commande n'a pas d'adresse de livraison)
+    day = Column(Date, primary_key=True)
+    status = Column(String(20), primary_key=True)
+    country = Column(String(100), primary_key=True, default="")
+    
+    # Agrégats
+    order_count = Column(Integer, nullable=False, default=0)
+    revenue = Column(Numeric(14, 2), nullable=False, default=Decimal('0.00'))
+    
+    def __repr__(self):
+        return f"<OrderDailyRollup(day={self.day}, status='{self.status}', country='{self.country}', count={self.order_count})>"
+
+
+class QuoteDailyRollup(Base):
+    """Modèle cumul quotidien des devis (jour de création, statut courant, pays de livraison)"""
+    
+    __tablename__ = "quote_daily_rollups"
+    
+    # Clé du cumul (pays vide si le devis n'a pas d'adresse de livraison)
+    day = Column(Date, primary_key=True)
+    status = Column(String(20), primary_key=True)
+    country = Column(String(100), primary_key=True, default="")
+    
+    # Agrégats
+    quote_count = Column(Integer, nullable=False, default=0)
+    quote_value = Column(Numeric(14, 2), nullable=False, default=Decimal('0.00'))
+    
+    def __repr__(self):
+        return f"<QuoteDailyRollup(day={self.day}, status='{self.status}', country='{self.country}', count={self.quote_count})>"
@@ -0,0 +1,24 @@
+"""
+Modèle JobLock - Millésime Sans Frontières
+Verrous des tâches planifiées (repli des bases sans verrou consultatif)
+"""
+
+from sqlalchemy import Column, String, DateTime
+
+from app.core.database import Base
+
+
+class JobLock(Base):
+    """Modèle verrou de tâche planifiée (un bail par tâche, détenu par un seul worker)"""
+    
+    __tablename__ = "job_locks"
+    
+    # Nom de la tâche
+    name = Column(String(100), primary_key=True)
+    
+    # Worker détenteur (hôte:pid) et fin du bail
+    owner = Column(String(255), nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    
+    def __repr__(self):
+        return f"<JobLock(name='{self.name}', owner='{self.owner}', expires_at={self.expires_at})>"
@@ -0,0 +1,24 @@
+"""
+Modèle NumberCounter - Millésime Sans Frontières
+Compteurs quotidiens des numéros de commande et de devis
+"""
+
+from sqlalchemy import Column, String, Integer
+
+from app.core.database import Base
+
+
+class NumberCounter(Base):
+    """Modèle compteur de numérotation (un compteur par préfixe et par jour)"""
+    
+    __tablename__ = "number_counters"
+    
+    # Préfixe du numéro (ORD, QUO) et jour (AAAAMMJJ)
+    prefix = Column(String(10), primary_key=True)
+    day = Column(String(8), primary_key=True)
+    
+    # Dernier numéro attribué ou réservé
+    value = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<NumberCounter(prefix='{self.prefix}', day='{self.day}', value={self.value})>"
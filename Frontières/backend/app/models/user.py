@@ -5,7 +5,7 @@ Gestion des utilisateurs (B2C, B2B, administrateurs)
 
 from sqlalchemy import Column, String, Boolean, DateTime, Text
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, synonym
 import uuid
 
 from app.core.database import Base
@@ -22,6 +22,7 @@ class User(Base):
     # Informations de connexion
     email = Column(String(255), unique=True, nullable=False, index=True)
     password_hash = Column(String(255), nullable=False)
+    hashed_password = synonym("password_hash")
     
     # Informations personnelles
     first_name = Column(String(100), nullable=True)
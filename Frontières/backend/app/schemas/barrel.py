@@ -3,8 +3,8 @@ Schémas Barrel - Millésime Sans Frontières
 Validation des données des fûts
 """
 
-from pydantic import BaseModel, Field, validator
-from typing import Optional, List
+from pydantic import BaseModel, ConfigDict, Field, ValidationInfo, field_validator
+from typing import Optional, List, Dict
 from decimal import Decimal
 from uuid import UUID
 
@@ -26,14 +26,16 @@ class BarrelBase(BaseSchema):
     dimensions: Optional[str] = Field(None, max_length=255, description="Dimensions")
     weight_kg: Optional[Decimal] = Field(None, gt=0, description="Poids en kg")
     
-    @validator('volume_liters', 'price', 'weight_kg')
+    @field_validator('volume_liters', 'price', 'weight_kg')
+    @classmethod
     def validate_decimal(cls, v):
         """Valide que les valeurs décimales sont positives"""
         if v is not None and v <= 0:
             raise ValueError('La valeur doit être positive')
         return v
     
-    @validator('stock_quantity')
+    @field_validator('stock_quantity')
+    @classmethod
     def validate_stock(cls, v):
         """Valide que le stock est positif"""
         if v < 0:
@@ -46,23 +48,22 @@ class BarrelCreate(BarrelBase):
     
     image_urls: Optional[List[str]] = Field(None, description="URLs des images")
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "name": "Fût de Château Margaux 2015",
-                "origin_country": "France",
-                "previous_content": "Bordeaux Rouge",
-                "volume_liters": "225.00",
-                "wood_type": "Chêne français",
-                "condition": "Excellent",
-                "price": "1500.00",
-                "stock_quantity": 5,
-                "description": "Fût de chêne français de première qualité, utilisé pour le vieillissement du Château Margaux 2015",
-                "dimensions": "H: 95cm, D: 70cm",
-                "weight_kg": "45.50",
-                "image_urls": ["https://example.com/barrel1.jpg", "https://example.com/barrel1_detail.jpg"]
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "name": "Fût de Château Margaux 2015",
+            "origin_country": "France",
+            "previous_content": "Bordeaux Rouge",
+            "volume_liters": "225.00",
+            "wood_type": "Chêne français",
+            "condition": "Excellent",
+            "price": "1500.00",
+            "stock_quantity": 5,
+            "description": "Fût de chêne français de première qualité, utilisé pour le vieillissement du Château Margaux 2015",
+            "dimensions": "H: 95cm, D: 70cm",
+            "weight_kg": "45.50",
+            "image_urls": ["https://example.com/barrel1.jpg", "https://example.com/barrel1_detail.jpg"]
         }
+    })
 
 
 class BarrelUpdate(BaseSchema):
@@ -93,31 +94,50 @@ class BarrelResponse(BaseResponse):
     condition: str
     price: Decimal
     stock_quantity: int
-    description: Optional[str]
-    dimensions: Optional[str]
-    weight_kg: Optional[Decimal]
-    image_urls: Optional[List[str]]
-    
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "id": "123e4567-e89b-12d3-a456-426614174000",
-                "name": "Fût de Château Margaux 2015",
-                "origin_country": "France",
-                "previous_content": "Bordeaux Rouge",
-                "volume_liters": "225.00",
-                "wood_type": "Chêne français",
-                "condition": "Excellent",
-                "price": "1500.00",
-                "stock_quantity": 5,
-                "description": "Fût de chêne français de première qualité",
-                "dimensions": "H: 95cm, D: 70cm",
-                "weight_kg": "45.50",
-                "image_urls": ["https://example.com/barrel1.jpg"],
-                "created_at": "2025-08-27T20:00:00Z",
-                "updated_at": "2025-08-27T20:00:00Z"
-            }
+    description: Optional[str] = None
+    dimensions: Optional[str] = None
+    weight_kg: Optional[Decimal] = None
+    image_urls: Optional[List[str]] = None
+    
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "id": "123e4567-e89b-12d3-a456-426614174000",
+            "name": "Fût de Château Margaux 2015",
+            "origin_country": "France",
+            "previous_content": "Bordeaux Rouge",
+            "volume_liters": "225.00",
+            "wood_type": "Chêne français",
+            "condition": "Excellent",
+            "price": "1500.00",
+            "stock_quantity": 5,
+            "description": "Fût de chêne français de première qualité",
+            "dimensions": "H: 95cm, D: 70cm",
+            "weight_kg": "45.50",
+            "image_urls": ["https://example.com/barrel1.jpg"],
+            "created_at": "2025-08-27T20:00:00Z",
+            "updated_at": "2025-08-27T20:00:00Z"
         }
+    })
+
+
+class BarrelBatchRequest(BaseSchema):
+    """Schéma de requête pour la lecture groupée de fûts"""
+    
+    ids: List[UUID] = Field(..., min_length=1, description="Identifiants des fûts")
+
+
+class BarrelBatchItem(BaseSchema):
+    """Résultat de la lecture groupée pour un identifiant"""
+    
+    id: UUID
+    found: bool
+    barrel: Optional[BarrelResponse] = None
+
+
+class BarrelBatchResponse(BaseSchema):
+    """Schéma de réponse pour la lecture groupée de fûts (dans l'ordre de la requête)"""
+    
+    items: List[BarrelBatchItem]
 
 
 class BarrelListResponse(BaseSchema):
@@ -164,18 +184,32 @@ class BarrelFilter(BaseSchema):
     in_stock: Optional[bool] = Field(None, description="En stock uniquement")
     search: Optional[str] = Field(None, description="Recherche textuelle")
     
-    @validator('max_price')
-    def validate_max_price(cls, v, values):
+    @field_validator('max_price')
+    @classmethod
+    def validate_max_price(cls, v, info: ValidationInfo):
         """Valide que le prix maximum est supérieur au prix minimum"""
-        if v is not None and 'min_price' in values and values['min_price'] is not None:
-            if v <= values['min_price']:
+        if v is not None and info.data.get('min_price') is not None:
+            if v <= info.data['min_price']:
                 raise ValueError('Le prix maximum doit être supérieur au prix minimum')
         return v
     
-    @validator('max_volume')
-    def validate_max_volume(cls, v, values):
+    @field_validator('max_volume')
+    @classmethod
+    def validate_max_volume(cls, v, info: ValidationInfo):
         """Valide que le volume maximum est supérieur au volume minimum"""
-        if v is not None and 'min_volume' in values and values['min_volume'] is not None:
-            if v <= values['min_volume']:
+        if v is not None and info.data.get('min_volume') is not None:
+            if v <= info.data['min_volume']:
                 raise ValueError('Le volume maximum doit être supérieur au volume minimum')
         return v
+
+
+class BarrelFacetsResponse(BaseSchema):
+    """Comptages par facette du catalogue sous les filtres courants"""
+    
+    total: int = Field(..., description="Nombre de fûts correspondant aux filtres")
+    origin_country: Dict[str, int] = Field(default_factory=dict, description="Fûts par pays d'origine")
+    wood_type: Dict[str, int] = Field(default_factory=dict, description="Fûts par type de bois")
+    condition: Dict[str, int] = Field(default_factory=dict, description="Fûts par état")
+    previous_content: Dict[str, int] = Field(default_factory=dict, description="Fûts par contenu précédent")
+    price_range: Dict[str, int] = Field(default_factory=dict, description="Fûts par tranche de prix (euros)")
+    volume_range: Dict[str, int] = Field(default_factory=dict, description="Fûts par tranche de volume (litres)")
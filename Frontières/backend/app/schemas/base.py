@@ -3,7 +3,7 @@ Schémas de base - Millésime Sans Frontières
 Classes communes pour tous les schémas
 """
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, Generic, TypeVar, List
 from datetime import datetime
 from uuid import UUID
@@ -14,12 +14,7 @@ T = TypeVar('T')
 class BaseSchema(BaseModel):
     """Schéma de base avec configuration commune"""
     
-    class Config:
-        from_attributes = True
-        json_encoders = {
-            datetime: lambda v: v.isoformat(),
-            UUID: lambda v: str(v)
-        }
+    model_config = ConfigDict(from_attributes=True)
 
 
 class BaseResponse(BaseSchema):
@@ -35,31 +30,40 @@ class PaginationParams(BaseSchema):
     
     page: int = Field(default=1, ge=1, description="Numéro de page")
     size: int = Field(default=20, ge=1, le=100, description="Taille de la page")
+    cursor: Optional[str] = Field(default=None, description="Curseur opaque de la page suivante (pagination par curseur)")
     
     @property
     def offset(self) -> int:
         """Calcule l'offset pour la requête SQL"""
         return (self.page - 1) * self.size
+    
+    @property
+    def is_cursor_mode(self) -> bool:
+        """Vérifie si la pagination par curseur est demandée"""
+        return self.cursor is not None
 
 
 class PaginatedResponse(BaseSchema, Generic[T]):
     """Réponse paginée"""
     
     items: List[T]
-    total: int
-    page: int
+    total: Optional[int] = None
+    page: Optional[int] = None
     size: int
-    pages: int
+    pages: Optional[int] = None
+    next_cursor: Optional[str] = None
     
     @property
     def has_next(self) -> bool:
         """Vérifie s'il y a une page suivante"""
+        if self.pages is None:
+            return self.next_cursor is not None
         return self.page < self.pages
     
     @property
     def has_previous(self) -> bool:
         """Vérifie s'il y a une page précédente"""
-        return self.page > 1
+        return self.page is not None and self.page > 1
 
 
 class ErrorResponse(BaseSchema):
@@ -1,7 +1,7 @@
 from datetime import datetime
 from decimal import Decimal
 from typing import List, Optional
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, field_validator
 
 from .base import BaseSchema
 from .user import UserResponse
@@ -33,9 +33,6 @@ class OrderItemResponse(OrderItemBase):
     barrel: BarrelResponse
     created_at: datetime
 
-    class Config:
-        from_attributes = True
-
 
 class OrderBase(BaseSchema):
     """Schéma de base pour les commandes"""
@@ -48,9 +45,10 @@ class OrderBase(BaseSchema):
 
 class OrderCreate(OrderBase):
     """Schéma pour créer une commande"""
-    items: List[OrderItemCreate] = Field(..., min_items=1, description="Éléments de la commande")
+    items: List[OrderItemCreate] = Field(..., min_length=1, description="Éléments de la commande")
     
-    @validator('items')
+    @field_validator('items')
+    @classmethod
     def validate_items(cls, v):
         if not v:
             raise ValueError('La commande doit contenir au moins un élément')
@@ -87,9 +85,6 @@ class OrderResponse(OrderBase):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
-
 
 class OrderListResponse(BaseSchema):
     """Schéma de réponse pour la liste des commandes"""
@@ -101,9 +96,6 @@ class OrderListResponse(BaseSchema):
     created_at: datetime
     user: UserResponse
 
-    class Config:
-        from_attributes = True
-
 
 class OrderFilter(BaseSchema):
     """Schéma de filtrage pour les commandes"""
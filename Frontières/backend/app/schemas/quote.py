@@ -1,7 +1,7 @@
 from datetime import datetime, date
 from decimal import Decimal
 from typing import List, Optional
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, field_validator
 
 from .base import BaseSchema
 from .user import UserResponse
@@ -36,9 +36,6 @@ class QuoteItemResponse(QuoteItemBase):
     barrel: BarrelResponse
     created_at: datetime
 
-    class Config:
-        from_attributes = True
-
 
 class QuoteBase(BaseSchema):
     """Schéma de base pour les devis"""
@@ -54,15 +51,17 @@ class QuoteBase(BaseSchema):
 
 class QuoteCreate(QuoteBase):
     """Schéma pour créer un devis"""
-    items: List[QuoteItemCreate] = Field(..., min_items=1, description="Éléments du devis")
+    items: List[QuoteItemCreate] = Field(..., min_length=1, description="Éléments du devis")
     
-    @validator('items')
+    @field_validator('items')
+    @classmethod
     def validate_items(cls, v):
         if not v:
             raise ValueError('Le devis doit contenir au moins un élément')
         return v
     
-    @validator('valid_until')
+    @field_validator('valid_until')
+    @classmethod
     def validate_valid_until(cls, v):
         if v <= date.today():
             raise ValueError('La date de validité doit être dans le futur')
@@ -109,9 +108,6 @@ class QuoteResponse(QuoteBase):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
-
 
 class QuoteListResponse(BaseSchema):
     """Schéma de réponse pour la liste des devis"""
@@ -124,9 +120,6 @@ class QuoteListResponse(BaseSchema):
     created_at: datetime
     user: UserResponse
 
-    class Config:
-        from_attributes = True
-
 
 class QuoteFilter(BaseSchema):
     """Schéma de filtrage pour les devis"""
@@ -3,7 +3,7 @@ Schémas User - Millésime Sans Frontières
 Validation des données utilisateur
 """
 
-from pydantic import BaseModel, Field, EmailStr
+from pydantic import BaseModel, ConfigDict, Field, EmailStr
 from typing import Optional, List
 from datetime import datetime
 from uuid import UUID
@@ -28,19 +28,18 @@ class UserCreate(UserBase):
     password: str = Field(..., min_length=8, description="Mot de passe (min 8 caractères)")
     password_confirm: str = Field(..., description="Confirmation du mot de passe")
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "email": "client@example.com",
-                "first_name": "Jean",
-                "last_name": "Dupont",
-                "company_name": "Cave à Vins SARL",
-                "phone_number": "+33 1 23 45 67 89",
-                "role": "b2b",
-                "password": "motdepasse123",
-                "password_confirm": "motdepasse123"
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "email": "client@example.com",
+            "first_name": "Jean",
+            "last_name": "Dupont",
+            "company_name": "Cave à Vins SARL",
+            "phone_number": "+33 1 23 45 67 89",
+            "role": "b2b",
+            "password": "motdepasse123",
+            "password_confirm": "motdepasse123"
         }
+    })
 
 
 class UserUpdate(BaseSchema):
@@ -59,13 +58,12 @@ class UserLogin(BaseSchema):
     email: EmailStr = Field(..., description="Email de l'utilisateur")
     password: str = Field(..., description="Mot de passe")
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "email": "client@example.com",
-                "password": "motdepasse123"
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "email": "client@example.com",
+            "password": "motdepasse123"
         }
+    })
 
 
 class UserResponse(BaseResponse):
@@ -79,21 +77,20 @@ class UserResponse(BaseResponse):
     role: str
     is_active: bool
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "id": "123e4567-e89b-12d3-a456-426614174000",
-                "email": "client@example.com",
-                "first_name": "Jean",
-                "last_name": "Dupont",
-                "company_name": "Cave à Vins SARL",
-                "phone_number": "+33 1 23 45 67 89",
-                "role": "b2b",
-                "is_active": True,
-                "created_at": "2025-08-27T20:00:00Z",
-                "updated_at": "2025-08-27T20:00:00Z"
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "id": "123e4567-e89b-12d3-a456-426614174000",
+            "email": "client@example.com",
+            "first_name": "Jean",
+            "last_name": "Dupont",
+            "company_name": "Cave à Vins SARL",
+            "phone_number": "+33 1 23 45 67 89",
+            "role": "b2b",
+            "is_active": True,
+            "created_at": "2025-08-27T20:00:00Z",
+            "updated_at": "2025-08-27T20:00:00Z"
         }
+    })
 
 
 class UserWithToken(UserResponse):
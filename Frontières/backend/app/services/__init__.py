@@ -3,16 +3,21 @@ Services - Millésime Sans Frontières
 Couche de logique métier de l'application
 """
 
-from .auth_service import AuthService
-from .user_service import UserService
-from .barrel_service import BarrelService
-from .order_service import OrderService
-from .quote_service import QuoteService
+from .auth_service import AuthService, AsyncAuthService
+from .user_service import UserService, AsyncUserService
+from .barrel_service import BarrelService, AsyncBarrelService
+from .order_service import OrderService, AsyncOrderService
+from .quote_service import QuoteService, AsyncQuoteService
 
 __all__ = [
     "AuthService",
     "UserService", 
     "BarrelService",
     "OrderService",
-    "QuoteService"
+    "QuoteService",
+    "AsyncAuthService",
+    "AsyncUserService",
+    "AsyncBarrelService",
+    "AsyncOrderService",
+    "AsyncQuoteService"
 ]
@@ -0,0 +1,72 @@
+"""
+Services asynchrones - Millésime Sans Frontières
+Exécution des services métier sur une AsyncSession sans bloquer la boucle d'événements
+"""
+
+from typing import Any, Dict, Iterable, Tuple
+
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+
+def _iter_instances(result: Any) -> Iterable[Any]:
+    """Parcourt les objets ORM d'un résultat (objet, liste, tuple (éléments, total), ...)"""
+    if isinstance(result, (list, tuple, set)):
+        for item in result:
+            yield from _iter_instances(item)
+    elif hasattr(result, "_sa_instance_state"):
+        yield result
+
+
+def _load_path(instance: Any, path: str) -> None:
+    """Charge une relation (chemin pointé, ex. "items.barrel") pendant que la session est active"""
+    name, _, rest = path.partition(".")
+    if name not in inspect(type(instance)).relationships:
+        return
+    related = getattr(instance, name)
+    if rest:
+        for child in _iter_instances(related):
+            _load_path(child, rest)
+
+
+class AsyncServiceAdapter:
+    """
+    Version AsyncSession d'un service synchrone
+
+    Chaque méthode publique du service devient une coroutine exécutée par
+    `AsyncSession.run_sync` : la logique métier reste unique et chaque requête SQL
+    attend le pilote asynchrone (asyncpg, aiosqlite) au lieu de bloquer le worker.
+    Les relations listées dans `eager_loads` sont chargées avant de rendre la main,
+    la sérialisation de la réponse ayant lieu hors de la session.
+    """
+
+    service_class: type = None
+    eager_loads: Tuple[str, ...] = ()
+
+    def __init__(self, db: AsyncSession, **service_kwargs: Any):
+        self.db = db
+        self.service_kwargs: Dict[str, Any] = service_kwargs
+
+    def __getattr__(self, name: str) -> Any:
+        method = getattr(self.service_class, name, None)
+        if name.startswith("_") or not callable(method):
+            raise AttributeError(f"{type(self).__name__} n'a pas de méthode '{name}'")
+
+        async def call(*args: Any, **kwargs: Any) -> Any:
+            return await self._call(name, *args, **kwargs)
+
+        call.__name__ = name
+        call.__doc__ = method.__doc__
+        return call
+
+    async def _call(self, name: str, *args: Any, **kwargs: Any) -> Any:
+        return await self.db.run_sync(self._call_sync, name, args, kwargs)
+
+    def _call_sync(self, session: Session, name: str, args: tuple, kwargs: dict) -> Any:
+        service = self.service_class(session, **self.service_kwargs)
+        result = getattr(service, name)(*args, **kwargs)
+        for instance in _iter_instances(result):
+            for path in self.eager_loads:
+                _load_path(instance, path)
+        return result
@@ -6,16 +6,16 @@ Gestion de l'authentification et des utilisateurs
 from typing import Optional, Union, Dict, Any
 from datetime import timedelta
 from sqlalchemy.orm import Session
-from passlib.context import CryptContext
 
 from app.models.user import User
 from app.schemas.user import UserCreate
 from app.core.auth import verify_password as auth_verify_password, create_access_token as auth_create_access_token
+from app.core.auth import cache_principal
 from app.core.security import validate_password_strength
 from app.core.exceptions import ValidationException, AuthenticationException
-
-# Configuration du contexte de hachage des mots de passe
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.core.password_hashing import get_password_hasher
+from app.core.unit_of_work import save
+from app.services.async_adapter import AsyncServiceAdapter
 
 
 class AuthService:
@@ -24,7 +24,7 @@ class AuthService:
 
     def hash_password(self, password: str) -> str:
         """Hache un mot de passe"""
-        return pwd_context.hash(password)
+        return get_password_hasher().hash(password)
 
     def get_password_hash(self, password: str) -> str:
         """Alias pour hash_password pour la compatibilité"""
@@ -34,17 +34,30 @@ class AuthService:
         """Vérifie un mot de passe"""
         return auth_verify_password(plain_password, hashed_password)
 
+    def get_active_user_by_email(self, email: str) -> Optional[User]:
+        """Récupère un utilisateur actif par email"""
+        user = self.db.query(User).filter(User.email == email).first()
+        if not user or not user.is_active:
+            return None
+        return user
+
+    def update_password_hash(self, user: User, hashed_password: str) -> None:
+        """Remplace l'empreinte du mot de passe (changement du coût bcrypt)"""
+        user.hashed_password = hashed_password
+        save(self.db)
+
     def authenticate_user(self, email: str, password: str) -> Optional[User]:
         """Authentifie un utilisateur"""
-        user = self.db.query(User).filter(User.email == email).first()
+        user = self.get_active_user_by_email(email)
         if not user:
             return None
         
-        if not user.is_active:
+        verified, new_hash = get_password_hasher().verify_and_update(password, user.hashed_password)
+        if not verified:
             return None
         
-        if not self.verify_password(password, user.hashed_password):
-            return None
+        if new_hash:
+            self.update_password_hash(user, new_hash)
         
         return user
 
@@ -57,13 +70,27 @@ class AuthService:
         from app.core.auth import verify_token as auth_verify_token
         return auth_verify_token(token)
 
+    def get_current_user(self, token: str) -> User:
+        """Récupère l'utilisateur actif porteur du token"""
+        try:
+            user_id = self.verify_token(token).get("sub")
+        except ValueError as e:
+            raise AuthenticationException(str(e))
+        
+        user = self.db.get(User, user_id) if user_id else None
+        if not user or not user.is_active:
+            raise AuthenticationException("Impossible de valider les identifiants")
+        
+        cache_principal(user)
+        return user
+
     def is_token_expired(self, token: str) -> bool:
         """Vérifie si un token est expiré"""
         from app.core.auth import is_token_expired as auth_is_token_expired
         return auth_is_token_expired(token)
 
-    def create_user(self, user_data: Union[UserCreate, Dict]) -> User:
-        """Crée un nouvel utilisateur"""
+    def check_new_user(self, user_data: Union[UserCreate, Dict]) -> Dict[str, Any]:
+        """Valide les données d'inscription et retourne les champs de l'utilisateur"""
         if isinstance(user_data, dict):
             email = user_data.get("email")
             password = user_data.get("password")
@@ -87,19 +114,32 @@ class AuthService:
         if not password_validation["is_valid"]:
             raise ValidationException(f"Mot de passe trop faible: {', '.join(password_validation['errors'])}")
 
+        return {
+            "email": email,
+            "password": password,
+            "first_name": first_name,
+            "last_name": last_name,
+            "role": role
+        }
+
+    def create_user(self, user_data: Union[UserCreate, Dict], hashed_password: Optional[str] = None) -> User:
+        """Crée un nouvel utilisateur (`hashed_password` : empreinte déjà calculée, sinon hachage ici)"""
+        fields = self.check_new_user(user_data)
+        return self.insert_user(fields, hashed_password or self.hash_password(fields["password"]))
+
+    def insert_user(self, fields: Dict[str, Any], hashed_password: str) -> User:
+        """Enregistre un utilisateur à partir des champs déjà validés par `check_new_user`"""
+        fields = {key: value for key, value in fields.items() if key != "password"}
+
         # Créer l'utilisateur
-        hashed_password = self.hash_password(password)
         user = User(
-            email=email,
             hashed_password=hashed_password,
-            first_name=first_name,
-            last_name=last_name,
-            role=role,
-            is_active=True
+            is_active=True,
+            **fields
         )
 
         self.db.add(user)
-        self.db.commit()
+        save(self.db)
         self.db.refresh(user)
         return user
 
@@ -107,3 +147,35 @@ class AuthService:
         """Valide la force d'un mot de passe"""
         validation = validate_password_strength(password)
         return validation["is_valid"]
+
+
+class AsyncAuthService(AsyncServiceAdapter):
+    """
+    Version AsyncSession de AuthService
+
+    Le calcul bcrypt est confié au pool de hachage entre deux accès à la base :
+    il ne bloque ni la boucle d'événements ni la session.
+    """
+    
+    service_class = AuthService
+
+    async def authenticate_user(self, email: str, password: str) -> Optional[User]:
+        """Authentifie un utilisateur"""
+        user = await self._call("get_active_user_by_email", email)
+        if not user:
+            return None
+        
+        verified, new_hash = await get_password_hasher().verify_and_update_async(password, user.hashed_password)
+        if not verified:
+            return None
+        
+        if new_hash:
+            await self._call("update_password_hash", user, new_hash)
+        
+        return user
+
+    async def create_user(self, user_data: Union[UserCreate, Dict]) -> User:
+        """Crée un nouvel utilisateur"""
+        fields = await self._call("check_new_user", user_data)
+        hashed_password = await get_password_hasher().hash_async(fields["password"])
+        return await self._call("insert_user", fields, hashed_password)
@@ -3,30 +3,153 @@ Service Barrel - Millésime Sans Frontières
 Gestion de la logique métier des fûts
 """
 
-from typing import Optional, List, Tuple, Dict, Any, Union
+from typing import Optional, List, Tuple, Dict, Any, Sequence, Union
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
+from sqlalchemy import inspect
+from sqlalchemy import and_, or_, func, case, select, union_all, literal, literal_column
 from uuid import UUID
 from decimal import Decimal
+from datetime import datetime
+from enum import Enum
+import json
 
 from app.models.barrel import Barrel
 from app.schemas.barrel import BarrelCreate, BarrelUpdate, BarrelFilter
-from app.core.exceptions import NotFoundException, BusinessLogicException
+from app.core.exceptions import NotFoundException, BusinessLogicException, ValidationException
+from app.core.cache import CatalogCache, get_catalog_cache
+from app.core.config import settings
+from app.core.fieldsets import apply_projection
+from app.core.constants import (
+    WoodType, PreviousContent, BarrelCondition,
+    FACET_PRICE_BUCKETS, FACET_VOLUME_BUCKETS
+)
+from app.core.pagination import paginate_keyset
+from app.core.search import get_search_backend, search_condition, apply_ranked_search
+from app.core.unit_of_work import save, on_commit
+from app.services.async_adapter import AsyncServiceAdapter
+
+# Énumérations des facettes (stockées par nom en base)
+_FACET_ENUMS = {
+    "wood_type": WoodType,
+    "previous_content": PreviousContent,
+    "condition": BarrelCondition,
+}
+
+# Colonnes dont dépendent les champs calculés des listes, et colonnes toujours chargées (tri, curseur)
+_LIST_FIELD_SOURCES = {"main_image": ("image_urls",)}
+_LIST_ALWAYS_LOADED = ("id", "created_at")
 
 
 class BarrelService:
     """Service de gestion des fûts"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, cache: Optional[CatalogCache] = None):
         self.db = db
+        # Cache des lectures du catalogue (None : lectures toujours en base)
+        self.cache = cache
     
     def get_barrel_by_id(self, barrel_id: UUID) -> Optional[Barrel]:
         """Récupère un fût par son ID"""
-        barrel = self.db.query(Barrel).filter(Barrel.id == barrel_id).first()
+        if self.cache is None:
+            return self._load_barrel(barrel_id)
+        
+        generation = self.cache.generation()
+        cached = self.cache.get_barrel(barrel_id)
+        if cached is not None:
+            return self._barrel_from_cache(cached)
+        
+        barrel = self._load_barrel(barrel_id)
+        self.cache.set_barrel(barrel_id, self._barrel_to_cache(barrel), generation)
+        return barrel
+    
+    def get_barrels_by_ids(self, barrel_ids: Sequence[UUID]) -> List[Optional[Barrel]]:
+        """
+        Récupère plusieurs fûts par leurs ID, dans l'ordre demandé (None pour un fût inexistant)
+        
+        Les fiches présentes dans le cache sont servies directement ; les autres
+        sont lues en une seule requête IN, puis mises en cache.
+        """
+        if len(barrel_ids) > settings.MAX_BATCH_SIZE:
+            raise ValidationException(f"Au plus {settings.MAX_BATCH_SIZE} fûts par requête")
+        ids = [str(barrel_id) for barrel_id in barrel_ids]
+        unique_ids = list(dict.fromkeys(ids))
+        
+        found: Dict[str, Barrel] = {}
+        generation = self.cache.generation() if self.cache is not None else None
+        if self.cache is not None:
+            for barrel_id in unique_ids:
+                cached = self.cache.get_barrel(barrel_id)
+                if cached is not None:
+                    found[barrel_id] = self._barrel_from_cache(cached)
+        
+        missing = [barrel_id for barrel_id in unique_ids if barrel_id not in found]
+        if missing:
+            for barrel in self.db.query(Barrel).filter(Barrel.id.in_(missing)).all():
+                found[barrel.id] = barrel
+                if self.cache is not None:
+                    self.cache.set_barrel(barrel.id, self._barrel_to_cache(barrel), generation)
+        
+        return [found.get(barrel_id) for barrel_id in ids]
+    
+    def get_barrel_version(self, barrel_id: UUID) -> Optional[datetime]:
+        """Date de dernière modification d'un fût (validateur HTTP), sans charger la ligne complète"""
+        return self.db.execute(select(Barrel.updated_at).where(Barrel.id == str(barrel_id))).scalar_one_or_none()
+    
+    def _load_barrel(self, barrel_id: UUID) -> Barrel:
+        """Charge un fût depuis la base (instance attachée à la session, pour les écritures)"""
+        barrel = self.db.query(Barrel).filter(Barrel.id == str(barrel_id)).first()
         if not barrel:
             raise NotFoundException("Fût non trouvé")
         return barrel
     
+    @staticmethod
+    def _barrel_to_cache(barrel: Barrel) -> Dict[str, Any]:
+        """Convertit un fût en dictionnaire sérialisable en JSON (colonnes chargées uniquement)"""
+        data = {}
+        unloaded = inspect(barrel).unloaded
+        for column in Barrel.__table__.columns:
+            if column.key in unloaded:
+                continue
+            value = getattr(barrel, column.key)
+            if isinstance(value, Enum):
+                value = value.value
+            elif isinstance(value, Decimal):
+                value = str(value)
+            elif isinstance(value, datetime):
+                value = value.isoformat()
+            data[column.key] = value
+        return data
+    
+    @staticmethod
+    def _barrel_from_cache(data: Dict[str, Any]) -> Barrel:
+        """Reconstruit un fût (détaché de la session, en lecture seule) depuis le cache"""
+        values = {}
+        for column in Barrel.__table__.columns:
+            value = data.get(column.key)
+            python_type = column.type.python_type
+            if value is not None:
+                if issubclass(python_type, Enum):
+                    value = python_type(value)
+                elif python_type is Decimal:
+                    value = Decimal(value)
+                elif python_type is datetime:
+                    value = datetime.fromisoformat(value)
+            values[column.key] = value
+        return Barrel(**values)
+    
+    def _invalidate_cache(self, *barrel_ids: Any) -> None:
+        """Invalide les fiches des fûts modifiés et les lectures agrégées du catalogue (après le commit)"""
+        caches = [get_catalog_cache()]
+        if self.cache is not None and self.cache is not caches[0]:
+            caches.append(self.cache)
+        ids = [str(barrel_id) for barrel_id in barrel_ids]
+
+        def invalidate() -> None:
+            for cache in caches:
+                cache.invalidate_barrels(ids)
+
+        on_commit(self.db, invalidate)
+    
     def get_barrels(
         self,
         skip: int = 0,
@@ -52,15 +175,8 @@ class BarrelService:
         
         return query.offset(skip).limit(limit).all()
     
-    def get_barrels_with_filters(
-        self,
-        skip: int = 0,
-        limit: int = 100,
-        filters: Optional[BarrelFilter] = None
-    ) -> Tuple[List[Barrel], int]:
-        """Récupère des fûts avec filtres et pagination"""
-        query = self.db.query(Barrel)
-        
+    def _apply_barrel_filters(self, query, filters: Optional[BarrelFilter] = None):
+        """Applique les filtres du catalogue à une requête"""
         if filters:
             # Filtres de base
             if filters.origin_country:
@@ -93,70 +209,143 @@ class BarrelService:
             if filters.in_stock:
                 query = query.filter(Barrel.stock_quantity > 0)
             
-            # Recherche textuelle
+            # Recherche textuelle (index plein texte si disponible)
             if filters.search:
-                search_term = f"%{filters.search}%"
-                query = query.filter(
-                    or_(
-                        Barrel.name.ilike(search_term),
-                        Barrel.description.ilike(search_term),
-                        Barrel.origin_country.ilike(search_term),
-                        Barrel.previous_content.ilike(search_term)
+                backend = self._search_backend()
+                condition = search_condition(backend, filters.search) if backend else None
+                if condition is not None:
+                    query = query.filter(condition)
+                elif not backend:
+                    search_term = f"%{filters.search}%"
+                    query = query.filter(
+                        or_(
+                            Barrel.name.ilike(search_term),
+                            Barrel.description.ilike(search_term),
+                            Barrel.origin_country.ilike(search_term),
+                            Barrel.previous_content.ilike(search_term)
+                        )
                     )
-                )
+        
+        return query
+    
+    def get_barrels_with_filters(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        filters: Optional[BarrelFilter] = None,
+        fields: Optional[Tuple[str, ...]] = None
+    ) -> Tuple[List[Barrel], int]:
+        """
+        Récupère des fûts avec filtres et pagination
+        
+        Avec `fields`, seules les colonnes de ces champs sont lues (les autres
+        attributs des fûts retournés ne sont pas chargés).
+        """
+        cache_params = f"{skip}:{limit}:{self._filters_cache_key(filters)}"
+        if fields is not None:
+            cache_params += f":{','.join(fields)}"
+        generation = self.cache.generation() if self.cache is not None else None
+        if generation is not None:
+            cached = self.cache.get_catalog("list", cache_params, generation)
+            if cached is not None:
+                return [self._barrel_from_cache(item) for item in cached["items"]], cached["total"]
+        
+        query = self._apply_barrel_filters(self.db.query(Barrel), filters)
         
         # Compte total pour la pagination
         total = query.count()
         
-        # Application de la pagination
-        barrels = query.offset(skip).limit(limit).all()
+        # Application de la pagination (ordre stable pour des pages déterministes)
+        query = apply_projection(query, Barrel, fields, _LIST_FIELD_SOURCES, _LIST_ALWAYS_LOADED)
+        barrels = query.order_by(
+            Barrel.created_at.desc(), Barrel.id.desc()
+        ).offset(skip).limit(limit).all()
         
+        if self.cache is not None:
+            self.cache.set_catalog("list", cache_params, {
+                "items": [self._barrel_to_cache(barrel) for barrel in barrels],
+                "total": total
+            }, generation)
         return barrels, total
     
+    def get_barrels_by_cursor(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        filters: Optional[BarrelFilter] = None,
+        fields: Optional[Tuple[str, ...]] = None
+    ) -> Tuple[List[Barrel], Optional[str]]:
+        """Récupère des fûts avec filtres et pagination par curseur sur (created_at, id)"""
+        query = self._apply_barrel_filters(self.db.query(Barrel), filters)
+        query = apply_projection(query, Barrel, fields, _LIST_FIELD_SOURCES, _LIST_ALWAYS_LOADED)
+        return paginate_keyset(query, Barrel.created_at, Barrel.id, limit, cursor=cursor)
+    
     def create_barrel(self, barrel_data: Union[BarrelCreate, dict]) -> Barrel:
         """Crée un nouveau fût"""
-        if hasattr(barrel_data, 'dict'):
-            data = barrel_data.dict()
+        if hasattr(barrel_data, 'model_dump'):
+            data = barrel_data.model_dump()
         else:
             data = barrel_data
             
         db_barrel = Barrel(**data)
         self.db.add(db_barrel)
-        self.db.commit()
+        save(self.db)
         self.db.refresh(db_barrel)
+        self._invalidate_cache(db_barrel.id)
         return db_barrel
     
     def update_barrel(self, barrel_id: UUID, barrel_data: Union[BarrelUpdate, dict]) -> Optional[Barrel]:
         """Met à jour un fût"""
-        barrel = self.get_barrel_by_id(barrel_id)
+        barrel = self._load_barrel(barrel_id)
         
         # Mise à jour des champs fournis
-        if hasattr(barrel_data, 'dict'):
-            update_data = barrel_data.dict(exclude_unset=True)
+        if hasattr(barrel_data, 'model_dump'):
+            update_data = barrel_data.model_dump(exclude_unset=True)
         else:
             update_data = barrel_data
             
         for field, value in update_data.items():
             setattr(barrel, field, value)
         
-        self.db.commit()
+        save(self.db)
         self.db.refresh(barrel)
+        self._invalidate_cache(barrel.id)
         return barrel
     
     def delete_barrel(self, barrel_id: UUID) -> bool:
         """Supprime un fût"""
-        barrel = self.get_barrel_by_id(barrel_id)
+        barrel = self._load_barrel(barrel_id)
         
         # Vérifier si le fût a du stock
         if barrel.stock_quantity > 0:
             raise BusinessLogicException("Impossible de supprimer un fût avec du stock")
         
         self.db.delete(barrel)
-        self.db.commit()
+        save(self.db)
+        self._invalidate_cache(barrel_id)
         return True
     
+    def _search_backend(self) -> Optional[str]:
+        """Backend plein texte disponible pour la base de la session"""
+        try:
+            return get_search_backend(self.db.get_bind())
+        except Exception:
+            return None
+    
     def search_barrels(self, search_term: str, limit: int = 20) -> List[Barrel]:
-        """Recherche des fûts par terme textuel"""
+        """Recherche des fûts par terme textuel, triés par pertinence"""
+        backend = self._search_backend()
+        if not backend:
+            return self._search_barrels_ilike(search_term, limit)
+        
+        query = apply_ranked_search(self.db.query(Barrel), backend, search_term)
+        if query is None:
+            return []
+        
+        return query.limit(limit).all()
+    
+    def _search_barrels_ilike(self, search_term: str, limit: int = 20) -> List[Barrel]:
+        """Recherche par sous-chaîne (repli sans index plein texte)"""
         query = self.db.query(Barrel).filter(
             or_(
                 Barrel.name.ilike(f"%{search_term}%"),
@@ -197,6 +386,118 @@ class BarrelService:
         }
         return [wood_mapping.get(wood[0], wood[0]) for wood in wood_types if wood[0]]
     
+    def get_facets(self, filters: Optional[BarrelFilter] = None) -> Dict[str, Any]:
+        """
+        Compte les fûts par facette sous les filtres courants
+        
+        Une seule requête groupée : GROUPING SETS sous PostgreSQL, UNION ALL
+        d'agrégats sur la sélection filtrée ailleurs (SQLite).
+        """
+        cache_params = self._filters_cache_key(filters)
+        generation = self.cache.generation() if self.cache is not None else None
+        if generation is not None:
+            cached = self.cache.get_catalog("facets", cache_params, generation)
+            if cached is not None:
+                return cached
+        
+        expressions = self._facet_expressions()
+        labelled = [expression.label(name) for name, expression in expressions.items()]
+        
+        if self.db.get_bind().dialect.name == "postgresql":
+            query = self._apply_barrel_filters(self.db.query(*labelled, func.count().label("count")), filters)
+            # Le jeu vide () fournit le total des fûts filtrés
+            grouping_sets = func.grouping_sets(*expressions.values(), literal_column("()"))
+            rows = []
+            for row in query.group_by(grouping_sets).all():
+                # Colonnes non nulles : seule la facette groupée est renseignée sur chaque ligne
+                facet = next((name for name in expressions if row._mapping[name] is not None), None)
+                rows.append((facet, row._mapping[facet] if facet else None, row.count))
+        else:
+            filtered = self._apply_barrel_filters(self.db.query(*labelled), filters).subquery()
+            statement = union_all(
+                select(literal(None).label("facet"), literal(None).label("value"), func.count().label("count")).select_from(filtered),
+                *[
+                    select(literal(name).label("facet"), filtered.c[name].label("value"), func.count().label("count")).group_by(filtered.c[name])
+                    for name in expressions
+                ]
+            )
+            rows = [(row.facet, row.value, row.count) for row in self.db.execute(statement)]
+        
+        facets = self._build_facets(rows)
+        if self.cache is not None:
+            self.cache.set_catalog("facets", cache_params, facets, generation)
+        return facets
+    
+    def _facet_expressions(self) -> Dict[str, Any]:
+        """Expressions SQL des facettes (colonnes et tranches numériques)"""
+        return {
+            "origin_country": Barrel.origin_country,
+            "wood_type": Barrel.wood_type,
+            "condition": Barrel.condition,
+            "previous_content": Barrel.previous_content,
+            "price_range": self._bucket_expression(Barrel.price, FACET_PRICE_BUCKETS),
+            "volume_range": self._bucket_expression(Barrel.volume_liters, FACET_VOLUME_BUCKETS),
+        }
+    
+    @staticmethod
+    def _bucket_expression(column, bounds: List[int]):
+        """Expression CASE classant une valeur numérique dans sa tranche ("0-500", ..., "5000+")"""
+        # Littéraux SQL (et non paramètres) : l'expression doit être identique dans SELECT et GROUP BY
+        whens = []
+        lower = 0
+        for upper in bounds:
+            whens.append((column < literal_column(str(upper)), literal_column(f"'{lower}-{upper}'")))
+            lower = upper
+        return case(*whens, else_=literal_column(f"'{lower}+'"))
+    
+    @staticmethod
+    def _build_facets(rows: List[Tuple[Optional[str], Any, int]]) -> Dict[str, Any]:
+        """Met en forme les comptages (facette, valeur, nombre) de la requête groupée"""
+        facets: Dict[str, Any] = {"total": 0}
+        counts: Dict[str, Dict[str, int]] = {
+            name: {} for name in ("origin_country", "wood_type", "condition", "previous_content")
+        }
+        buckets = {"price_range": FACET_PRICE_BUCKETS, "volume_range": FACET_VOLUME_BUCKETS}
+        for name, bounds in buckets.items():
+            # Toutes les tranches sont présentes, dans l'ordre croissant
+            edges = [0] + bounds
+            counts[name] = {f"{lower}-{upper}": 0 for lower, upper in zip(edges, bounds)}
+            counts[name][f"{bounds[-1]}+"] = 0
+        
+        for facet, value, count in rows:
+            if facet is None:
+                facets["total"] = count
+                continue
+            if isinstance(value, Enum):
+                value = value.value
+            elif facet in _FACET_ENUMS and value in _FACET_ENUMS[facet].__members__:
+                value = _FACET_ENUMS[facet][value].value
+            counts[facet][value] = count
+        
+        for name, values in counts.items():
+            if name in buckets:
+                facets[name] = values
+            else:
+                facets[name] = dict(sorted(values.items(), key=lambda item: (-item[1], item[0])))
+        return facets
+    
+    @staticmethod
+    def _filters_cache_key(filters: Optional[BarrelFilter]) -> str:
+        """Clé de cache indépendante de l'ordre et de la casse des filtres (comparés par ILIKE)"""
+        if not filters:
+            return "{}"
+        normalized = {}
+        for field, value in filters.model_dump(exclude_none=True).items():
+            if isinstance(value, str):
+                # Une chaîne vide n'applique aucun filtre
+                if not value:
+                    continue
+                value = value.lower()
+            elif isinstance(value, Decimal):
+                value = str(value.normalize())
+            normalized[field] = value
+        return json.dumps(normalized, sort_keys=True)
+    
     def get_available_barrels(self) -> List[Barrel]:
         """Récupère tous les fûts disponibles en stock"""
         return self.db.query(Barrel).filter(Barrel.stock_quantity > 0).all()
@@ -209,14 +510,15 @@ class BarrelService:
     
     def update_stock(self, barrel_id: UUID, quantity: int) -> Barrel:
         """Met à jour le stock d'un fût"""
-        barrel = self.get_barrel_by_id(barrel_id)
+        barrel = self._load_barrel(barrel_id)
         
         new_stock = barrel.stock_quantity + quantity
         if new_stock < 0:
             raise BusinessLogicException("Stock insuffisant")
         
         barrel.stock_quantity = new_stock
-        self.db.commit()
+        save(self.db)
+        self._invalidate_cache(barrel_id)
         return barrel
     
     def decrease_stock(self, barrel_id: UUID, quantity: int) -> bool:
@@ -241,12 +543,22 @@ class BarrelService:
     
     def get_featured_barrels(self, limit: int = 6) -> List[Barrel]:
         """Récupère les fûts mis en avant (ex: meilleur rapport qualité/prix)"""
+        generation = self.cache.generation() if self.cache is not None else None
+        if generation is not None:
+            cached = self.cache.get_catalog("featured", str(limit), generation)
+            if cached is not None:
+                return [self._barrel_from_cache(item) for item in cached]
+        
         # Logique simple : fûts avec le meilleur rapport qualité/prix
-        return self.db.query(Barrel).filter(
+        barrels = self.db.query(Barrel).filter(
             Barrel.stock_quantity > 0
         ).order_by(
             func.coalesce(Barrel.stock_quantity, 0).desc()
         ).limit(limit).all()
+        
+        if self.cache is not None:
+            self.cache.set_catalog("featured", str(limit), [self._barrel_to_cache(barrel) for barrel in barrels], generation)
+        return barrels
     
     def get_barrel_count(self, filters: Optional[Dict[str, Any]] = None) -> int:
         """Compte le nombre de fûts avec filtres optionnels"""
@@ -274,12 +586,28 @@ class BarrelService:
     
     def get_barrel_statistics(self) -> Dict[str, Any]:
         """Récupère les statistiques des fûts"""
+        generation = self.cache.generation() if self.cache is not None else None
+        if generation is not None:
+            cached = self.cache.get_catalog("statistics", "", generation)
+            if cached is not None:
+                return cached
+        
         total_barrels = self.db.query(Barrel).count()
         available_barrels = self.db.query(Barrel).filter(Barrel.stock_quantity > 0).count()
         total_value = self.db.query(func.sum(Barrel.price * Barrel.stock_quantity)).scalar() or 0
         
-        return {
+        statistics = {
             "total_barrels": total_barrels,
             "available_barrels": available_barrels,
             "total_value": float(total_value)
         }
+        
+        if self.cache is not None:
+            self.cache.set_catalog("statistics", "", statistics, generation)
+        return statistics
+
+
+class AsyncBarrelService(AsyncServiceAdapter):
+    """Version AsyncSession de BarrelService"""
+    
+    service_class = BarrelService
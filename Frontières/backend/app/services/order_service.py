@@ -3,20 +3,26 @@ Order Service - Millésime Sans Frontières
 Gestion des commandes et de la logique métier
 """
 
-from typing import List, Optional, Dict, Any, Union
+from typing import List, Optional, Dict, Any, Union, Tuple
 from decimal import Decimal
-from datetime import datetime, timedelta
+from datetime import datetime
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, func
+from sqlalchemy import and_, or_, update, insert, case, select
 
 from app.models.order import Order
 from app.models.order_item import OrderItem
 from app.models.barrel import Barrel
 from app.models.user import User
 from app.schemas.order import OrderCreate, OrderUpdate, OrderStatusUpdate
-from app.core.exceptions import NotFoundException, ValidationException, BusinessLogicException
+from app.core.exceptions import NotFoundException, ValidationException, BusinessLogicException, InsufficientStockException
 from app.core.constants import OrderStatus, PaymentStatus
+from app.core.pagination import paginate_keyset
+from app.core.cache import get_catalog_cache
+from app.core.numbering import order_numbers
+from app.core.rollups import summarize_rollups
+from app.core.unit_of_work import save, on_commit
 from app.core.utils import generate_order_number
+from app.services.async_adapter import AsyncServiceAdapter
 
 
 class OrderService:
@@ -25,11 +31,7 @@ class OrderService:
 
     def _generate_order_number(self) -> str:
         """Génère un numéro de commande unique"""
-        timestamp = datetime.now().strftime("%Y%m%d")
-        count = self.db.query(Order).filter(
-            Order.created_at >= datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        ).count()
-        return f"ORD-{timestamp}-{count + 1:04d}"
+        return order_numbers.next_number(self.db)
 
     def _calculate_order_amounts(self, items: List[Dict], shipping_cost: Decimal = Decimal("0"), discount_percentage: Decimal = Decimal("0"), tax_percentage: Decimal = Decimal("20")) -> Dict[str, Decimal]:
         """Calcule les montants de la commande"""
@@ -45,21 +47,79 @@ class OrderService:
             "total": total
         }
 
-    def _validate_stock_availability(self, items: List[Dict]) -> bool:
-        """Valide la disponibilité du stock pour les articles"""
+    def _reserve_stock(self, items: List[Dict]) -> None:
+        """
+        Réserve le stock de toutes les lignes dans la transaction courante
+        
+        Chaque fût est décrémenté par un UPDATE conditionnel
+        (stock_quantity >= quantité demandée), dans l'ordre des identifiants
+        pour que deux commandes concurrentes verrouillent les lignes dans le
+        même ordre. Si une ligne échoue, la transaction est annulée et les
+        lignes en rupture sont signalées.
+        """
+        # Regrouper les lignes portant sur le même fût
+        requested: Dict[str, int] = {}
         for item in items:
-            barrel = self.db.query(Barrel).filter(Barrel.id == item['barrel_id']).first()
-            if not barrel or barrel.stock_quantity < item['quantity']:
-                return False
-        return True
+            barrel_id = str(item["barrel_id"])
+            requested[barrel_id] = requested.get(barrel_id, 0) + int(item["quantity"])
+        
+        for barrel_id in sorted(requested):
+            quantity = requested[barrel_id]
+            result = self.db.execute(
+                update(Barrel)
+                .where(and_(Barrel.id == barrel_id, Barrel.stock_quantity >= quantity))
+                .values(stock_quantity=Barrel.stock_quantity - quantity)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount != 1:
+                self.db.rollback()
+                raise InsufficientStockException(self._get_stock_shortages(requested, failed_barrel_id=barrel_id))
 
-    def _update_stock_after_order(self, items: List[Dict]) -> None:
-        """Met à jour le stock après une commande"""
-        for item in items:
-            barrel = self.db.query(Barrel).filter(Barrel.id == item['barrel_id']).first()
-            if barrel:
-                barrel.stock_quantity -= item['quantity']
-                self.db.commit()
+    def _reserve_stock_set_based(self, requested: Dict[str, int]) -> None:
+        """
+        Réserve le stock de plusieurs fûts en un seul UPDATE conditionnel
+        
+        La quantité de chaque fût est portée par un CASE : le nombre de lignes
+        modifiées doit égaler le nombre de fûts, sinon au moins un fût est en
+        rupture et la transaction est annulée. Les lignes des fûts doivent déjà
+        être verrouillées (dans l'ordre des identifiants) par l'appelant.
+        """
+        quantity = case(requested, value=Barrel.id)
+        result = self.db.execute(
+            update(Barrel)
+            .where(and_(Barrel.id.in_(list(requested)), Barrel.stock_quantity >= quantity))
+            .values(stock_quantity=Barrel.stock_quantity - quantity)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != len(requested):
+            self.db.rollback()
+            raise InsufficientStockException(self._get_stock_shortages(requested, failed_barrel_id=min(requested)))
+
+    def _get_stock_shortages(self, requested: Dict[str, int], failed_barrel_id: str) -> List[Dict[str, Any]]:
+        """Détermine les lignes en rupture avec une seule requête IN"""
+        available = dict(
+            self.db.query(Barrel.id, Barrel.stock_quantity).filter(Barrel.id.in_(list(requested))).all()
+        )
+        
+        shortages = [
+            {
+                "barrel_id": barrel_id,
+                "requested": quantity,
+                "available": available.get(barrel_id, 0)
+            }
+            for barrel_id, quantity in requested.items()
+            if available.get(barrel_id, 0) < quantity
+        ]
+        
+        # Le stock a pu être réapprovisionné entre-temps : signaler au moins la ligne en échec
+        if not shortages:
+            shortages.append({
+                "barrel_id": failed_barrel_id,
+                "requested": requested[failed_barrel_id],
+                "available": available.get(failed_barrel_id, 0)
+            })
+        
+        return shortages
 
     def get_order_by_id(self, order_id: str) -> Order:
         """Récupère une commande par son ID"""
@@ -73,13 +133,12 @@ class OrderService:
         
         return order
 
-    def get_orders(self, filters: Optional[Dict[str, Any]] = None, skip: int = 0, limit: int = 100) -> List[Order]:
-        """Récupère une liste de commandes avec filtres optionnels"""
-        query = self.db.query(Order).options(
-            joinedload(Order.items),
-            joinedload(Order.user)
-        )
-        
+    def get_order_version(self, order_id: str) -> Optional[datetime]:
+        """Date de dernière modification d'une commande (validateur HTTP), sans charger la ligne complète"""
+        return self.db.execute(select(Order.updated_at).where(Order.id == str(order_id))).scalar_one_or_none()
+
+    def _apply_order_filters(self, query, filters: Optional[Dict[str, Any]] = None):
+        """Applique les filtres optionnels à une requête de commandes"""
         if filters:
             if filters.get("status"):
                 query = query.filter(Order.status == filters["status"])
@@ -90,7 +149,44 @@ class OrderService:
             if filters.get("date_to"):
                 query = query.filter(Order.created_at <= filters["date_to"])
         
-        return query.order_by(Order.created_at.desc()).offset(skip).limit(limit).all()
+        return query
+
+    def get_orders(self, filters: Optional[Dict[str, Any]] = None, skip: int = 0, limit: int = 100) -> List[Order]:
+        """Récupère une liste de commandes avec filtres optionnels"""
+        query = self.db.query(Order).options(
+            joinedload(Order.items),
+            joinedload(Order.user)
+        )
+        query = self._apply_order_filters(query, filters)
+        
+        return query.order_by(Order.created_at.desc(), Order.id.desc()).offset(skip).limit(limit).all()
+
+    def get_orders_with_filters(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        user_id: Optional[str] = None,
+        status: Optional[str] = None
+    ) -> Tuple[List[Order], int]:
+        """Récupère une page de commandes et le nombre total correspondant aux filtres"""
+        filters = {"user_id": str(user_id) if user_id else None, "status": status}
+        orders = self.get_orders(filters=filters, skip=skip, limit=limit)
+        total = self._apply_order_filters(self.db.query(Order), filters).count()
+        return orders, total
+
+    def get_orders_by_cursor(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Tuple[List[Order], Optional[str]]:
+        """Récupère des commandes avec pagination par curseur sur (created_at, id)"""
+        query = self.db.query(Order).options(
+            joinedload(Order.items),
+            joinedload(Order.user)
+        )
+        query = self._apply_order_filters(query, filters)
+        return paginate_keyset(query, Order.created_at, Order.id, limit, cursor=cursor)
 
     def get_orders_no_filters(self, skip: int = 0, limit: int = 100) -> List[Order]:
         """Récupère une liste de commandes sans filtres"""
@@ -130,46 +226,53 @@ class OrderService:
         if not items_data:
             raise ValidationException("Une commande doit contenir au moins un article")
 
-        # Valider le stock
-        if not self._validate_stock_availability(items_data):
-            raise ValidationException("Stock insuffisant pour certains articles")
-
-        # Calculer les montants
-        amounts = self._calculate_order_amounts(items_data, discount_percentage, tax_percentage)
-
-        # Créer la commande
-        order = Order(
-            order_number=self._generate_order_number(),
-            user_id=user_id,
-            status=OrderStatus.PENDING,
-            payment_status=PaymentStatus.PENDING,
-            subtotal=amounts["subtotal"],
-            discount_percentage=discount_percentage,
-            discount_amount=amounts["discount_amount"],
-            tax_percentage=tax_percentage,
-            tax_amount=amounts["tax_amount"],
-            total=amounts["total"],
-            notes=notes
-        )
+        # Réserver le stock (annule la transaction et lève une exception si une ligne est en rupture)
+        self._reserve_stock(items_data)
 
-        self.db.add(order)
-        self.db.flush()
-
-        # Créer les articles de commande
-        for item_data in items_data:
-            order_item = OrderItem(
-                order_id=order.id,
-                barrel_id=item_data["barrel_id"],
-                quantity=item_data["quantity"],
-                unit_price=item_data["unit_price"],
-                total_price=item_data["quantity"] * item_data["unit_price"]
+        try:
+            # Calculer les montants
+            amounts = self._calculate_order_amounts(
+                items_data, discount_percentage=discount_percentage, tax_percentage=tax_percentage
             )
-            self.db.add(order_item)
 
-        # Mettre à jour le stock
-        self._update_stock_after_order(items_data)
+            # Créer la commande
+            order = Order(
+                order_number=self._generate_order_number(),
+                user_id=user_id,
+                status=OrderStatus.PENDING,
+                payment_status=PaymentStatus.PENDING,
+                subtotal=amounts["subtotal"],
+                discount_amount=amounts["discount_amount"],
+                tax_amount=amounts["tax_amount"],
+                total_amount=amounts["total"],
+                customer_notes=notes
+            )
+
+            self.db.add(order)
+            self.db.flush()
+
+            # Créer les articles de commande en un seul INSERT multi-lignes
+            self.db.execute(insert(OrderItem), [
+                {
+                    "order_id": order.id,
+                    "barrel_id": str(item_data["barrel_id"]),
+                    "quantity": item_data["quantity"],
+                    "unit_price": item_data["unit_price"],
+                    "total_price": item_data["quantity"] * item_data["unit_price"]
+                }
+                for item_data in items_data
+            ])
+
+            # Une seule transaction pour le stock réservé, la commande et ses articles
+            save(self.db)
+        except Exception:
+            self.db.rollback()
+            raise
+
+        # Stock modifié : le catalogue en cache ne doit plus le servir (une fois la transaction validée)
+        barrel_ids = [str(item["barrel_id"]) for item in items_data]
+        on_commit(self.db, lambda: get_catalog_cache().invalidate_barrels(barrel_ids))
 
-        self.db.commit()
         self.db.refresh(order)
         return order
 
@@ -184,11 +287,11 @@ class OrderService:
                     setattr(order, field, value)
         else:
             # Si c'est un Pydantic model
-            for field, value in update_data.dict(exclude_unset=True).items():
+            for field, value in update_data.model_dump(exclude_unset=True).items():
                 if hasattr(order, field):
                     setattr(order, field, value)
 
-        self.db.commit()
+        save(self.db)
         self.db.refresh(order)
         return order
 
@@ -222,7 +325,7 @@ class OrderService:
         if notes:
             order.notes = notes
 
-        self.db.commit()
+        save(self.db)
         self.db.refresh(order)
         return order
 
@@ -236,14 +339,21 @@ class OrderService:
                 f"Impossible d'annuler une commande avec le statut: {order.status}"
             )
 
-        # Remettre le stock
-        for item in order.items:
-            barrel = self.db.query(Barrel).filter(Barrel.id == item.barrel_id).first()
+        # Remettre le stock (fûts chargés en une seule requête)
+        items = list(order.items)
+        barrels = {
+            str(barrel.id): barrel
+            for barrel in self.db.query(Barrel).filter(Barrel.id.in_({item.barrel_id for item in items}))
+        } if items else {}
+        for item in items:
+            barrel = barrels.get(str(item.barrel_id))
             if barrel:
                 barrel.stock_quantity += item.quantity
+        restocked_ids = list(barrels)
 
         self.db.delete(order)
-        self.db.commit()
+        save(self.db)
+        on_commit(self.db, lambda: get_catalog_cache().invalidate_barrels(restocked_ids))
         return True
 
     def get_orders_by_user(self, user_id: str, skip: int = 0, limit: int = 100) -> List[Order]:
@@ -269,28 +379,14 @@ class OrderService:
         ).order_by(Order.created_at.desc()).offset(skip).limit(limit).all()
 
     def get_order_statistics(self) -> Dict[str, Any]:
-        """Récupère les statistiques des commandes"""
-        total_orders = self.db.query(Order).count()
-        total_revenue = self.db.query(func.sum(Order.total_amount)).scalar() or Decimal("0")
-        
-        # Compter par statut
-        status_counts = self.db.query(Order.status, func.count(Order.id)).group_by(Order.status).all()
-        orders_by_status = {status: count for status, count in status_counts}
-        
-        # Compter par mois (derniers 12 mois)
-        twelve_months_ago = datetime.now() - timedelta(days=365)
-        monthly_orders = self.db.query(
-            func.date_trunc('month', Order.created_at).label('month'),
-            func.count(Order.id).label('count')
-        ).filter(Order.created_at >= twelve_months_ago).group_by(
-            func.date_trunc('month', Order.created_at)
-        ).order_by('month').all()
-        
+        """Récupère les statistiques des commandes (cumuls quotidiens, sans parcours de la table)"""
+        summary = summarize_rollups(self.db, Order)
         return {
-            "total_orders": total_orders,
-            "total_revenue": total_revenue,
-            "orders_by_status": orders_by_status,
-            "monthly_orders": [{"month": str(m.month), "count": m.count} for m in monthly_orders]
+            "total_orders": summary["count"],
+            "total_revenue": summary["amount"],
+            "orders_by_status": summary["by_status"],
+            "orders_by_country": summary["by_country"],
+            "monthly_orders": summary["monthly"]
         }
 
     def search_orders(self, search_term: str, skip: int = 0, limit: int = 100) -> List[Order]:
@@ -318,3 +414,11 @@ class OrderService:
                 raise ValidationException("Le prix unitaire doit être supérieur à 0")
         
         return True
+
+
+class AsyncOrderService(AsyncServiceAdapter):
+    """Version AsyncSession de OrderService"""
+    
+    service_class = OrderService
+    # Relations sérialisées par les réponses (utilisateur, articles et leurs fûts)
+    eager_loads = ("user", "items.barrel")
@@ -3,20 +3,32 @@ Quote Service - Millésime Sans Frontières
 Gestion des devis et de la logique métier
 """
 
-from typing import List, Optional, Dict, Any, Union
+from typing import List, Optional, Dict, Any, Union, Tuple
 from decimal import Decimal
 from datetime import datetime, timedelta, date
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, func
+from sqlalchemy import and_, or_, insert, select, update
 
 from app.models.quote import Quote
 from app.models.quote_item import QuoteItem
 from app.models.barrel import Barrel
+from app.models.order import Order
+from app.models.order_item import OrderItem
 from app.models.user import User
 from app.schemas.quote import QuoteCreate, QuoteUpdate, QuoteStatusUpdate
 from app.core.exceptions import NotFoundException, ValidationException, BusinessLogicException
-from app.core.constants import QuoteStatus
+from app.core.constants import QuoteStatus, OrderStatus, PaymentStatus
+from app.core.cache import get_catalog_cache
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.monitoring import metrics_collector
+from app.core.pagination import paginate_keyset
+from app.core.rollups import record_transitions, summarize_rollups
+from app.core.numbering import quote_numbers
+from app.core.unit_of_work import save, on_commit
 from app.core.utils import generate_quote_number
+from app.services.async_adapter import AsyncServiceAdapter
+from app.services.order_service import OrderService
 
 
 class QuoteService:
@@ -25,11 +37,7 @@ class QuoteService:
 
     def _generate_quote_number(self) -> str:
         """Génère un numéro de devis unique"""
-        timestamp = datetime.now().strftime("%Y%m%d")
-        count = self.db.query(Quote).filter(
-            Quote.created_at >= datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        ).count()
-        return f"QUO-{timestamp}-{count + 1:04d}"
+        return quote_numbers.next_number(self.db)
 
     def _calculate_quote_amounts(self, items: List[Dict], shipping_cost: Decimal = Decimal("0"), discount_percentage: Decimal = Decimal("0"), tax_percentage: Decimal = Decimal("20")) -> Dict[str, Decimal]:
         """Calcule les montants du devis"""
@@ -73,13 +81,12 @@ class QuoteService:
         
         return quote
 
-    def get_quotes(self, filters: Optional[Dict[str, Any]] = None, skip: int = 0, limit: int = 100) -> List[Quote]:
-        """Récupère une liste de devis avec filtres optionnels"""
-        query = self.db.query(Quote).options(
-            joinedload(Quote.items),
-            joinedload(Quote.user)
-        )
-        
+    def get_quote_version(self, quote_id: str) -> Optional[datetime]:
+        """Date de dernière modification d'un devis (validateur HTTP), sans charger la ligne complète"""
+        return self.db.execute(select(Quote.updated_at).where(Quote.id == str(quote_id))).scalar_one_or_none()
+
+    def _apply_quote_filters(self, query, filters: Optional[Dict[str, Any]] = None):
+        """Applique les filtres optionnels à une requête de devis"""
         if filters:
             if filters.get("status"):
                 query = query.filter(Quote.status == filters["status"])
@@ -90,7 +97,44 @@ class QuoteService:
             if filters.get("date_to"):
                 query = query.filter(Quote.created_at <= filters["date_to"])
         
-        return query.order_by(Quote.created_at.desc()).offset(skip).limit(limit).all()
+        return query
+
+    def get_quotes(self, filters: Optional[Dict[str, Any]] = None, skip: int = 0, limit: int = 100) -> List[Quote]:
+        """Récupère une liste de devis avec filtres optionnels"""
+        query = self.db.query(Quote).options(
+            joinedload(Quote.items),
+            joinedload(Quote.user)
+        )
+        query = self._apply_quote_filters(query, filters)
+        
+        return query.order_by(Quote.created_at.desc(), Quote.id.desc()).offset(skip).limit(limit).all()
+
+    def get_quotes_with_filters(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        user_id: Optional[str] = None,
+        status: Optional[str] = None
+    ) -> Tuple[List[Quote], int]:
+        """Récupère une page de devis et le nombre total correspondant aux filtres"""
+        filters = {"user_id": str(user_id) if user_id else None, "status": status}
+        quotes = self.get_quotes(filters=filters, skip=skip, limit=limit)
+        total = self._apply_quote_filters(self.db.query(Quote), filters).count()
+        return quotes, total
+
+    def get_quotes_by_cursor(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Tuple[List[Quote], Optional[str]]:
+        """Récupère des devis avec pagination par curseur sur (created_at, id)"""
+        query = self.db.query(Quote).options(
+            joinedload(Quote.items),
+            joinedload(Quote.user)
+        )
+        query = self._apply_quote_filters(query, filters)
+        return paginate_keyset(query, Quote.created_at, Quote.id, limit, cursor=cursor)
 
     def get_quotes_no_filters(self, skip: int = 0, limit: int = 100) -> List[Quote]:
         """Récupère une liste de devis sans filtres"""
@@ -154,7 +198,9 @@ class QuoteService:
                 raise ValidationException("La date de validité doit être dans le futur")
 
         # Calculer les montants
-        amounts = self._calculate_quote_amounts(items_data, discount_percentage, tax_percentage)
+        amounts = self._calculate_quote_amounts(
+            items_data, discount_percentage=discount_percentage, tax_percentage=tax_percentage
+        )
 
         # Créer le devis
         quote = Quote(
@@ -166,7 +212,7 @@ class QuoteService:
             discount_amount=amounts["discount_amount"],
             tax_percentage=tax_percentage,
             tax_amount=amounts["tax_amount"],
-            total=amounts["total"],
+            total_amount=amounts["total"],
             customer_notes=customer_notes,
             valid_until=valid_until or (datetime.now() + timedelta(days=30))
         )
@@ -174,18 +220,19 @@ class QuoteService:
         self.db.add(quote)
         self.db.flush()
 
-        # Créer les articles de devis
-        for item_data in items_data:
-            quote_item = QuoteItem(
-                quote_id=quote.id,
-                barrel_id=item_data["barrel_id"],
-                quantity=item_data["quantity"],
-                unit_price=item_data["unit_price"],
-                total_price=item_data["quantity"] * item_data["unit_price"]
-            )
-            self.db.add(quote_item)
-
-        self.db.commit()
+        # Créer les articles de devis en un seul INSERT multi-lignes
+        self.db.execute(insert(QuoteItem), [
+            {
+                "quote_id": quote.id,
+                "barrel_id": str(item_data["barrel_id"]),
+                "quantity": item_data["quantity"],
+                "unit_price": item_data["unit_price"],
+                "total_price": item_data["quantity"] * item_data["unit_price"]
+            }
+            for item_data in items_data
+        ])
+
+        save(self.db)
         self.db.refresh(quote)
         return quote
 
@@ -206,7 +253,7 @@ class QuoteService:
                     setattr(quote, field, value)
         else:
             # Si c'est un Pydantic model
-            for field, value in update_data.dict(exclude_unset=True).items():
+            for field, value in update_data.model_dump(exclude_unset=True).items():
                 if hasattr(quote, field):
                     setattr(quote, field, value)
 
@@ -214,15 +261,15 @@ class QuoteService:
         if update_data.get("items"):
             amounts = self._calculate_quote_amounts(
                 update_data["items"], 
-                quote.discount_percentage, 
-                quote.tax_percentage
+                discount_percentage=quote.discount_percentage, 
+                tax_percentage=quote.tax_percentage
             )
             quote.subtotal = amounts["subtotal"]
             quote.discount_amount = amounts["discount_amount"]
             quote.tax_amount = amounts["tax_amount"]
-            quote.total = amounts["total"]
+            quote.total_amount = amounts["total"]
 
-        self.db.commit()
+        save(self.db)
         self.db.refresh(quote)
         return quote
 
@@ -257,7 +304,7 @@ class QuoteService:
         if customer_notes:
             quote.customer_notes = customer_notes
 
-        self.db.commit()
+        save(self.db)
         self.db.refresh(quote)
         return quote
 
@@ -272,22 +319,115 @@ class QuoteService:
         quote.status = QuoteStatus.SENT
         quote.sent_at = datetime.now()
 
-        self.db.commit()
+        save(self.db)
         self.db.refresh(quote)
         return quote
 
-    def convert_quote_to_order(self, quote_id: str) -> str:
-        """Convertit un devis en commande"""
+    def convert_quote_to_order(self, quote_id: str) -> Order:
+        """
+        Convertit un devis accepté en commande, dans une seule transaction
+        
+        Le nombre d'allers-retours ne dépend pas du nombre de lignes : devis et
+        articles (jointure), passage du devis à CONVERTED (UPDATE conditionnel
+        qui verrouille la ligne et écarte une conversion concurrente), fûts
+        verrouillés par une requête IN, stock réservé par un UPDATE
+        ensembliste, commande puis articles insérés en un INSERT multi-lignes.
+        Les prix négociés du devis font foi tant qu'il est valide ; les
+        montants de la commande sont recalculés à partir des lignes.
+        """
         quote = self.get_quote_by_id(quote_id)
         
-        # Seuls les devis acceptés peuvent être convertis
+        # Seuls les devis acceptés et encore valides peuvent être convertis
         if quote.status != QuoteStatus.ACCEPTED:
             raise BusinessLogicException(f"Impossible de convertir un devis avec le statut: {quote.status}")
+        if quote.valid_until.replace(tzinfo=None) < datetime.now():
+            raise BusinessLogicException("Impossible de convertir un devis expiré")
+        if not quote.items:
+            raise ValidationException("Un devis doit contenir au moins un article")
 
-        # Créer la commande à partir du devis
-        # Cette logique serait implémentée dans le service de commande
-        # Pour l'instant, retourner un message de succès
-        return "Devis converti en commande avec succès"
+        try:
+            claimed = self.db.execute(
+                update(Quote)
+                .where(and_(Quote.id == quote.id, Quote.status == QuoteStatus.ACCEPTED))
+                .values(status=QuoteStatus.CONVERTED)
+                .execution_options(synchronize_session="evaluate")
+            )
+            if claimed.rowcount != 1:
+                raise BusinessLogicException("Le devis a déjà été converti ou modifié")
+            record_transitions(self.db.connection(), Quote,
+                               [(quote.created_at, quote.shipping_address_id, quote.total_amount)],
+                               QuoteStatus.ACCEPTED, QuoteStatus.CONVERTED)
+
+            # Quantités par fût et verrouillage des fûts dans l'ordre des identifiants
+            requested: Dict[str, int] = {}
+            for item in quote.items:
+                requested[item.barrel_id] = requested.get(item.barrel_id, 0) + item.quantity
+            barrels = {
+                barrel.id: barrel
+                for barrel in self.db.query(Barrel).filter(Barrel.id.in_(list(requested)))
+                .order_by(Barrel.id).with_for_update()
+            }
+            unavailable = [barrel_id for barrel_id in requested
+                           if barrel_id not in barrels or barrels[barrel_id].is_available != "Y"]
+            if unavailable:
+                raise ValidationException(f"Fûts indisponibles: {', '.join(sorted(unavailable))}")
+
+            order_service = OrderService(self.db)
+            order_service._reserve_stock_set_based(requested)
+
+            lines = [
+                {"barrel_id": item.barrel_id, "quantity": item.quantity, "unit_price": item.unit_price}
+                for item in quote.items
+            ]
+            amounts = order_service._calculate_order_amounts(
+                lines,
+                shipping_cost=quote.shipping_cost or Decimal("0"),
+                discount_percentage=quote.discount_percentage,
+                tax_percentage=quote.tax_percentage
+            )
+            order = Order(
+                order_number=order_service._generate_order_number(),
+                user_id=quote.user_id,
+                status=OrderStatus.PENDING,
+                payment_status=PaymentStatus.PENDING,
+                shipping_address_id=quote.shipping_address_id,
+                billing_address_id=quote.billing_address_id,
+                subtotal=amounts["subtotal"],
+                shipping_cost=quote.shipping_cost or Decimal("0"),
+                discount_amount=amounts["discount_amount"],
+                tax_amount=amounts["tax_amount"],
+                total_amount=amounts["total"],
+                shipping_method=quote.shipping_method,
+                customer_notes=quote.customer_notes,
+                internal_notes=f"Créée à partir du devis {quote.quote_number}"
+            )
+            self.db.add(order)
+            self.db.flush()
+
+            self.db.execute(insert(OrderItem), [
+                {
+                    "order_id": order.id,
+                    "barrel_id": item.barrel_id,
+                    "quantity": item.quantity,
+                    "unit_price": item.unit_price,
+                    "total_price": item.quantity * item.unit_price,
+                    "discount_percentage": item.discount_percentage,
+                    "tax_percentage": item.tax_percentage,
+                    "notes": item.notes
+                }
+                for item in quote.items
+            ])
+
+            save(self.db)
+        except Exception:
+            self.db.rollback()
+            raise
+
+        # Stock modifié par l'UPDATE ensembliste : relu au prochain accès
+        for barrel in barrels.values():
+            self.db.expire(barrel, ["stock_quantity"])
+        on_commit(self.db, lambda: get_catalog_cache().invalidate_barrels(list(requested)))
+        return order
 
     def delete_quote(self, quote_id: str) -> bool:
         """Supprime un devis"""
@@ -300,32 +440,29 @@ class QuoteService:
             )
 
         self.db.delete(quote)
-        self.db.commit()
+        save(self.db)
         return True
 
     def get_quote_statistics(self) -> Dict[str, Any]:
-        """Récupère les statistiques des devis"""
-        total_quotes = self.db.query(Quote).count()
-        total_value = self.db.query(func.sum(Quote.total_amount)).scalar() or Decimal("0")
-        
-        # Compter par statut
-        status_counts = self.db.query(Quote.status, func.count(Quote.id)).group_by(Quote.status).all()
-        quotes_by_status = {status: count for status, count in status_counts}
-        
-        # Compter par mois (derniers 12 mois)
-        twelve_months_ago = datetime.now() - timedelta(days=365)
-        monthly_quotes = self.db.query(
-            func.date_trunc('month', Quote.created_at).label('month'),
-            func.count(Quote.id).label('count')
-        ).filter(Quote.created_at >= twelve_months_ago).group_by(
-            func.date_trunc('month', Quote.created_at)
-        ).order_by('month').all()
+        """
+        Récupère les statistiques des devis (cumuls quotidiens, sans parcours de la table)
         
+        Les cumuls rangent chaque devis au jour de sa création, sous son statut
+        actuel : `monthly_quotes` compte les devis créés chaque mois, et
+        `converted_quotes` / `conversion_rate` portent sur les devis créés
+        depuis convertis (taux par cohorte), pas sur les conversions survenues
+        à une date donnée.
+        """
+        summary = summarize_rollups(self.db, Quote)
+        converted = summary["by_status"].get(QuoteStatus.CONVERTED.value, 0)
         return {
-            "total_quotes": total_quotes,
-            "total_value": total_value,
-            "quotes_by_status": quotes_by_status,
-            "monthly_quotes": [{"month": str(m.month), "count": m.count} for m in monthly_quotes]
+            "total_quotes": summary["count"],
+            "total_value": summary["amount"],
+            "quotes_by_status": summary["by_status"],
+            "quotes_by_country": summary["by_country"],
+            "monthly_quotes": summary["monthly"],
+            "converted_quotes": converted,
+            "conversion_rate": round(converted / summary["count"], 4) if summary["count"] else 0.0
         }
 
     def search_quotes(self, search_term: str, skip: int = 0, limit: int = 100) -> List[Quote]:
@@ -360,20 +497,55 @@ class QuoteService:
             joinedload(Quote.items),
             joinedload(Quote.user)
         ).filter(
-            and_(Quote.valid_until < datetime.now(), Quote.status == QuoteStatus.SENT)
+            or_(
+                Quote.status == QuoteStatus.EXPIRED,
+                and_(Quote.valid_until < datetime.now(), Quote.status == QuoteStatus.SENT)
+            )
         ).order_by(Quote.valid_until.desc()).offset(skip).limit(limit).all()
 
-    def check_expired_quotes(self) -> List[Quote]:
-        """Vérifie et marque les devis expirés"""
-        expired_quotes = self.db.query(Quote).filter(
-            and_(Quote.valid_until < datetime.now(), Quote.status == QuoteStatus.SENT)
-        ).all()
+    def expire_quotes(self, batch_size: Optional[int] = None, now: Optional[datetime] = None) -> int:
+        """
+        Marque expirés les devis envoyés dont la validité est dépassée
         
-        for quote in expired_quotes:
-            quote.status = QuoteStatus.EXPIRED
+        Un UPDATE ensembliste par lot de `batch_size` devis, validé à chaque
+        lot pour ne pas verrouiller toute la table : aucun devis n'est chargé
+        dans la session. Retourne le nombre de devis expirés.
+        """
+        batch_size = batch_size or settings.QUOTE_EXPIRY_BATCH_SIZE
+        now = now or datetime.now()
+        due = and_(Quote.status == QuoteStatus.SENT, Quote.valid_until < now)
         
-        self.db.commit()
-        return expired_quotes
+        expired_count = 0
+        while True:
+            batch = {
+                quote_id: (created_at, address_id, total_amount)
+                for quote_id, created_at, address_id, total_amount in self.db.execute(
+                    select(Quote.id, Quote.created_at, Quote.shipping_address_id, Quote.total_amount)
+                    .where(due).limit(batch_size)
+                )
+            }
+            if not batch:
+                break
+            expired_ids = self.db.execute(
+                update(Quote)
+                .where(and_(Quote.id.in_(list(batch)), due))
+                .values(status=QuoteStatus.EXPIRED, is_expired="Y", expired_at=now)
+                .returning(Quote.id)
+                .execution_options(synchronize_session=False)
+            ).scalars().all()
+            record_transitions(self.db.connection(), Quote, [batch[quote_id] for quote_id in expired_ids],
+                               QuoteStatus.SENT, QuoteStatus.EXPIRED)
+            save(self.db)
+            expired_count += len(expired_ids)
+            if len(batch) < batch_size:
+                break
+        
+        metrics_collector.increment("quotes_expired_total", expired_count)
+        return expired_count
+
+    def check_expired_quotes(self) -> int:
+        """Vérifie et marque les devis expirés (retourne leur nombre)"""
+        return self.expire_quotes()
 
     def validate_quote_data(self, quote_data: Dict[str, Any]) -> bool:
         """Valide les données d'un devis"""
@@ -412,3 +584,20 @@ class QuoteService:
                 raise ValidationException("Prix unitaire invalide")
         
         return self._calculate_quote_amounts(items, discount_percentage, tax_percentage)
+
+
+class AsyncQuoteService(AsyncServiceAdapter):
+    """Version AsyncSession de QuoteService"""
+    
+    service_class = QuoteService
+    # Relations sérialisées par les réponses (utilisateur, articles et leurs fûts)
+    eager_loads = ("user", "items.barrel")
+
+
+def expire_quotes_job() -> int:
+    """Tâche planifiée d'expiration des devis (session dédiée)"""
+    db = SessionLocal()
+    try:
+        return QuoteService(db).expire_quotes()
+    finally:
+        db.close()
@@ -12,6 +12,9 @@ from app.models.user import User
 from app.models.address import Address
 from app.schemas.user import UserUpdate
 from app.core.exceptions import NotFoundException, ValidationException
+from app.core.auth import invalidate_principal
+from app.core.unit_of_work import save, on_commit
+from app.services.async_adapter import AsyncServiceAdapter
 
 
 class UserService:
@@ -67,7 +70,7 @@ class UserService:
             db_user.hashed_password = get_password_hash(user_data["password"])
         
         self.db.add(db_user)
-        self.db.commit()
+        save(self.db)
         self.db.refresh(db_user)
         return db_user
     
@@ -76,15 +79,16 @@ class UserService:
         user = self.get_user_by_id(user_id)
         
         # Mise à jour des champs fournis
-        if hasattr(user_data, 'dict'):
-            update_data = user_data.dict(exclude_unset=True)
+        if hasattr(user_data, 'model_dump'):
+            update_data = user_data.model_dump(exclude_unset=True)
         else:
             update_data = user_data
         
         for field, value in update_data.items():
             setattr(user, field, value)
         
-        self.db.commit()
+        save(self.db)
+        on_commit(self.db, lambda: invalidate_principal(user_id))
         self.db.refresh(user)
         return user
     
@@ -93,7 +97,8 @@ class UserService:
         user = self.get_user_by_id(user_id)
         
         user.is_active = False
-        self.db.commit()
+        save(self.db)
+        on_commit(self.db, lambda: invalidate_principal(user_id))
         return True
     
     def activate_user(self, user_id: UUID) -> User:
@@ -101,7 +106,8 @@ class UserService:
         user = self.get_user_by_id(user_id)
         
         user.is_active = True
-        self.db.commit()
+        save(self.db)
+        on_commit(self.db, lambda: invalidate_principal(user_id))
         return user
     
     def change_user_role(self, user_id: UUID, new_role: str) -> User:
@@ -114,7 +120,8 @@ class UserService:
             raise ValidationException(f"Rôle invalide: {new_role}")
         
         user.role = new_role
-        self.db.commit()
+        save(self.db)
+        on_commit(self.db, lambda: invalidate_principal(user_id))
         return user
     
     def get_users_by_role(self, role: str) -> List[User]:
@@ -174,3 +181,9 @@ class UserService:
         """Récupère les adresses d'un utilisateur"""
         user = self.get_user_by_id(user_id)
         return self.db.query(Address).filter(Address.user_id == user_id).all()
+
+
+class AsyncUserService(AsyncServiceAdapter):
+    """Version AsyncSession de UserService"""
+    
+    service_class = UserService
@@ -5,20 +5,23 @@ Fixtures et configuration communes pour tous les tests
 
 import pytest
 import asyncio
-from typing import Generator, Dict, Any
+from typing import Generator, Dict, Any, List
 from unittest.mock import Mock, patch
 from decimal import Decimal
 from datetime import datetime, date, timedelta
 import uuid
 
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import StaticPool
 
 from app.main import app
-from app.core.database import Base, get_db
+from app.core.database import Base, get_db, get_async_db
 from app.core.config import Settings
+from app.core.cache import get_catalog_cache
+from app.core.numbering import reset_number_allocators
+from app.core.idempotency import get_idempotency_store
 from app.models.user import User
 from app.models.address import Address
 from app.models.barrel import Barrel
@@ -48,6 +51,28 @@ def event_loop():
     loop.close()
 
 
+class SyncSessionAsyncAdapter:
+    """Expose la session de test synchrone avec l'interface run_sync d'une AsyncSession"""
+    
+    def __init__(self, session: Session):
+        self.session = session
+    
+    async def run_sync(self, fn, *args, **kwargs):
+        return fn(self.session, *args, **kwargs)
+    
+    async def close(self):
+        self.session.close()
+
+
+@pytest.fixture(autouse=True)
+def clear_catalog_cache() -> Generator[None, None, None]:
+    """Vide le cache catalogue, les clés d'idempotence et les blocs de numéros : chaque test dispose de sa propre base"""
+    get_catalog_cache().clear()
+    get_idempotency_store().backend.clear()
+    reset_number_allocators()
+    yield
+
+
 @pytest.fixture(scope="function")
 def db_session() -> Generator[Session, None, None]:
     """Crée une session de base de données de test"""
@@ -65,6 +90,19 @@ def db_session() -> Generator[Session, None, None]:
         Base.metadata.drop_all(bind=engine)
 
 
+@pytest.fixture
+def captured_statements() -> Generator[List[str], None, None]:
+    """Requêtes SQL émises sur la base de test (vider la liste avant la phase Act)"""
+    statements: List[str] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", capture)
+    yield statements
+    event.remove(engine, "before_cursor_execute", capture)
+
+
 @pytest.fixture(scope="function")
 def client(db_session: Session) -> Generator[TestClient, None, None]:
     """Crée un client de test FastAPI"""
@@ -74,7 +112,11 @@ def client(db_session: Session) -> Generator[TestClient, None, None]:
         finally:
             pass
     
+    async def override_get_async_db():
+        yield SyncSessionAsyncAdapter(db_session)
+    
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     yield TestClient(app)
     app.dependency_overrides.clear()
 
@@ -10,15 +10,30 @@ from typing import List, Dict, Any
 import statistics
 import json
 
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
 from fastapi.testclient import TestClient
-from sqlalchemy.orm import Session
+from fastapi.utils import create_response_field
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session, sessionmaker
+from decimal import Decimal
 
 from app.main import app
-from app.core.database import get_db
+from app.core.database import get_db, Base
+from app.core.constants import WoodType, PreviousContent, BarrelCondition
+from app.core.exceptions import InsufficientStockException
+from app.core.numbering import order_numbers
+from app.core.responses import model_response
+from app.core.unit_of_work import begin_unit_of_work, commit_unit_of_work, end_unit_of_work
+from app.services.order_service import OrderService
+from app.services.barrel_service import BarrelService
 from app.models.user import User
 from app.models.barrel import Barrel
 from app.models.order import Order
+from app.models.order_item import OrderItem
 from app.models.quote import Quote
+from app.schemas.barrel import BarrelListResponse
+from app.schemas.base import PaginatedResponse
 
 
 class TestAPIPerformance:
@@ -609,3 +624,406 @@ class TestPerformanceMonitoring:
         
         # Assert
         assert performance_ratio < regression_threshold, f"Performance regression detected: ratio {performance_ratio:.2f} exceeds threshold {regression_threshold}"
+
+
+class TestStockReservationConcurrency:
+    """Tests de concurrence de la réservation de stock"""
+
+    def test_no_oversell_with_200_concurrent_checkouts(self, tmp_path):
+        """Test d'absence de survente avec 200 validations de panier concurrentes"""
+        # Arrange
+        # Base SQLite sur fichier : chaque thread dispose de sa propre connexion
+        engine = create_engine(
+            f"sqlite:///{tmp_path / 'checkout.db'}",
+            connect_args={"check_same_thread": False, "timeout": 30}
+        )
+        Base.metadata.create_all(bind=engine)
+        CheckoutSession = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        
+        num_checkouts = 200
+        scarce_stock = 50
+        plentiful_stock = 80
+        
+        session = CheckoutSession()
+        scarce = Barrel(
+            name="Fût rare", wood_type=WoodType.OAK, previous_content=PreviousContent.RED_WINE,
+            condition=BarrelCondition.EXCELLENT, volume_liters=Decimal("225.00"),
+            price=Decimal("1500.00"), stock_quantity=scarce_stock
+        )
+        plentiful = Barrel(
+            name="Fût courant", wood_type=WoodType.OAK, previous_content=PreviousContent.WHITE_WINE,
+            condition=BarrelCondition.GOOD, volume_liters=Decimal("225.00"),
+            price=Decimal("900.00"), stock_quantity=plentiful_stock
+        )
+        session.add_all([scarce, plentiful])
+        session.commit()
+        scarce_id, plentiful_id = scarce.id, plentiful.id
+        session.close()
+        
+        def checkout(_: int) -> bool:
+            checkout_session = CheckoutSession()
+            try:
+                OrderService(checkout_session)._reserve_stock([
+                    {"barrel_id": plentiful_id, "quantity": 1},
+                    {"barrel_id": scarce_id, "quantity": 1}
+                ])
+                checkout_session.commit()
+                return True
+            except InsufficientStockException:
+                return False
+            finally:
+                checkout_session.close()
+        
+        # Act
+        start_time = time.time()
+        with ThreadPoolExecutor(max_workers=50) as executor:
+            results = list(executor.map(checkout, range(num_checkouts)))
+        total_time = time.time() - start_time
+        
+        # Assert
+        session = CheckoutSession()
+        final_scarce = session.get(Barrel, scarce_id).stock_quantity
+        final_plentiful = session.get(Barrel, plentiful_id).stock_quantity
+        session.close()
+        engine.dispose()
+        
+        successful = sum(results)
+        assert successful == scarce_stock, f"{successful} checkouts succeeded for {scarce_stock} barrels in stock"
+        assert final_scarce == 0
+        # Les lignes des commandes refusées sont annulées avec le reste de la transaction
+        assert final_plentiful == plentiful_stock - scarce_stock
+        assert total_time < 30, f"{num_checkouts} concurrent checkouts took {total_time:.1f}s"
+
+
+class TestRateLimiterPerformance:
+    """Tests de performance de la limitation de débit"""
+
+    def test_constant_cost_per_request(self):
+        """Test de coût constant par requête, quel que soit l'historique de la clé"""
+        # Arrange
+        from app.core.rate_limiting import RateLimiter
+        limiter = RateLimiter(limits={"default": {"requests": 1_000_000, "window": 3600}})
+        num_requests = 50_000
+
+        # Act
+        start_time = time.perf_counter()
+        for _ in range(num_requests):
+            limiter.hit("client", "default")
+        hot_key_time = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        for index in range(num_requests):
+            limiter.hit(f"client-{index}", "default")
+        many_keys_time = time.perf_counter() - start_time
+
+        # Assert
+        assert hot_key_time < 1.0, f"{num_requests} requests on one key took {hot_key_time:.2f}s"
+        assert many_keys_time < 1.0, f"{num_requests} distinct keys took {many_keys_time:.2f}s"
+
+
+@pytest.mark.slow
+class TestBarrelSearchPerformance:
+    """Benchmark de la recherche plein texte face à ILIKE"""
+
+    def test_full_text_search_vs_ilike_on_100k_barrels(self, tmp_path):
+        """Test de comparaison FTS5 / ILIKE sur 100 000 fûts"""
+        # Arrange
+        engine = create_engine(f"sqlite:///{tmp_path / 'catalog.db'}")
+        Base.metadata.create_all(bind=engine)
+        
+        num_barrels = 100_000
+        woods = list(WoodType)
+        contents = list(PreviousContent)
+        regions = ["Bordeaux", "Bourgogne", "Cognac", "Jerez", "Kentucky", "Tokaj", "Rioja", "Porto"]
+        cooperages = ["Tonnellerie Sarrazin", "Maison Vicard", "Taransaud", "Seguin Moreau", "Radoux"]
+        rows = [
+            {
+                "id": f"barrel-{index:06d}",
+                "name": f"Fût {regions[index % 8]} n°{index}",
+                "description": f"{cooperages[index % 5]}, chauffe moyenne, lot {index % 997}",
+                "wood_type": woods[index % len(woods)].name,
+                "previous_content": contents[index % len(contents)].name,
+                "origin_country": "France" if index % 3 else "Espagne",
+                "volume_liters": Decimal("225.00"),
+                "price": Decimal("800.00") + index % 500,
+                "stock_quantity": 1 + index % 10,
+            }
+            for index in range(num_barrels)
+        ]
+        with engine.begin() as connection:
+            for start in range(0, num_barrels, 10_000):
+                connection.execute(insert(Barrel), rows[start:start + 10_000])
+        
+        session = sessionmaker(bind=engine)()
+        service = BarrelService(session)
+        terms = ["Taransaud", "tokaj", "seguin moreau", "n°99999", "châtaignier"]
+        
+        def run(search) -> float:
+            start_time = time.perf_counter()
+            for _ in range(5):
+                for term in terms:
+                    search(term)
+            return time.perf_counter() - start_time
+        
+        # Act
+        ilike_time = run(lambda term: service._search_barrels_ilike(term, limit=20))
+        fts_time = run(lambda term: service.search_barrels(term, limit=20))
+        fts_results = service.search_barrels("chataignier tokaj", limit=20)
+        
+        session.close()
+        engine.dispose()
+        
+        # Assert
+        print(f"ILIKE: {ilike_time:.3f}s, FTS5: {fts_time:.3f}s ({ilike_time / fts_time:.1f}x)")
+        assert fts_results
+        assert all("Tokaj" in barrel.name for barrel in fts_results)
+        assert fts_time < ilike_time
+
+
+@pytest.mark.slow
+class TestAsyncDatabaseConcurrency:
+    """Tests de montée en charge du chemin asynchrone (AsyncSession)"""
+
+    DB_LATENCY = 0.05  # latence simulée par requête SQL (aller-retour réseau et exécution côté serveur)
+
+    def _throughput(self, session_factory, concurrency: int, num_requests: int) -> float:
+        """Débit (requêtes/s) de GET /v1/barrels/ avec `concurrency` requêtes simultanées"""
+        import httpx
+        from app.core.database import get_async_db
+
+        async def override_get_async_db():
+            session = session_factory()
+            try:
+                yield session
+            finally:
+                await session.close()
+
+        async def run() -> float:
+            semaphore = asyncio.Semaphore(concurrency)
+            async with httpx.AsyncClient(app=app, base_url="http://test") as async_client:
+                async def fetch():
+                    async with semaphore:
+                        response = await async_client.get("/v1/barrels/", params={"cursor": "", "size": 5})
+                        assert response.status_code == 200
+                start_time = time.perf_counter()
+                await asyncio.gather(*(fetch() for _ in range(num_requests)))
+                return num_requests / (time.perf_counter() - start_time)
+
+        app.dependency_overrides[get_async_db] = override_get_async_db
+        try:
+            return asyncio.new_event_loop().run_until_complete(run())
+        finally:
+            app.dependency_overrides.pop(get_async_db, None)
+
+    def test_throughput_scales_with_concurrency(self, tmp_path):
+        """Test de montée en charge : le débit croît avec la concurrence au lieu de plafonner"""
+        # Arrange
+        from sqlalchemy import event
+        from sqlalchemy.pool import AsyncAdaptedQueuePool
+        from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+        from tests.conftest import SyncSessionAsyncAdapter
+
+        db_path = tmp_path / "load.db"
+        latency = self.DB_LATENCY
+
+        def slow_statement(_statement: str) -> None:
+            time.sleep(latency)
+
+        # Chemin asynchrone : la latence s'écoule dans le thread du pilote aiosqlite
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}", poolclass=AsyncAdaptedQueuePool)
+
+        @event.listens_for(async_engine.sync_engine, "connect")
+        def add_async_latency(dbapi_connection, _record):
+            dbapi_connection.await_(dbapi_connection._connection.set_trace_callback(slow_statement))
+
+        # Chemin synchrone (avant AsyncSession) : la latence bloque la boucle d'événements
+        sync_engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+
+        @event.listens_for(sync_engine, "connect")
+        def add_sync_latency(dbapi_connection, _record):
+            dbapi_connection.set_trace_callback(slow_statement)
+
+        Base.metadata.create_all(bind=sync_engine)
+
+        SyncSession = sessionmaker(autocommit=False, autoflush=False, bind=sync_engine)
+        session = SyncSession()
+        session.add_all([
+            Barrel(
+                name=f"Fût {i}", wood_type=WoodType.OAK, previous_content=PreviousContent.RED_WINE,
+                condition=BarrelCondition.GOOD, volume_liters=Decimal("225.00"),
+                price=Decimal("1000.00"), stock_quantity=1
+            )
+            for i in range(20)
+        ])
+        session.commit()
+        session.close()
+
+        AsyncSessionFactory = async_sessionmaker(async_engine, expire_on_commit=False, class_=AsyncSession)
+        num_requests = 24
+
+        # Act
+        async_serial = self._throughput(AsyncSessionFactory, 1, num_requests)
+        async_concurrent = self._throughput(AsyncSessionFactory, 8, num_requests)
+        blocking_serial = self._throughput(lambda: SyncSessionAsyncAdapter(SyncSession()), 1, num_requests)
+        blocking_concurrent = self._throughput(lambda: SyncSessionAsyncAdapter(SyncSession()), 8, num_requests)
+
+        asyncio.new_event_loop().run_until_complete(async_engine.dispose())
+        sync_engine.dispose()
+
+        # Assert
+        print(f"async: {async_serial:.1f} -> {async_concurrent:.1f} req/s, "
+              f"blocking: {blocking_serial:.1f} -> {blocking_concurrent:.1f} req/s")
+        assert async_concurrent > 2.5 * async_serial
+        assert async_concurrent > 2 * blocking_concurrent
+        assert blocking_concurrent < 1.5 * blocking_serial
+
+
+@pytest.mark.slow
+class TestOrderNumberConcurrency:
+    """Tests de numérotation des commandes sous création concurrente"""
+
+    def test_concurrent_orders_have_unique_numbers(self, tmp_path):
+        """Test de création parallèle de milliers de commandes sans collision de numéro"""
+        # Arrange
+        engine = create_engine(f"sqlite:///{tmp_path / 'orders.db'}", connect_args={"timeout": 60})
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(bind=engine)
+        num_workers, orders_per_worker = 8, 250
+
+        def create_orders(worker: int) -> None:
+            session = session_factory()
+            for _ in range(orders_per_worker):
+                session.add(Order(order_number=order_numbers.next_number(session), user_id=f"user-{worker}",
+                                  subtotal=Decimal("10.00"), total_amount=Decimal("10.00")))
+                session.commit()
+            session.close()
+
+        # Act
+        start_time = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            list(executor.map(create_orders, range(num_workers)))
+        elapsed = time.perf_counter() - start_time
+
+        session = session_factory()
+        numbers = [number for (number,) in session.query(Order.order_number).all()]
+        session.close()
+        engine.dispose()
+
+        # Assert
+        total = num_workers * orders_per_worker
+        print(f"{total} commandes concurrentes en {elapsed:.2f}s")
+        assert len(numbers) == total
+        assert len(set(numbers)) == total
+        assert max(int(number.rsplit("-", 1)[1]) for number in numbers) == total
+
+
+@pytest.mark.slow
+class TestBulkOrderCreationPerformance:
+    """Benchmark de la création de commandes B2B de 50 lignes"""
+
+    def test_single_commit_faster_than_commit_per_line(self, tmp_path):
+        """Test de la création groupée (un INSERT, un commit) face à l'ajout et au commit ligne par ligne"""
+        # Arrange
+        engine = create_engine(f"sqlite:///{tmp_path / 'b2b.db'}")
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(bind=engine)
+        num_orders, num_lines = 20, 50
+
+        session = session_factory()
+        barrels = [
+            Barrel(name=f"Fût {i}", wood_type=WoodType.OAK, previous_content=PreviousContent.RED_WINE,
+                   condition=BarrelCondition.GOOD, volume_liters=Decimal("225.00"),
+                   price=Decimal("900.00"), stock_quantity=10 * num_orders)
+            for i in range(num_lines)
+        ]
+        session.add_all(barrels)
+        session.commit()
+        items = [{"barrel_id": barrel.id, "quantity": 1, "unit_price": Decimal("900.00")} for barrel in barrels]
+        session.close()
+
+        def legacy_order(session: Session) -> None:
+            # Ancien chemin : un commit par mise à jour de stock, puis un ajout par ligne
+            for item in items:
+                barrel = session.get(Barrel, item["barrel_id"])
+                barrel.stock_quantity -= item["quantity"]
+                session.commit()
+            order = Order(order_number=order_numbers.next_number(session), user_id="b2b",
+                          subtotal=Decimal("45000.00"), total_amount=Decimal("54000.00"))
+            session.add(order)
+            session.flush()
+            for item in items:
+                session.add(OrderItem(order_id=order.id, barrel_id=item["barrel_id"], quantity=item["quantity"],
+                                      unit_price=item["unit_price"], total_price=item["unit_price"]))
+            session.commit()
+
+        def bulk_order(session: Session) -> None:
+            begin_unit_of_work(session)
+            OrderService(session).create_order({"items": items}, user_id="b2b")
+            asyncio.run(commit_unit_of_work(session))
+            end_unit_of_work(session)
+
+        def timed(create) -> float:
+            start_time = time.perf_counter()
+            for _ in range(num_orders):
+                session = session_factory()
+                create(session)
+                session.close()
+            return time.perf_counter() - start_time
+
+        # Act
+        legacy_time = timed(legacy_order)
+        bulk_time = timed(bulk_order)
+
+        session = session_factory()
+        line_count = session.query(OrderItem).count()
+        session.close()
+        engine.dispose()
+
+        # Assert
+        print(f"{num_orders} commandes de {num_lines} lignes : "
+              f"{legacy_time * 1000 / num_orders:.1f} ms -> {bulk_time * 1000 / num_orders:.1f} ms par commande")
+        assert line_count == 2 * num_orders * num_lines
+        assert bulk_time < legacy_time
+
+
+@pytest.mark.slow
+class TestCatalogSerializationPerformance:
+    """Benchmark de la sérialisation d'une page de 100 fûts du catalogue"""
+
+    def test_pydantic_core_faster_than_default_pipeline(self):
+        """Test du débit de model_response face au chemin FastAPI (dictionnaire, revalidation, json)"""
+        # Arrange
+        page_model = PaginatedResponse[BarrelListResponse]
+        barrels = [
+            Barrel(id=f"00000000-0000-4000-8000-{index:012d}", name=f"Fût n°{index}", origin_country="France",
+                   wood_type=WoodType.OAK, previous_content=PreviousContent.RED_WINE, condition=BarrelCondition.GOOD,
+                   volume_liters=Decimal("225.00"), price=Decimal("900.00"), stock_quantity=index % 5)
+            for index in range(100)
+        ]
+        field = create_response_field(name="Response_get_barrels", type_=page_model, mode="serialization")
+        num_pages = 300
+
+        def build() -> PaginatedResponse:
+            return page_model(items=barrels, total=1000, page=1, size=100, pages=10)
+
+        def default_pipeline() -> bytes:
+            content = asyncio.run(serialize_response(field=field, response_content=build(), is_coroutine=True))
+            return JSONResponse(content).body
+
+        def pydantic_core() -> bytes:
+            return model_response(build()).body
+
+        def throughput(serialize) -> float:
+            start_time = time.perf_counter()
+            for _ in range(num_pages):
+                serialize()
+            return num_pages / (time.perf_counter() - start_time)
+
+        # Act
+        default_rate = throughput(default_pipeline)
+        core_rate = throughput(pydantic_core)
+
+        # Assert
+        print(f"Page de 100 fûts : {default_rate:.0f} -> {core_rate:.0f} pages/s ({core_rate / default_rate:.1f}x)")
+        assert json.loads(pydantic_core()) == json.loads(default_pipeline())
+        assert core_rate > default_rate
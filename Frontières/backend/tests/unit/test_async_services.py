@@ -0,0 +1,115 @@
+"""
+Tests unitaires pour les services asynchrones - Millésime Sans Frontières
+"""
+
+import pytest
+import pytest_asyncio
+from decimal import Decimal
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.constants import WoodType, PreviousContent, BarrelCondition, OrderStatus, PaymentStatus
+from app.core.database import Base, get_async_database_url
+from app.core.exceptions import NotFoundException
+from app.models.barrel import Barrel
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.models.user import User
+from app.services.barrel_service import AsyncBarrelService
+from app.services.order_service import AsyncOrderService
+
+
+@pytest_asyncio.fixture
+async def async_session(tmp_path):
+    """Session asynchrone sur une base SQLite (aiosqlite)"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'async.db'}")
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    async with session_factory() as session:
+        yield session
+    await engine.dispose()
+
+
+class TestAsyncDatabaseUrl:
+    """Tests pour la conversion des URL vers les pilotes asynchrones"""
+
+    def test_postgres_url_uses_asyncpg(self):
+        """Test de conversion PostgreSQL -> asyncpg"""
+        assert get_async_database_url("postgresql://u:p@db:5432/millesime") == "postgresql+asyncpg://u:p@db:5432/millesime"
+
+    def test_sqlite_url_uses_aiosqlite(self):
+        """Test de conversion SQLite -> aiosqlite"""
+        assert get_async_database_url("sqlite:///:memory:") == "sqlite+aiosqlite:///:memory:"
+
+
+class TestAsyncServices:
+    """Tests des services sur AsyncSession"""
+
+    @pytest.mark.asyncio
+    async def test_barrel_crud(self, async_session: AsyncSession):
+        """Test de création et lecture d'un fût via le service asynchrone"""
+        # Arrange
+        service = AsyncBarrelService(async_session)
+
+        # Act
+        barrel = await service.create_barrel({
+            "name": "Fût de chêne",
+            "wood_type": WoodType.OAK,
+            "previous_content": PreviousContent.RED_WINE,
+            "condition": BarrelCondition.GOOD,
+            "volume_liters": Decimal("225.00"),
+            "price": Decimal("1500.00"),
+            "stock_quantity": 2
+        })
+        barrels, total = await service.get_barrels_with_filters()
+
+        # Assert
+        assert total == 1
+        assert barrels[0].id == barrel.id
+        assert barrels[0].name == "Fût de chêne"
+
+    @pytest.mark.asyncio
+    async def test_exceptions_propagate(self, async_session: AsyncSession):
+        """Test de propagation des exceptions métier"""
+        # Act & Assert
+        with pytest.raises(NotFoundException):
+            await AsyncBarrelService(async_session).get_barrel_by_id("inconnu")
+
+    @pytest.mark.asyncio
+    async def test_order_relations_loaded_for_response(self, async_session: AsyncSession):
+        """Test du chargement des relations avant la sérialisation hors session"""
+        # Arrange
+        user = User(email="client@example.com", password_hash="x", first_name="Jean", last_name="Dupont")
+        barrel = Barrel(
+            name="Fût de chêne", wood_type=WoodType.OAK, previous_content=PreviousContent.RED_WINE,
+            condition=BarrelCondition.GOOD, volume_liters=Decimal("225.00"),
+            price=Decimal("1500.00"), stock_quantity=2
+        )
+        async_session.add_all([user, barrel])
+        await async_session.flush()
+        order = Order(
+            order_number="CMD-TEST-0001", user_id=user.id, status=OrderStatus.PENDING,
+            payment_status=PaymentStatus.PENDING, subtotal=Decimal("1500.00"),
+            total_amount=Decimal("1500.00")
+        )
+        async_session.add(order)
+        await async_session.flush()
+        async_session.add(OrderItem(
+            order_id=order.id, barrel_id=barrel.id, quantity=1,
+            unit_price=Decimal("1500.00"), total_price=Decimal("1500.00")
+        ))
+        await async_session.commit()
+        async_session.expunge_all()
+
+        # Act
+        loaded = await AsyncOrderService(async_session).get_order_by_id(order.id)
+
+        # Assert : accès aux relations sans nouvelle requête (pas d'E/S implicite)
+        assert loaded.user.email == "client@example.com"
+        assert loaded.items[0].barrel.name == "Fût de chêne"
+
+    def test_private_methods_not_exposed(self):
+        """Test de non-exposition des méthodes internes"""
+        # Act & Assert
+        with pytest.raises(AttributeError):
+            AsyncBarrelService(None)._load_barrel
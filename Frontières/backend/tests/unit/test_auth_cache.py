@@ -0,0 +1,140 @@
+"""
+Tests unitaires pour les caches d'authentification - Millésime Sans Frontières
+"""
+
+import pytest
+import time
+from datetime import timedelta
+from unittest.mock import patch
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from app.core import auth
+from app.core.auth import create_access_token, get_current_active_user, verify_token
+from app.core.exceptions import AuthenticationException
+from app.core.query_instrumentation import (
+    get_request_query_stats,
+    install_query_instrumentation,
+    stop_tracking,
+    track_queries,
+    uninstall_query_instrumentation
+)
+from app.models.user import User
+from app.services.auth_service import AuthService
+from app.services.user_service import UserService
+
+
+@pytest.fixture(autouse=True)
+def clear_auth_caches():
+    """Caches vides au début de chaque test"""
+    auth._token_cache.clear()
+    auth._principal_cache.clear()
+    yield
+    auth._token_cache.clear()
+    auth._principal_cache.clear()
+
+
+def _auth_queries(db_session: Session, token: str) -> int:
+    """Nombre de requêtes SQL d'une authentification"""
+    engine = db_session.get_bind()
+    install_query_instrumentation(engine)
+    try:
+        tracking = track_queries("auth")
+        get_current_active_user(token, db_session)
+        count = get_request_query_stats().count
+        stop_tracking(tracking)
+    finally:
+        uninstall_query_instrumentation(engine)
+    return count
+
+
+class TestTokenCache:
+    """Tests du cache des jetons vérifiés"""
+
+    def test_signature_verified_once_per_token(self):
+        """Test d'une seule vérification HMAC pour des appels répétés"""
+        # Arrange
+        token = create_access_token({"sub": "user-1"})
+
+        # Act
+        with patch("app.core.auth.jwt.decode", wraps=auth.jwt.decode) as mock_decode:
+            payloads = [verify_token(token) for _ in range(5)]
+
+        # Assert
+        assert mock_decode.call_count == 1
+        assert all(payload["sub"] == "user-1" for payload in payloads)
+
+    def test_entry_does_not_outlive_token(self):
+        """Test d'une durée de cache bornée par l'expiration du jeton"""
+        # Arrange
+        token = create_access_token({"sub": "user-1"}, expires_delta=timedelta(seconds=30))
+
+        # Act
+        verify_token(token)
+        expires_at, _ = auth._token_cache._entries[token]
+
+        # Assert
+        assert expires_at - time.monotonic() <= 30
+
+    def test_expired_token_rejected_and_not_cached(self):
+        """Test du rejet d'un jeton expiré"""
+        # Arrange
+        token = create_access_token({"sub": "user-1"}, expires_delta=timedelta(seconds=-1))
+
+        # Act / Assert
+        with pytest.raises(ValueError):
+            verify_token(token)
+        assert len(auth._token_cache) == 0
+
+
+class TestPrincipalCache:
+    """Tests du cache des droits utilisateur"""
+
+    def test_no_query_once_principal_cached(self, db_session: Session, test_user: User):
+        """Test d'une authentification sans requête SQL une fois les droits en cache"""
+        # Arrange
+        token = create_access_token({"sub": test_user.id})
+
+        # Act
+        first, second = _auth_queries(db_session, token), _auth_queries(db_session, token)
+
+        # Assert
+        assert first == 1
+        assert second == 0
+
+    def test_deactivation_invalidates_principal(self, db_session: Session, test_user: User):
+        """Test du refus immédiat d'un utilisateur désactivé"""
+        # Arrange
+        token = create_access_token({"sub": test_user.id})
+        assert get_current_active_user(token, db_session)["role"] == test_user.role
+
+        # Act
+        UserService(db_session).delete_user(test_user.id)
+
+        # Assert
+        with pytest.raises(HTTPException) as exc_info:
+            get_current_active_user(token, db_session)
+        assert exc_info.value.status_code == 400
+
+    def test_role_change_invalidates_principal(self, db_session: Session, test_user: User):
+        """Test de la prise en compte immédiate d'un changement de rôle"""
+        # Arrange
+        token = create_access_token({"sub": test_user.id})
+        get_current_active_user(token, db_session)
+
+        # Act
+        UserService(db_session).change_user_role(test_user.id, "admin")
+
+        # Assert
+        assert get_current_active_user(token, db_session)["role"] == "admin"
+
+    def test_current_user_rejects_inactive_account(self, db_session: Session, test_user: User):
+        """Test du refus de /me pour un compte désactivé"""
+        # Arrange
+        token = create_access_token({"sub": test_user.id})
+        test_user.is_active = False
+        db_session.commit()
+
+        # Act / Assert
+        with pytest.raises(AuthenticationException):
+            AuthService(db_session).get_current_user(token)
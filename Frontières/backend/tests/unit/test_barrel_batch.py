@@ -0,0 +1,116 @@
+"""
+Tests unitaires pour la lecture groupée des fûts - Millésime Sans Frontières
+"""
+
+import uuid
+import pytest
+from typing import List
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.cache import CatalogCache, TTLCache
+from app.core.config import settings
+from app.core.exceptions import ValidationException
+from app.models.barrel import Barrel
+from app.services.barrel_service import BarrelService
+
+
+@pytest.fixture
+def other_barrel(db_session: Session, sample_barrel_data) -> Barrel:
+    """Second fût de test"""
+    barrel = Barrel(**{**sample_barrel_data, "name": "Fût Acacia", "price": "990.00"})
+    db_session.add(barrel)
+    db_session.commit()
+    return barrel
+
+
+class TestGetBarrelsByIds:
+    """Tests de BarrelService.get_barrels_by_ids"""
+
+    def test_request_order_and_missing_ids(self, db_session: Session, test_barrel: Barrel, other_barrel: Barrel):
+        """Test de l'ordre de la requête et des fûts inexistants (None)"""
+        # Arrange
+        unknown = uuid.uuid4()
+
+        # Act
+        barrels = BarrelService(db_session).get_barrels_by_ids([other_barrel.id, unknown, test_barrel.id])
+
+        # Assert
+        assert [barrel.id if barrel else None for barrel in barrels] == [other_barrel.id, None, test_barrel.id]
+
+    def test_single_query_for_cache_misses(self, db_session: Session, test_barrel: Barrel, other_barrel: Barrel,
+                                           captured_statements: List[str]):
+        """Test d'une seule requête IN pour les fûts absents du cache"""
+        # Arrange
+        service = BarrelService(db_session, cache=CatalogCache(TTLCache(maxsize=100, ttl=60)))
+        service.get_barrel_by_id(test_barrel.id)
+        cached_id, other_id, name = test_barrel.id, other_barrel.id, test_barrel.name
+        captured_statements.clear()
+
+        # Act
+        barrels = service.get_barrels_by_ids([cached_id, other_id, uuid.uuid4()])
+        again = service.get_barrels_by_ids([other_id, cached_id])
+
+        # Assert
+        assert len(captured_statements) == 1
+        assert " IN " in captured_statements[0]
+        assert barrels[2] is None
+        assert [barrel.name for barrel in again] == ["Fût Acacia", name]
+
+    def test_batch_size_limit(self, db_session: Session):
+        """Test du rejet d'un lot dépassant MAX_BATCH_SIZE"""
+        with pytest.raises(ValidationException):
+            BarrelService(db_session).get_barrels_by_ids([uuid.uuid4()] * (settings.MAX_BATCH_SIZE + 1))
+
+
+class TestBarrelBatchEndpoint:
+    """Tests des routes GET et POST /v1/barrels/batch"""
+
+    def test_get_with_comma_separated_ids(self, client: TestClient, test_barrel: Barrel, other_barrel: Barrel):
+        """Test de la lecture groupée par GET, avec marqueur de fût inexistant"""
+        # Arrange
+        unknown = str(uuid.uuid4())
+
+        # Act
+        response = client.get(f"/v1/barrels/batch?ids={other_barrel.id},{unknown},{test_barrel.id}")
+
+        # Assert
+        assert response.status_code == 200
+        items = response.json()["items"]
+        assert [item["id"] for item in items] == [other_barrel.id, unknown, test_barrel.id]
+        assert [item["found"] for item in items] == [True, False, True]
+        assert items[0]["barrel"]["price"] == "990.00"
+        assert items[1]["barrel"] is None
+
+    def test_get_revalidated_on_each_access(self, client: TestClient, test_barrel: Barrel):
+        """Test de la politique no-cache et du 304 d'un lot inchangé"""
+        # Arrange
+        first = client.get(f"/v1/barrels/batch?ids={test_barrel.id}")
+
+        # Act
+        second = client.get(f"/v1/barrels/batch?ids={test_barrel.id}", headers={"If-None-Match": first.headers["etag"]})
+
+        # Assert
+        assert first.headers["cache-control"] == "no-cache"
+        assert second.status_code == 304
+
+    def test_post_variant(self, client: TestClient, test_barrel: Barrel):
+        """Test de la variante POST"""
+        # Act
+        response = client.post("/v1/barrels/batch", json={"ids": [test_barrel.id]})
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json()["items"][0]["barrel"]["stock_quantity"] == test_barrel.stock_quantity
+
+    def test_invalid_and_oversized_batches(self, client: TestClient):
+        """Test du 400 pour un identifiant invalide ou un lot trop grand"""
+        # Act
+        invalid = client.get("/v1/barrels/batch?ids=pas-un-uuid")
+        oversized = client.post(
+            "/v1/barrels/batch", json={"ids": [str(uuid.uuid4()) for _ in range(settings.MAX_BATCH_SIZE + 1)]}
+        )
+
+        # Assert
+        assert invalid.status_code == 400
+        assert oversized.status_code == 400
@@ -10,7 +10,10 @@ from sqlalchemy.orm import Session
 
 from app.services.barrel_service import BarrelService
 from app.models.barrel import Barrel
+from app.schemas.barrel import BarrelFilter
+from app.core.constants import WoodType, PreviousContent, BarrelCondition
 from app.core.exceptions import NotFoundException, ValidationException, BusinessLogicException
+from app.core.cache import CatalogCache, TTLCache
 
 
 class TestBarrelService:
@@ -512,3 +515,76 @@ class TestBarrelService:
         # Note: Cette méthode n'existe pas encore dans le service
         # Ici on teste juste que la méthode ne plante pas
         assert True  # Placeholder
+
+
+class TestBarrelFacets:
+    """Tests des facettes du catalogue sur une vraie base"""
+
+    def _create_barrels(self, db_session: Session) -> None:
+        specs = [
+            ("France", WoodType.OAK, Decimal("400.00"), Decimal("225.00"), 3),
+            ("France", WoodType.OAK, Decimal("1200.00"), Decimal("225.00"), 0),
+            ("Espagne", WoodType.ACACIA, Decimal("6000.00"), Decimal("500.00"), 1),
+        ]
+        for origin, wood_type, price, volume, stock in specs:
+            db_session.add(Barrel(
+                name=f"Fût {origin}",
+                origin_country=origin,
+                wood_type=wood_type,
+                previous_content=PreviousContent.RED_WINE,
+                condition=BarrelCondition.GOOD,
+                volume_liters=volume,
+                price=price,
+                stock_quantity=stock
+            ))
+        db_session.commit()
+
+    def test_get_facets_counts(self, db_session: Session):
+        """Test des comptages par facette et par tranche"""
+        # Arrange
+        self._create_barrels(db_session)
+        service = BarrelService(db_session)
+
+        # Act
+        facets = service.get_facets()
+
+        # Assert
+        assert facets["total"] == 3
+        assert facets["origin_country"] == {"France": 2, "Espagne": 1}
+        assert facets["wood_type"] == {"oak": 2, "acacia": 1}
+        assert facets["condition"] == {"good": 3}
+        assert facets["price_range"] == {"0-500": 1, "500-1000": 0, "1000-2000": 1, "2000-5000": 0, "5000+": 1}
+        assert facets["volume_range"]["225-300"] == 2
+        assert facets["volume_range"]["300+"] == 1
+
+    def test_get_facets_applies_filters(self, db_session: Session):
+        """Test des facettes sous les filtres du catalogue"""
+        # Arrange
+        self._create_barrels(db_session)
+        service = BarrelService(db_session)
+
+        # Act
+        facets = service.get_facets(BarrelFilter(in_stock=True))
+
+        # Assert
+        assert facets["total"] == 2
+        assert facets["origin_country"] == {"Espagne": 1, "France": 1}
+
+    def test_get_facets_cached_and_invalidated(self, db_session: Session):
+        """Test du cache des facettes et de son invalidation à l'écriture"""
+        # Arrange
+        self._create_barrels(db_session)
+        service = BarrelService(db_session, cache=CatalogCache(TTLCache()))
+        service.get_facets(BarrelFilter(origin_country="FRANCE"))
+        barrel = db_session.query(Barrel).filter(Barrel.origin_country == "Espagne").first()
+
+        # Act
+        with patch.object(service, "_facet_expressions") as mock_expressions:
+            cached = service.get_facets(BarrelFilter(origin_country="France"))
+        service.update_stock(barrel.id, 5)
+        refreshed = service.get_facets()
+
+        # Assert
+        mock_expressions.assert_not_called()
+        assert cached["total"] == 2
+        assert refreshed["total"] == 3
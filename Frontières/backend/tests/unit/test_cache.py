@@ -0,0 +1,176 @@
+"""
+Tests unitaires pour le cache du catalogue - Millésime Sans Frontières
+"""
+
+import pytest
+from decimal import Decimal
+from unittest.mock import patch
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache, RedisCache, CatalogCache, get_catalog_cache
+from app.core.constants import WoodType, PreviousContent, BarrelCondition
+from app.core.security import MockRedisClient
+from app.models.barrel import Barrel
+from app.schemas.barrel import BarrelFilter
+from app.services.barrel_service import BarrelService
+
+
+class TestTTLCache:
+    """Tests pour le cache mémoire"""
+
+    def test_lru_eviction(self):
+        """Test d'éviction de l'entrée la moins récemment utilisée"""
+        # Arrange
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+
+        # Act
+        cache.get("a")
+        cache.set("c", 3)
+
+        # Assert
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+    def test_ttl_expiry(self):
+        """Test d'expiration des entrées"""
+        # Arrange
+        cache = TTLCache(maxsize=10, ttl=60)
+
+        # Act
+        with patch("app.core.cache.time.monotonic", return_value=1000.0):
+            cache.set("a", 1)
+        with patch("app.core.cache.time.monotonic", return_value=1061.0):
+            value = cache.get("a")
+
+        # Assert
+        assert value is None
+        assert len(cache) == 0
+
+
+class TestRedisCache:
+    """Tests pour le backend Redis (client de substitution local)"""
+
+    def test_roundtrip_and_counter(self):
+        """Test d'écriture, lecture, compteur et suppression"""
+        # Arrange
+        cache = RedisCache(MockRedisClient(), ttl=60)
+
+        # Act
+        cache.set("barrel:1", {"price": "10.00"})
+        cache.add("counter", 41)
+        counter = cache.incr("counter")
+
+        # Assert
+        assert cache.get("barrel:1") == {"price": "10.00"}
+        assert counter == 42
+        assert cache.get("counter") == 42
+        cache.clear()
+        assert cache.get("barrel:1") is None
+
+
+@pytest.fixture(params=["memory", "redis"])
+def catalog_cache(request) -> CatalogCache:
+    """Cache catalogue sur chacun des backends"""
+    if request.param == "memory":
+        return CatalogCache(TTLCache(maxsize=100, ttl=60))
+    return CatalogCache(RedisCache(MockRedisClient(), ttl=60))
+
+
+class TestCatalogCache:
+    """Tests du cache catalogue devant BarrelService"""
+
+    def _create_barrel(self, db_session: Session, name: str = "Fût de chêne", stock: int = 3) -> Barrel:
+        barrel = Barrel(
+            name=name,
+            wood_type=WoodType.OAK,
+            previous_content=PreviousContent.RED_WINE,
+            condition=BarrelCondition.GOOD,
+            volume_liters=Decimal("225.00"),
+            price=Decimal("1500.00"),
+            stock_quantity=stock
+        )
+        db_session.add(barrel)
+        db_session.commit()
+        return barrel
+
+    def test_barrel_served_from_cache(self, db_session: Session, catalog_cache: CatalogCache):
+        """Test de lecture d'une fiche depuis le cache sans requête"""
+        # Arrange
+        barrel = self._create_barrel(db_session)
+        service = BarrelService(db_session, cache=catalog_cache)
+        service.get_barrel_by_id(barrel.id)
+
+        # Act
+        with patch.object(db_session, "query", side_effect=AssertionError("requête inattendue")):
+            cached = service.get_barrel_by_id(barrel.id)
+
+        # Assert
+        assert cached.name == barrel.name
+        assert cached.price == Decimal("1500.00")
+        assert cached.wood_type == WoodType.OAK
+        assert cached.created_at == barrel.created_at
+
+    def test_update_invalidates_barrel_and_lists(self, db_session: Session, catalog_cache: CatalogCache):
+        """Test d'invalidation par identifiant et par génération lors d'une mise à jour"""
+        # Arrange
+        barrel = self._create_barrel(db_session)
+        other = self._create_barrel(db_session, name="Fût d'acacia")
+        service = BarrelService(db_session, cache=catalog_cache)
+        service.get_barrel_by_id(barrel.id)
+        service.get_barrel_by_id(other.id)
+        service.get_barrels_with_filters(filters=BarrelFilter())
+
+        # Act
+        service.update_barrel(barrel.id, {"price": Decimal("990.00")})
+
+        # Assert
+        assert catalog_cache.get_barrel(barrel.id) is None
+        assert catalog_cache.get_barrel(other.id) is not None
+        assert catalog_cache.get_catalog("list", "0:100:{}", catalog_cache.generation()) is None
+        barrels, _ = service.get_barrels_with_filters(filters=BarrelFilter())
+        assert {b.price for b in barrels} == {Decimal("990.00"), Decimal("1500.00")}
+
+    def test_stock_change_invalidates_statistics(self, db_session: Session, catalog_cache: CatalogCache):
+        """Test de non-péremption du stock et des statistiques après une sortie de stock"""
+        # Arrange
+        barrel = self._create_barrel(db_session, stock=3)
+        service = BarrelService(db_session, cache=catalog_cache)
+        assert service.get_barrel_by_id(barrel.id).stock_quantity == 3
+        assert service.get_barrel_statistics()["available_barrels"] == 1
+
+        # Act
+        service.decrease_stock(barrel.id, 3)
+
+        # Assert
+        assert service.get_barrel_by_id(barrel.id).stock_quantity == 0
+        assert service.get_barrel_statistics()["available_barrels"] == 0
+
+    def test_global_cache_invalidated_without_read_cache(self, db_session: Session):
+        """Test d'invalidation du cache partagé par un service sans cache de lecture"""
+        # Arrange
+        barrel = self._create_barrel(db_session)
+        cached_service = BarrelService(db_session, cache=get_catalog_cache())
+        cached_service.get_barrel_by_id(barrel.id)
+
+        # Act
+        BarrelService(db_session).update_stock(barrel.id, -1)
+
+        # Assert
+        assert cached_service.get_barrel_by_id(barrel.id).stock_quantity == 2
+
+    def test_read_racing_invalidation_not_cached(self, catalog_cache: CatalogCache):
+        """Test de rejet d'une fiche relue avant une invalidation concurrente"""
+        # Arrange
+        generation = catalog_cache.generation()
+
+        # Act
+        catalog_cache.invalidate_barrels(["barrel-1"])
+        catalog_cache.set_barrel("barrel-1", {"stock_quantity": 3}, generation)
+        catalog_cache.set_catalog("statistics", "", {"available_barrels": 1}, generation)
+
+        # Assert
+        assert catalog_cache.get_barrel("barrel-1") is None
+        assert catalog_cache.get_catalog("statistics", "", catalog_cache.generation()) is None
@@ -0,0 +1,129 @@
+"""
+Tests unitaires pour la compression des réponses - Millésime Sans Frontières
+"""
+
+import gzip
+import json
+import pytest
+from unittest.mock import Mock, patch
+from fastapi import FastAPI, Response
+from fastapi.testclient import TestClient
+
+from app.core import compression
+from app.core.compression import CompressedBodyCache, CompressionMiddleware, negotiate_encoding
+
+CATALOG = [{"id": index, "name": f"Fût de chêne n°{index}", "price": "900.00"} for index in range(200)]
+
+
+@pytest.fixture
+def body_cache():
+    """Cache des corps compressés propre à chaque test"""
+    return CompressedBodyCache(maxsize=16, ttl=60)
+
+
+@pytest.fixture
+def compressed_client(body_cache):
+    """Application minimale derrière le middleware de compression"""
+    app = FastAPI()
+
+    @app.get("/v1/barrels/")
+    async def catalog():
+        return CATALOG
+
+    @app.get("/v1/orders/")
+    async def orders():
+        return CATALOG
+
+    @app.get("/v1/barrels/tagged")
+    async def tagged():
+        return Response(content=json.dumps(CATALOG), media_type="application/json", headers={"ETag": '"abc"'})
+
+    @app.get("/small")
+    async def small():
+        return {"status": "ok"}
+
+    @app.get("/image")
+    async def image():
+        return Response(content=b"\x89PNG" * 1000, media_type="image/png")
+
+    app.add_middleware(CompressionMiddleware, minimum_size=500, cached_paths=["/v1/barrels"], cache=body_cache)
+    return TestClient(app)
+
+
+class TestEncodingNegotiation:
+    """Tests du choix de l'encodage"""
+
+    def test_gzip_without_brotli(self):
+        """Test du repli sur gzip lorsque brotli n'est pas installé"""
+        with patch.object(compression, "brotli", None):
+            assert negotiate_encoding("gzip, deflate, br") == "gzip"
+
+    def test_brotli_preferred_when_available(self):
+        """Test de la préférence pour brotli lorsqu'il est installé et accepté"""
+        with patch.object(compression, "brotli", Mock()):
+            assert negotiate_encoding("gzip, br") == "br"
+            assert negotiate_encoding("gzip, br;q=0") == "gzip"
+
+    def test_identity_only(self):
+        """Test de l'absence de compression sans encodage accepté"""
+        assert negotiate_encoding("") is None
+        assert negotiate_encoding("identity, gzip;q=0") is None
+
+
+class TestCompressionMiddleware:
+    """Tests du middleware de compression"""
+
+    def test_large_json_compressed(self, compressed_client: TestClient):
+        """Test de la compression gzip d'une page du catalogue"""
+        # Act
+        with patch.object(compression, "brotli", None):
+            response = compressed_client.get("/v1/barrels/", headers={"Accept-Encoding": "gzip"})
+
+        # Assert
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert int(response.headers["content-length"]) < len(response.content)
+        assert response.json() == CATALOG
+
+    def test_small_and_binary_responses_untouched(self, compressed_client: TestClient):
+        """Test des seuils : petite réponse et type non compressible"""
+        # Act
+        small = compressed_client.get("/small", headers={"Accept-Encoding": "gzip"})
+        image = compressed_client.get("/image", headers={"Accept-Encoding": "gzip"})
+
+        # Assert
+        assert "content-encoding" not in small.headers
+        assert "content-encoding" not in image.headers
+        assert image.content == b"\x89PNG" * 1000
+
+    def test_no_compression_without_accept_encoding(self, compressed_client: TestClient):
+        """Test d'une réponse en clair pour un client sans Accept-Encoding"""
+        # Act
+        response = compressed_client.get("/v1/barrels/", headers={"Accept-Encoding": "identity"})
+
+        # Assert
+        assert "content-encoding" not in response.headers
+        assert response.json() == CATALOG
+
+    def test_identical_catalog_payload_compressed_once(self, compressed_client: TestClient):
+        """Test du cache : un même corps du catalogue n'est compressé qu'une fois"""
+        # Act
+        with patch.object(compression, "brotli", None), \
+                patch("app.core.compression.gzip.compress", wraps=gzip.compress) as mock_compress:
+            for _ in range(3):
+                compressed_client.get("/v1/barrels/", headers={"Accept-Encoding": "gzip"})
+            for _ in range(2):
+                compressed_client.get("/v1/orders/", headers={"Accept-Encoding": "gzip"})
+
+        # Assert
+        assert mock_compress.call_count == 3
+
+    def test_strong_etag_weakened_when_compressed(self, compressed_client: TestClient):
+        """Test de l'ETag faible (W/) de la représentation compressée"""
+        # Act
+        compressed = compressed_client.get("/v1/barrels/tagged", headers={"Accept-Encoding": "gzip"})
+        identity = compressed_client.get("/v1/barrels/tagged", headers={"Accept-Encoding": "identity"})
+
+        # Assert
+        assert compressed.headers["etag"] == 'W/"abc"'
+        assert identity.headers["etag"] == '"abc"'
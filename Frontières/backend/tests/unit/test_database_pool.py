@@ -0,0 +1,141 @@
+"""
+Tests unitaires pour le pool de connexions - Millésime Sans Frontières
+"""
+
+import asyncio
+import uuid
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from sqlalchemy import Column, Integer, MetaData, Table, create_engine, func, insert, select
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import InstrumentedQueuePool, create_debug_engines, get_pool_options, get_pool_status
+from app.core.monitoring import metric_key, metrics_collector
+
+
+@pytest.fixture
+def small_pool_engine(tmp_path):
+    """Moteur à pool d'une connexion sans débordement"""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05
+    )
+    metrics_collector.reset()
+    yield engine
+    engine.dispose()
+    metrics_collector.reset()
+
+
+class TestConnectionPool:
+    """Tests du dimensionnement et de la télémétrie du pool"""
+
+    def test_pool_options_from_settings(self):
+        """Test du dimensionnement issu de la configuration"""
+        # Arrange
+        with patch("app.core.database.settings.DB_POOL_SIZE", 7), \
+                patch("app.core.database.settings.DB_POOL_RECYCLE", 1800):
+            # Act
+            options = get_pool_options()
+
+        # Assert
+        assert options["pool_size"] == 7
+        assert options["pool_recycle"] == 1800
+
+    def test_sync_engine_sized_separately(self):
+        """Test du dimensionnement propre au moteur synchrone"""
+        # Arrange
+        with patch("app.core.database.settings.DB_SYNC_POOL_SIZE", 3), \
+                patch("app.core.database.settings.DB_SYNC_MAX_OVERFLOW", 2):
+            # Act
+            sync_options = get_pool_options(sync=True)
+            async_options = get_pool_options()
+
+        # Assert
+        assert (sync_options["pool_size"], sync_options["max_overflow"]) == (3, 2)
+        assert (async_options["pool_size"], async_options["max_overflow"]) == (settings.DB_POOL_SIZE,
+                                                                               settings.DB_MAX_OVERFLOW)
+        assert sync_options["pool_timeout"] == async_options["pool_timeout"]
+
+    def test_checkout_telemetry_and_timeout(self, small_pool_engine):
+        """Test des jauges d'occupation, de l'histogramme d'attente et du compteur de dépassements"""
+        # Arrange
+        connection = small_pool_engine.connect()
+
+        # Act
+        status = get_pool_status(small_pool_engine)
+        checked_out = metrics_collector.get_gauge(metric_key("db_pool_checked_out", pool="sync"))
+        with pytest.raises(PoolTimeoutError):
+            small_pool_engine.connect()
+        connection.close()
+
+        # Assert
+        assert status["checked_out"] == 1
+        assert status["saturation"] == 1.0
+        assert checked_out == 1
+        assert metrics_collector.get_gauge(metric_key("db_pool_checked_out", pool="sync")) == 0
+        assert metrics_collector.get_metric(metric_key("db_pool_timeouts_total", pool="sync")) == 1
+        wait = metrics_collector.get_timing_stats(metric_key("db_pool_checkout_wait_seconds", pool="sync"))
+        assert wait["count"] == 2
+        assert wait["max"] >= 0.05
+
+    def test_readiness_reports_saturation(self, client: TestClient, small_pool_engine):
+        """Test de la réponse 503 de /health/ready lorsque le pool est saturé"""
+        # Arrange
+        ready = client.get("/health/ready")
+        connection = small_pool_engine.connect()
+
+        # Act
+        with patch("app.main.engine", small_pool_engine):
+            saturated = client.get("/health/ready")
+        connection.close()
+
+        # Assert
+        assert ready.status_code == 200
+        assert ready.json()["status"] == "ready"
+        assert saturated.status_code == 503
+        assert saturated.json()["pools"]["sync"]["checked_out"] == 1
+
+
+class TestDebugEngines:
+    """Tests des moteurs du mode développement (SQLite en mémoire partagée)"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_write_requests_isolated(self):
+        """Test de deux requêtes d'écriture concurrentes : le rollback de l'une n'efface pas l'autre"""
+        # Arrange
+        engine, async_engine = create_debug_engines(
+            f"sqlite:///file:msf_{uuid.uuid4().hex}?mode=memory&cache=shared&uri=true", echo=False
+        )
+        rows = Table("rows", MetaData(), Column("value", Integer))
+        rows.metadata.create_all(engine)
+
+        async def committed_request():
+            async with AsyncSession(async_engine) as session:
+                await session.execute(insert(rows).values(value=1))
+                await asyncio.sleep(0.05)
+                await session.commit()
+
+        async def rolled_back_request():
+            async with AsyncSession(async_engine) as session:
+                await session.execute(insert(rows).values(value=2))
+                await session.rollback()
+
+        # Act
+        try:
+            await asyncio.gather(committed_request(), rolled_back_request())
+            async with AsyncSession(async_engine) as session:
+                values = (await session.execute(select(rows.c.value))).scalars().all()
+                count = (await session.execute(select(func.count()).select_from(rows))).scalar()
+        finally:
+            await async_engine.dispose()
+            engine.dispose()
+
+        # Assert
+        assert values == [1]
+        assert count == 1
@@ -0,0 +1,95 @@
+"""
+Tests unitaires pour les champs partiels des listes (?fields=) - Millésime Sans Frontières
+"""
+
+import pytest
+from typing import List
+from fastapi.testclient import TestClient
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session
+
+from app.core.exceptions import ValidationException
+from app.core.fieldsets import parse_fields, sparse_model
+from app.models.barrel import Barrel
+from app.schemas.barrel import BarrelListResponse
+from app.services.barrel_service import BarrelService
+
+
+class TestFieldParsing:
+    """Tests de l'analyse du paramètre fields"""
+
+    def test_fields_in_schema_order_with_id(self):
+        """Test de l'ordre du schéma et de l'identifiant toujours inclus"""
+        # Act
+        fields = parse_fields(" price, name ,,", BarrelListResponse)
+
+        # Assert
+        assert fields == ("id", "name", "price")
+        assert parse_fields(None, BarrelListResponse) is None
+
+    def test_unknown_field_rejected(self):
+        """Test du rejet d'un champ absent du schéma"""
+        with pytest.raises(ValidationException) as exc_info:
+            parse_fields("name,documents", BarrelListResponse)
+        assert "documents" in exc_info.value.message
+
+    def test_sparse_model_cached_per_fieldset(self):
+        """Test du schéma réduit, construit une seule fois par combinaison de champs"""
+        # Act
+        model = sparse_model(BarrelListResponse, ("id", "name", "price"))
+
+        # Assert
+        assert list(model.model_fields) == ["id", "name", "price"]
+        assert sparse_model(BarrelListResponse, ("id", "name", "price")) is model
+
+
+class TestProjectedBarrelList:
+    """Tests de la projection SQL de la liste des fûts"""
+
+    def test_only_requested_columns_selected(self, db_session: Session, test_barrel: Barrel,
+                                             captured_statements: List[str]):
+        """Test du SELECT limité aux colonnes demandées (et à celles du tri)"""
+        # Arrange
+        db_session.expunge_all()
+        captured_statements.clear()
+
+        # Act
+        barrels, total = BarrelService(db_session).get_barrels_with_filters(fields=("id", "name", "main_image"))
+
+        # Assert
+        select_list = captured_statements[-1].split(" FROM ")[0]
+        assert total == 1
+        assert "barrels.image_urls" in select_list and "barrels.created_at" in select_list
+        assert "barrels.description" not in select_list and "barrels.documents" not in select_list
+        assert "description" in inspect(barrels[0]).unloaded
+
+    def test_endpoint_returns_requested_fields(self, client: TestClient, db_session: Session, test_barrel: Barrel):
+        """Test de la réponse réduite, en pagination par page et par curseur"""
+        # Arrange
+        test_barrel.image_urls = "https://example.com/a.jpg,https://example.com/b.jpg"
+        db_session.commit()
+        barrel_id, barrel_name = test_barrel.id, test_barrel.name
+        db_session.expunge_all()
+
+        # Act
+        paged = client.get("/v1/barrels/?fields=name,price,main_image")
+        cursor = client.get("/v1/barrels/?cursor=&fields=price")
+
+        # Assert
+        assert paged.status_code == 200
+        assert paged.json()["items"] == [{
+            "id": barrel_id,
+            "name": barrel_name,
+            "price": "1500.00",
+            "main_image": "https://example.com/a.jpg",
+        }]
+        assert cursor.status_code == 200
+        assert set(cursor.json()["items"][0]) == {"id", "price"}
+
+    def test_endpoint_rejects_unknown_field(self, client: TestClient):
+        """Test du 400 pour un champ inconnu"""
+        # Act
+        response = client.get("/v1/barrels/?fields=name,secret")
+
+        # Assert
+        assert response.status_code == 400
@@ -0,0 +1,123 @@
+"""
+Tests unitaires pour les requêtes GET conditionnelles - Millésime Sans Frontières
+"""
+
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.cache import get_catalog_cache
+from app.core.http_cache import entity_etag, etag_matches, http_date
+from app.models.barrel import Barrel
+from app.models.order import Order
+from app.services.barrel_service import BarrelService
+
+
+class TestETagMatching:
+    """Tests de la comparaison des ETag"""
+
+    def test_weak_comparison_and_lists(self):
+        """Test de la comparaison faible (W/) et des listes d'ETag"""
+        # Arrange
+        etag = entity_etag("barrel-1", datetime(2025, 1, 1, 12, 0, 0))
+
+        # Act / Assert
+        assert etag_matches(etag, etag)
+        assert etag_matches(f'"autre", W/{etag}', etag)
+        assert etag_matches("*", etag)
+        assert not etag_matches('"autre"', etag)
+
+    def test_etag_changes_with_version(self):
+        """Test d'un ETag distinct à chaque modification"""
+        # Arrange
+        version = datetime(2025, 1, 1, 12, 0, 0)
+
+        # Act / Assert
+        assert entity_etag("barrel-1", version) != entity_etag("barrel-1", version + timedelta(microseconds=1))
+        assert entity_etag("barrel-1", version) != entity_etag("barrel-2", version)
+
+
+class TestConditionalBarrelGet:
+    """Tests des GET conditionnels du catalogue"""
+
+    def test_detail_answers_304_without_loading_barrel(self, client: TestClient, test_barrel: Barrel):
+        """Test du 304 sur If-None-Match, avant le chargement du fût"""
+        # Arrange
+        first = client.get(f"/v1/barrels/{test_barrel.id}")
+
+        # Act
+        with patch.object(BarrelService, "get_barrel_by_id") as mock_get:
+            second = client.get(f"/v1/barrels/{test_barrel.id}", headers={"If-None-Match": first.headers["etag"]})
+
+        # Assert
+        assert first.status_code == 200
+        assert first.headers["cache-control"] == "public, max-age=60, stale-while-revalidate=300"
+        assert "last-modified" in first.headers
+        assert second.status_code == 304
+        assert second.content == b""
+        assert second.headers["etag"] == first.headers["etag"]
+        mock_get.assert_not_called()
+
+    def test_detail_refetched_after_update(self, client: TestClient, db_session: Session, test_barrel: Barrel):
+        """Test d'une réponse complète une fois le fût modifié"""
+        # Arrange
+        etag = client.get(f"/v1/barrels/{test_barrel.id}").headers["etag"]
+        test_barrel.stock_quantity += 1
+        test_barrel.updated_at = datetime.utcnow() + timedelta(seconds=5)
+        db_session.commit()
+
+        # Act
+        response = client.get(f"/v1/barrels/{test_barrel.id}", headers={"If-None-Match": etag})
+
+        # Assert
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+
+    def test_if_modified_since(self, client: TestClient, test_barrel: Barrel):
+        """Test du 304 sur If-Modified-Since"""
+        # Arrange
+        last_modified = client.get(f"/v1/barrels/{test_barrel.id}").headers["last-modified"]
+        earlier = http_date(test_barrel.updated_at - timedelta(hours=1))
+
+        # Act
+        unchanged = client.get(f"/v1/barrels/{test_barrel.id}", headers={"If-Modified-Since": last_modified})
+        changed = client.get(f"/v1/barrels/{test_barrel.id}", headers={"If-Modified-Since": earlier})
+
+        # Assert
+        assert unchanged.status_code == 304
+        assert changed.status_code == 200
+
+    def test_list_etag_follows_catalog_generation(self, client: TestClient, test_barrel: Barrel):
+        """Test de l'ETag des listes, invalidé par l'écriture suivante dans le catalogue"""
+        # Arrange
+        first = client.get("/v1/barrels/?page=1&size=20")
+        etag = first.headers["etag"]
+
+        # Act
+        not_modified = client.get("/v1/barrels/?page=1&size=20", headers={"If-None-Match": etag})
+        other_page = client.get("/v1/barrels/?page=2&size=20", headers={"If-None-Match": etag})
+        get_catalog_cache().invalidate_barrels([test_barrel.id])
+        after_write = client.get("/v1/barrels/?page=1&size=20", headers={"If-None-Match": etag})
+
+        # Assert
+        assert first.status_code == 200
+        assert not_modified.status_code == 304
+        assert other_page.status_code == 200
+        assert after_write.status_code == 200
+
+
+class TestConditionalOrderGet:
+    """Tests des GET conditionnels des commandes"""
+
+    def test_private_policy_and_304(self, client: TestClient, test_order: Order):
+        """Test de la politique privée et du 304 d'une commande inchangée"""
+        # Arrange
+        etag = entity_etag(test_order.id, test_order.updated_at)
+
+        # Act
+        response = client.get(f"/v1/orders/{test_order.id}", headers={"If-None-Match": etag})
+
+        # Assert
+        assert response.status_code == 304
+        assert response.headers["cache-control"] == "private, no-cache"
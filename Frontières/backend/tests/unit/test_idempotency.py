@@ -0,0 +1,160 @@
+"""
+Tests unitaires pour l'idempotence des créations - Millésime Sans Frontières
+"""
+
+import asyncio
+import pytest
+from decimal import Decimal
+from unittest.mock import AsyncMock, patch
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.cache import RedisCache, TTLCache
+from app.core.exceptions import IdempotencyInProgressException, IdempotencyKeyReusedException
+from app.core.idempotency import IdempotencyStore, create_idempotency_backend
+from app.core.security import MockRedisClient
+from app.models.address import Address
+from app.models.barrel import Barrel
+from app.models.order import Order
+from app.models.user import User
+from app.services.order_service import AsyncOrderService
+
+BODY = {"id": "commande-1", "order_number": "ORD-20240101-0001"}
+
+
+@pytest.fixture(params=["memory", "redis"])
+def store(request):
+    """Registre d'idempotence sur chacun des backends"""
+    backend = TTLCache(maxsize=100, ttl=60) if request.param == "memory" else RedisCache(MockRedisClient(), ttl=60)
+    return IdempotencyStore(backend, ttl=60, lock_ttl=5, wait_timeout=2)
+
+
+def _creation(result=BODY, delay: float = 0.0):
+    calls = []
+
+    async def execute():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    return execute, calls
+
+
+class TestIdempotencyStore:
+    """Tests du registre des clés d'idempotence"""
+
+    @pytest.mark.asyncio
+    async def test_duplicates_in_flight_wait_for_first_result(self, store: IdempotencyStore):
+        """Test d'exécution unique pour des doublons simultanés"""
+        # Arrange
+        execute, calls = _creation(delay=0.1)
+
+        # Act
+        responses = await asyncio.gather(*[store.run("orders", "cle-1", "empreinte", execute, 201)
+                                           for _ in range(5)])
+        replay = await store.run("orders", "cle-1", "empreinte", execute, 201)
+
+        # Assert
+        assert len(calls) == 1
+        assert {response.body for response in responses + [replay]} == {responses[0].body}
+        assert [response.headers["Idempotent-Replayed"] for response in responses].count("false") == 1
+        assert replay.headers["Idempotent-Replayed"] == "true"
+        assert replay.status_code == 201
+
+    @pytest.mark.asyncio
+    async def test_key_reused_with_different_request(self, store: IdempotencyStore):
+        """Test de refus d'une clé réutilisée pour un autre corps de requête"""
+        # Arrange
+        execute, _ = _creation()
+        await store.run("orders", "cle-1", "empreinte", execute, 201)
+
+        # Act / Assert
+        with pytest.raises(IdempotencyKeyReusedException):
+            await store.run("orders", "cle-1", "autre-empreinte", execute, 201)
+
+    @pytest.mark.asyncio
+    async def test_failure_releases_key(self, store: IdempotencyStore):
+        """Test de nouvelle exécution après une création en échec"""
+        # Arrange
+        failing, _ = _creation(result=RuntimeError("base indisponible"))
+        execute, calls = _creation()
+
+        # Act
+        with pytest.raises(RuntimeError):
+            await store.run("orders", "cle-1", "empreinte", failing, 201)
+        response = await store.run("orders", "cle-1", "empreinte", execute, 201)
+
+        # Assert
+        assert len(calls) == 1
+        assert response.headers["Idempotent-Replayed"] == "false"
+
+    @pytest.mark.asyncio
+    async def test_wait_timeout_while_in_progress(self):
+        """Test de réponse 409 lorsque la requête d'origine dépasse le délai d'attente"""
+        # Arrange
+        store = IdempotencyStore(TTLCache(), wait_timeout=0.05)
+        execute, _ = _creation(delay=0.5)
+        first = asyncio.create_task(store.run("orders", "cle-1", "empreinte", execute, 201))
+        await asyncio.sleep(0.01)
+
+        # Act
+        with pytest.raises(IdempotencyInProgressException) as exc_info:
+            await store.run("orders", "cle-1", "empreinte", execute, 201)
+        await first
+
+        # Assert
+        assert exc_info.value.status_code == 409
+
+    @pytest.mark.asyncio
+    async def test_keys_expire_after_ttl(self):
+        """Test d'expiration des réponses enregistrées"""
+        # Arrange
+        store = IdempotencyStore(create_idempotency_backend("memory"), ttl=60)
+        execute, calls = _creation()
+
+        # Act
+        with patch("app.core.cache.time.monotonic", return_value=1000.0):
+            await store.run("orders", "cle-1", "empreinte", execute, 201)
+        with patch("app.core.cache.time.monotonic", return_value=1061.0):
+            response = await store.run("orders", "cle-1", "empreinte", execute, 201)
+
+        # Assert
+        assert len(calls) == 2
+        assert response.headers["Idempotent-Replayed"] == "false"
+
+
+class TestIdempotentOrderCreation:
+    """Tests de l'en-tête Idempotency-Key sur POST /v1/orders"""
+
+    def test_retry_replayed_without_calling_service(self, client: TestClient, db_session: Session, test_user: User,
+                                                    test_address: Address, test_barrel: Barrel):
+        """Test du rejeu d'une création répétée sans nouvel appel au service"""
+        # Arrange
+        order = Order(user_id=test_user.id, shipping_address_id=test_address.id,
+                      billing_address_id=test_address.id, order_number="ORD-20240101-0001",
+                      subtotal=Decimal("1500.00"), total_amount=Decimal("1500.00"))
+        db_session.add(order)
+        db_session.commit()
+        payload = {
+            "shipping_address_id": str(test_address.id),
+            "billing_address_id": str(test_address.id),
+            "items": [{"barrel_id": str(test_barrel.id), "quantity": 1, "unit_price": 1500.0}]
+        }
+        headers = {"Idempotency-Key": "5f0c7d1e-commande"}
+
+        # Act
+        with patch.object(AsyncOrderService, "create_order", new=AsyncMock(return_value=order),
+                          create=True) as create:
+            first = client.post("/v1/orders/", json=payload, headers=headers)
+            retry = client.post("/v1/orders/", json=payload, headers=headers)
+            changed = client.post("/v1/orders/", json={**payload, "notes": "autre"}, headers=headers)
+
+        # Assert
+        assert first.status_code == 201
+        assert retry.status_code == 201
+        assert retry.json() == first.json()
+        assert retry.headers["Idempotent-Replayed"] == "true"
+        assert changed.status_code == 422
+        assert create.await_count == 1
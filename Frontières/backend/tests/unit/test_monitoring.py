@@ -0,0 +1,241 @@
+"""
+Tests unitaires pour le monitoring - Millésime Sans Frontières
+"""
+
+import json
+import random
+import threading
+from unittest.mock import patch
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.monitoring import (
+    LatencyHistogram,
+    MetricsCollector,
+    collect_metrics,
+    get_metrics_summary,
+    metric_key,
+    metrics_collector,
+    render_prometheus,
+    setup_monitoring
+)
+
+
+class TestLatencyHistogram:
+    """Tests pour l'histogramme à buckets logarithmiques"""
+
+    def test_percentiles_close_to_exact_values(self):
+        """Test de précision des percentiles (erreur relative < 2,2 %)"""
+        # Arrange
+        generator = random.Random(42)
+        values = [generator.lognormvariate(-4, 1) for _ in range(50_000)]
+        histogram = LatencyHistogram()
+
+        # Act
+        for value in values:
+            histogram.record(value)
+        stats = histogram.stats()
+
+        # Assert
+        ordered = sorted(values)
+        for percentile in (50, 90, 95, 99):
+            exact = ordered[int(percentile / 100 * len(ordered)) - 1]
+            assert abs(stats[f"p{percentile}"] - exact) / exact < 0.022
+        assert stats["max"] == ordered[-1]
+        assert stats["count"] == len(values)
+
+    def test_memory_bounded(self):
+        """Test de mémoire bornée quel que soit le nombre de mesures"""
+        # Arrange
+        histogram = LatencyHistogram()
+
+        # Act
+        for index in range(200_000):
+            histogram.record((index % 1000 + 1) / 1000)
+
+        # Assert
+        assert len(histogram.counts) <= 16 * 10 + 1
+        assert histogram.count == 200_000
+
+
+    def test_prometheus_buckets_include_boundaries(self):
+        """Test des buckets `le` : une mesure égale à la borne y est comptée"""
+        # Arrange
+        histogram = LatencyHistogram()
+
+        # Act
+        for value in (0.049, 0.05, 0.099, 0.1, 0.3):
+            histogram.record(value)
+        restored = LatencyHistogram.from_dict(json.loads(json.dumps(histogram.to_dict())))
+
+        # Assert
+        assert histogram.cumulative_count(0.025) == 0
+        assert histogram.cumulative_count(0.05) == 2
+        assert histogram.cumulative_count(0.1) == 4
+        assert histogram.cumulative_count(0.25) == 4
+        assert restored.cumulative_count(0.5) == 5
+
+
+class TestMetricsCollector:
+    """Tests pour le collecteur de métriques"""
+
+    def test_windowed_rotation(self):
+        """Test des fenêtres glissantes 1 min / 5 min"""
+        # Arrange
+        collector = MetricsCollector()
+
+        # Act
+        with patch("app.core.monitoring.time.monotonic", return_value=1000.0):
+            collector.record_timing("db_query", 1.0)
+        with patch("app.core.monitoring.time.monotonic", return_value=1120.0):
+            collector.record_timing("db_query", 0.01)
+            last_minute = collector.get_timing_stats("db_query", "1m")
+            last_five_minutes = collector.get_timing_stats("db_query", "5m")
+        with patch("app.core.monitoring.time.monotonic", return_value=1500.0):
+            expired = collector.get_timing_stats("db_query", "5m")
+            lifetime = collector.get_timing_stats("db_query")
+
+        # Assert
+        assert last_minute["count"] == 1
+        assert last_minute["p99"] == 0.01
+        assert last_five_minutes["count"] == 2
+        assert last_five_minutes["max"] == 1.0
+        assert expired["count"] == 0
+        assert lifetime["count"] == 2
+
+    def test_thread_safe_updates(self):
+        """Test de mises à jour concurrentes sans perte"""
+        # Arrange
+        collector = MetricsCollector()
+
+        def worker():
+            for _ in range(5_000):
+                collector.record_timing("request", 0.005)
+                collector.increment("requests_total")
+
+        # Act
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Assert
+        assert collector.get_timing_stats("request")["count"] == 40_000
+        assert collector.get_metric("requests_total") == 40_000
+
+    def test_summary_reports_percentiles(self):
+        """Test du résumé des métriques avec percentiles par fenêtre"""
+        # Arrange
+        metrics_collector.reset()
+        for index in range(100):
+            metrics_collector.record_timing("request_duration_/v1/barrels", (index + 1) / 1000)
+
+        # Act
+        summary = get_metrics_summary()
+        metrics_collector.reset()
+
+        # Assert
+        stats = summary["timing_stats"]["request_duration_/v1/barrels"]
+        assert abs(stats["p95"] - 0.095) < 0.095 * 0.022
+        assert set(stats["windows"]) == {"1m", "5m"}
+        assert stats["windows"]["1m"]["count"] == 100
+
+
+def _snapshot(requests: int, in_progress: int, durations: list) -> dict:
+    histogram = LatencyHistogram()
+    for duration in durations:
+        histogram.record(duration)
+    return {
+        "counters": {metric_key("http_requests_total", method="GET", route="/v1/barrels", status=200): requests},
+        "gauges": {"http_requests_in_progress": in_progress},
+        "histograms": {metric_key("http_request_duration_seconds", method="GET", route="/v1/barrels"):
+                       histogram.to_dict()}
+    }
+
+
+class TestPrometheusExposition:
+    """Tests de l'exposition Prometheus et du middleware par route"""
+
+    def test_middleware_labels_by_route_template(self):
+        """Test d'étiquetage par modèle de route et non par chemin brut"""
+        # Arrange
+        app = FastAPI()
+        setup_monitoring(app)
+
+        @app.get("/items/{item_id}")
+        async def read_item(item_id: int):
+            return {"id": item_id}
+
+        metrics_collector.reset()
+        client = TestClient(app)
+
+        # Act
+        client.get("/items/1")
+        client.get("/items/2")
+        client.get("/inconnu")
+        snapshot = metrics_collector.snapshot()
+        metrics_collector.reset()
+
+        # Assert
+        assert snapshot["counters"] == {
+            'http_requests_total{method="GET",route="/items/{item_id}",status="200"}': 2,
+            'http_requests_total{method="GET",route="unmatched",status="404"}': 1
+        }
+        assert snapshot["histograms"]['http_request_duration_seconds{method="GET",route="/items/{item_id}"}'][
+            "count"] == 2
+        assert snapshot["gauges"]["http_requests_in_progress"] == 0
+
+    def test_render_cumulative_buckets(self):
+        """Test des buckets cumulés, du bucket +Inf et du suffixe _total des compteurs"""
+        # Arrange
+        snapshot = _snapshot(3, 1, [0.003, 0.02, 0.2, 20.0])
+
+        # Act
+        text = render_prometheus(snapshot)
+
+        # Assert
+        labels = 'method="GET",route="/v1/barrels"'
+        assert "# TYPE millesime_http_requests_total counter" in text
+        assert f'millesime_http_requests_total{{{labels},status="200"}} 3' in text
+        assert "millesime_http_requests_in_progress 1" in text
+        assert f'millesime_http_request_duration_seconds_bucket{{{labels},le="0.005"}} 1' in text
+        assert f'millesime_http_request_duration_seconds_bucket{{{labels},le="0.025"}} 2' in text
+        assert f'millesime_http_request_duration_seconds_bucket{{{labels},le="10.0"}} 3' in text
+        assert f'millesime_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 4' in text
+        assert f'millesime_http_request_duration_seconds_count{{{labels}}} 4' in text
+
+    def test_multiprocess_aggregation(self, tmp_path):
+        """Test d'agrégation des instantanés des workers, jauges des workers arrêtés ignorées"""
+        # Arrange
+        metrics_collector.reset()
+        (tmp_path / "metrics_1.json").write_text(json.dumps(_snapshot(5, 2, [0.01, 0.02])))
+        (tmp_path / "metrics_999999.json").write_text(json.dumps(_snapshot(7, 3, [0.5])))
+
+        # Act
+        with patch("app.core.monitoring._is_alive", side_effect=lambda pid: pid == 1):
+            snapshot = collect_metrics(str(tmp_path))
+
+        # Assert
+        key = metric_key("http_requests_total", method="GET", route="/v1/barrels", status=200)
+        assert snapshot["counters"][key] == 12
+        assert snapshot["gauges"] == {"http_requests_in_progress": 2}
+        histogram = LatencyHistogram.from_dict(
+            snapshot["histograms"][metric_key("http_request_duration_seconds", method="GET", route="/v1/barrels")]
+        )
+        assert histogram.count == 3
+        assert histogram.max == 0.5
+
+    def test_metrics_endpoint(self, client: TestClient):
+        """Test de l'endpoint /metrics de l'application"""
+        # Arrange
+        metrics_collector.reset()
+        client.get("/health")
+
+        # Act
+        response = client.get("/metrics")
+
+        # Assert
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert 'millesime_http_requests_total{method="GET",route="/health",status="200"} 1' in response.text
@@ -0,0 +1,75 @@
+"""
+Tests unitaires pour la numérotation des commandes et devis - Millésime Sans Frontières
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+from sqlalchemy.orm import Session
+
+from app.core.numbering import NumberAllocator
+from app.services.quote_service import QuoteService
+
+
+def _postgresql_session() -> MagicMock:
+    session = MagicMock()
+    session.get_bind.return_value.dialect.name = "postgresql"
+    return session
+
+
+class TestNumberAllocator:
+    """Tests pour l'allocateur de numéros quotidiens"""
+
+    def test_sqlite_counter_in_transaction(self, db_session: Session):
+        """Test du format, de la séquence et de l'annulation avec la transaction appelante"""
+        # Arrange
+        allocator = NumberAllocator("QUO")
+        today = datetime.now().strftime("%Y%m%d")
+
+        # Act
+        first = allocator.next_number(db_session)
+        db_session.commit()
+        cancelled = allocator.next_number(db_session)
+        db_session.rollback()
+        second = QuoteService(db_session)._generate_quote_number()
+
+        # Assert
+        assert first == f"QUO-{today}-0001"
+        assert cancelled == f"QUO-{today}-0002"
+        assert second == f"QUO-{today}-0002"
+
+    def test_hilo_blocks_reserved_once_per_block(self):
+        """Test de la réservation par blocs : un aller-retour base pour `block_size` numéros"""
+        # Arrange
+        allocator = NumberAllocator("ORD", block_size=20)
+        highs = iter([20, 60])
+
+        # Act
+        with patch("app.core.numbering.increment_counter", side_effect=lambda *args: next(highs)) as increment:
+            numbers = [allocator.next_number(_postgresql_session()) for _ in range(25)]
+
+        # Assert
+        suffixes = [int(number.rsplit("-", 1)[1]) for number in numbers]
+        assert suffixes == list(range(1, 21)) + list(range(41, 46))
+        assert increment.call_count == 2
+
+    def test_hilo_threads_never_collide(self):
+        """Test d'absence de doublon entre threads d'un même worker"""
+        # Arrange
+        allocator = NumberAllocator("ORD", block_size=7)
+        counter = {"value": 0}
+        counter_lock = threading.Lock()
+
+        def reserve(connection, prefix, day, amount):
+            with counter_lock:
+                counter["value"] += amount
+                return counter["value"]
+
+        # Act
+        with patch("app.core.numbering.increment_counter", side_effect=reserve):
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                numbers = list(executor.map(lambda _: allocator.next_number(_postgresql_session()), range(2000)))
+
+        # Assert
+        assert len(set(numbers)) == 2000
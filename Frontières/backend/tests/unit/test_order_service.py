@@ -14,7 +14,7 @@ from app.models.order_item import OrderItem
 from app.models.barrel import Barrel
 from app.models.user import User
 from app.models.address import Address
-from app.core.exceptions import NotFoundException, ValidationException, BusinessLogicException
+from app.core.exceptions import NotFoundException, ValidationException, BusinessLogicException, InsufficientStockException
 
 
 class TestOrderService:
@@ -28,16 +28,18 @@ class TestOrderService:
     def test_generate_order_number(self):
         """Test de génération de numéro de commande"""
         # Arrange
-        # Configurer le mock pour retourner un entier pour count()
-        self.mock_db.query.return_value.filter.return_value.count.return_value = 5
+        # Compteur du jour (table number_counters) simulé
+        self.mock_db.get_bind.return_value.dialect.name = "sqlite"
         
         # Act
-        order_number = self.order_service._generate_order_number()
+        with patch("app.core.numbering.increment_counter", return_value=6):
+            order_number = self.order_service._generate_order_number()
         
         # Assert
         assert isinstance(order_number, str)
         assert order_number.startswith("ORD-")
         assert len(order_number) > 10
+        assert order_number.endswith("-0006")
 
     def test_calculate_order_amounts(self):
         """Test de calcul des montants de commande"""
@@ -80,64 +82,76 @@ class TestOrderService:
         assert result["tax_amount"] == Decimal("0.00")
         assert result["total"] == Decimal("1000.00")
 
-    def test_validate_stock_availability_success(self):
-        """Test de validation de disponibilité du stock réussie"""
+    def test_reserve_stock_success(self):
+        """Test de réservation du stock réussie"""
         # Arrange
         items = [
-            {"barrel_id": "barrel1", "quantity": 5},
-            {"barrel_id": "barrel2", "quantity": 3}
+            {"barrel_id": "barrel2", "quantity": 3},
+            {"barrel_id": "barrel1", "quantity": 5}
         ]
-        
-        # Mock pour le premier appel (barrel1)
-        mock_barrel1 = Mock(stock_quantity=10)
-        # Mock pour le deuxième appel (barrel2)
-        mock_barrel2 = Mock(stock_quantity=5)
-        
-        self.mock_db.query.return_value.filter.return_value.first.side_effect = [mock_barrel1, mock_barrel2]
+        self.mock_db.execute.return_value.rowcount = 1
         
         # Act
-        result = self.order_service._validate_stock_availability(items)
+        self.order_service._reserve_stock(items)
         
         # Assert
-        assert result is True
+        assert self.mock_db.execute.call_count == 2  # Un UPDATE conditionnel par fût
+        self.mock_db.rollback.assert_not_called()
+        self.mock_db.commit.assert_not_called()  # Le commit appartient à l'appelant
 
-    def test_validate_stock_availability_insufficient(self):
-        """Test de validation de disponibilité du stock insuffisante"""
+    def test_reserve_stock_merges_duplicate_lines(self):
+        """Test du regroupement des lignes portant sur le même fût"""
         # Arrange
         items = [
-            {"barrel_id": "barrel1", "quantity": 15}  # Plus que le stock disponible
+            {"barrel_id": "barrel1", "quantity": 2},
+            {"barrel_id": "barrel1", "quantity": 4}
         ]
-        
-        mock_barrel = Mock(stock_quantity=10)
-        self.mock_db.query.return_value.filter.return_value.first.return_value = mock_barrel
+        self.mock_db.execute.return_value.rowcount = 1
         
         # Act
-        result = self.order_service._validate_stock_availability(items)
+        self.order_service._reserve_stock(items)
         
         # Assert
-        assert result is False
+        self.mock_db.execute.assert_called_once()
+        statement = self.mock_db.execute.call_args[0][0]
+        assert 6 in statement.compile().params.values()
 
-    def test_update_stock_after_order_success(self):
-        """Test de mise à jour du stock après commande réussie"""
+    def test_reserve_stock_insufficient(self):
+        """Test de réservation du stock insuffisante"""
         # Arrange
         items = [
             {"barrel_id": "barrel1", "quantity": 5},
-            {"barrel_id": "barrel2", "quantity": 3}
+            {"barrel_id": "barrel2", "quantity": 15}  # Plus que le stock disponible
+        ]
+        self.mock_db.execute.side_effect = [Mock(rowcount=1), Mock(rowcount=0)]
+        self.mock_db.query.return_value.filter.return_value.all.return_value = [
+            ("barrel1", 10),
+            ("barrel2", 10)
         ]
         
-        # Mock pour le premier appel (barrel1)
-        mock_barrel1 = Mock(stock_quantity=10)
-        # Mock pour le deuxième appel (barrel2)
-        mock_barrel2 = Mock(stock_quantity=5)
+        # Act & Assert
+        with pytest.raises(InsufficientStockException) as exc_info:
+            self.order_service._reserve_stock(items)
         
-        self.mock_db.query.return_value.filter.return_value.first.side_effect = [mock_barrel1, mock_barrel2]
+        self.mock_db.rollback.assert_called_once()
+        assert exc_info.value.shortages == [
+            {"barrel_id": "barrel2", "requested": 15, "available": 10}
+        ]
+
+    def test_reserve_stock_unknown_barrel(self):
+        """Test de réservation du stock pour un fût inexistant"""
+        # Arrange
+        items = [{"barrel_id": "missing", "quantity": 1}]
+        self.mock_db.execute.return_value.rowcount = 0
+        self.mock_db.query.return_value.filter.return_value.all.return_value = []
         
-        # Act
-        self.order_service._update_stock_after_order(items)
+        # Act & Assert
+        with pytest.raises(InsufficientStockException) as exc_info:
+            self.order_service._reserve_stock(items)
         
-        # Assert
-        assert mock_barrel1.stock_quantity == 5  # 10 - 5
-        assert mock_barrel2.stock_quantity == 2  # 5 - 3
+        assert exc_info.value.shortages == [
+            {"barrel_id": "missing", "requested": 1, "available": 0}
+        ]
 
     def test_get_order_by_id_success(self):
         """Test de récupération de commande par ID réussie"""
@@ -238,20 +252,18 @@ class TestOrderService:
         self.mock_db.refresh.return_value = None
         
         # Mock des validations
-        with patch.object(self.order_service, '_validate_stock_availability') as mock_validate:
-            with patch.object(self.order_service, '_update_stock_after_order') as mock_update:
-                with patch('app.services.order_service.Order') as mock_order_class:
-                    mock_order_class.return_value = mock_order
-                    
-                    # Act
-                    result = self.order_service.create_order(order_data)
-                    
-                    # Assert
-                    assert result == mock_order
-                    mock_validate.assert_called_once()
-                    mock_update.assert_called_once()
-                    self.mock_db.add.assert_called()
-                    self.mock_db.commit.assert_called_once()
+        with patch.object(self.order_service, '_reserve_stock') as mock_reserve:
+            with patch('app.services.order_service.Order') as mock_order_class:
+                mock_order_class.return_value = mock_order
+                
+                # Act
+                result = self.order_service.create_order(order_data)
+                
+                # Assert
+                assert result == mock_order
+                mock_reserve.assert_called_once()
+                self.mock_db.add.assert_called()
+                self.mock_db.commit.assert_called_once()
 
     def test_create_order_invalid_data(self):
         """Test de création de commande avec données invalides"""
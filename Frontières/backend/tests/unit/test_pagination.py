@@ -0,0 +1,129 @@
+"""
+Tests unitaires pour la pagination par curseur - Millésime Sans Frontières
+"""
+
+import pytest
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy.orm import Session
+
+from app.core.pagination import encode_cursor, decode_cursor
+from app.core.constants import WoodType, PreviousContent, BarrelCondition
+from app.core.exceptions import ValidationException
+from app.models.barrel import Barrel
+from app.schemas.base import PaginatedResponse, PaginationParams
+from app.services.barrel_service import BarrelService
+
+
+class TestCursorEncoding:
+    """Tests pour l'encodage des curseurs"""
+
+    def test_cursor_roundtrip(self):
+        """Test d'aller-retour encodage/décodage"""
+        # Arrange
+        created_at = datetime(2025, 8, 27, 20, 0, 0, 123456)
+
+        # Act
+        cursor = encode_cursor("created_at", created_at, "barrel-1")
+        value, row_id = decode_cursor(cursor, "created_at", datetime)
+
+        # Assert
+        assert value == created_at
+        assert row_id == "barrel-1"
+        assert "=" not in cursor
+
+    def test_cursor_decimal_sort_key(self):
+        """Test de curseur sur une clé de tri décimale"""
+        # Act
+        cursor = encode_cursor("price", Decimal("1500.00"), "barrel-1")
+        value, row_id = decode_cursor(cursor, "price", Decimal)
+
+        # Assert
+        assert value == Decimal("1500.00")
+
+    def test_cursor_rejects_other_sort_key(self):
+        """Test de rejet d'un curseur émis pour une autre clé de tri"""
+        # Arrange
+        cursor = encode_cursor("price", Decimal("1500.00"), "barrel-1")
+
+        # Act & Assert
+        with pytest.raises(ValidationException):
+            decode_cursor(cursor, "created_at", datetime)
+
+    def test_cursor_rejects_garbage(self):
+        """Test de rejet d'un curseur corrompu"""
+        # Act & Assert
+        with pytest.raises(ValidationException):
+            decode_cursor("not-a-cursor", "created_at", datetime)
+
+
+class TestPaginationSchemas:
+    """Tests pour les schémas de pagination"""
+
+    def test_pagination_params_cursor_mode(self):
+        """Test de détection du mode curseur"""
+        assert PaginationParams().is_cursor_mode is False
+        assert PaginationParams(cursor="").is_cursor_mode is True
+
+    def test_paginated_response_cursor_mode(self):
+        """Test de réponse paginée en mode curseur"""
+        # Act
+        response = PaginatedResponse(items=[], size=20, next_cursor="abc")
+
+        # Assert
+        assert response.total is None
+        assert response.has_next is True
+        assert response.has_previous is False
+
+
+class TestBarrelKeysetPagination:
+    """Tests de la pagination par curseur sur une vraie base"""
+
+    def _create_barrels(self, db_session: Session, count: int) -> None:
+        # Un seul commit : toutes les lignes partagent le même created_at
+        for index in range(count):
+            db_session.add(Barrel(
+                name=f"Fût {index}",
+                wood_type=WoodType.OAK,
+                previous_content=PreviousContent.RED_WINE,
+                condition=BarrelCondition.GOOD,
+                volume_liters=Decimal("225.00"),
+                price=Decimal("1000.00") + index,
+                stock_quantity=1
+            ))
+        db_session.commit()
+
+    def test_cursor_pages_cover_all_rows_once(self, db_session: Session):
+        """Test de parcours complet sans doublon ni trou malgré des created_at identiques"""
+        # Arrange
+        self._create_barrels(db_session, 23)
+        service = BarrelService(db_session)
+
+        # Act
+        seen = []
+        cursor = ""
+        pages = 0
+        while cursor is not None:
+            barrels, cursor = service.get_barrels_by_cursor(cursor=cursor, limit=5)
+            seen.extend(barrel.id for barrel in barrels)
+            pages += 1
+
+        # Assert
+        assert pages == 5
+        assert len(seen) == 23
+        assert len(set(seen)) == 23
+
+    def test_cursor_matches_offset_order(self, db_session: Session):
+        """Test de cohérence entre pagination par curseur et par offset"""
+        # Arrange
+        self._create_barrels(db_session, 12)
+        service = BarrelService(db_session)
+
+        # Act
+        offset_page, total = service.get_barrels_with_filters(skip=5, limit=5)
+        _, cursor = service.get_barrels_by_cursor(cursor="", limit=5)
+        cursor_page, _ = service.get_barrels_by_cursor(cursor=cursor, limit=5)
+
+        # Assert
+        assert total == 12
+        assert [b.id for b in cursor_page] == [b.id for b in offset_page]
@@ -0,0 +1,164 @@
+"""
+Tests unitaires pour le hachage des mots de passe - Millésime Sans Frontières
+"""
+
+import asyncio
+import threading
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.exceptions import ServiceUnavailableException
+from app.core.password_hashing import PasswordHasher, configure_password_hasher
+from app.models.user import User
+from app.services.auth_service import AuthService, AsyncAuthService
+from tests.conftest import SyncSessionAsyncAdapter
+
+PASSWORD = "TestPassword123!"
+
+
+@pytest.fixture
+def fast_hasher():
+    """Hacheur global à coût réduit, restauré après le test"""
+    hasher = configure_password_hasher(rounds=4, max_workers=2, max_pending=4)
+    yield hasher
+    configure_password_hasher()
+
+
+def _add_user(db_session: Session, hashed_password: str) -> User:
+    user = User(email="client@example.com", hashed_password=hashed_password, is_active=True)
+    db_session.add(user)
+    db_session.commit()
+    return user
+
+
+class TestPasswordHasher:
+    """Tests pour le pool de hachage bcrypt"""
+
+    def test_verify_and_update_on_cost_change(self):
+        """Test de détection d'une empreinte calculée avec un autre coût"""
+        # Arrange
+        old_hash = PasswordHasher(rounds=4).hash(PASSWORD)
+        hasher = PasswordHasher(rounds=5)
+
+        # Act
+        verified, new_hash = hasher.verify_and_update(PASSWORD, old_hash)
+
+        # Assert
+        assert verified is True
+        assert new_hash.startswith("$2b$05$")
+        assert hasher.verify_and_update(PASSWORD, new_hash) == (True, None)
+        assert hasher.verify_and_update("Mauvais123!", old_hash) == (False, None)
+        assert hasher.verify_and_update(PASSWORD, "empreinte-invalide") == (False, None)
+
+    @pytest.mark.asyncio
+    async def test_event_loop_not_blocked(self):
+        """Test de poursuite de la boucle d'événements pendant le calcul"""
+        # Arrange
+        hasher = PasswordHasher(rounds=12, max_workers=1, max_pending=2)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        # Act
+        ticker_task = asyncio.create_task(ticker())
+        await hasher.hash_async(PASSWORD)
+        ticker_task.cancel()
+        hasher.shutdown()
+
+        # Assert
+        assert ticks >= 5
+
+    @pytest.mark.asyncio
+    async def test_saturated_pool_fails_fast(self):
+        """Test de refus immédiat lorsque la file est pleine"""
+        # Arrange
+        hasher = PasswordHasher(rounds=4, max_workers=1, max_pending=2)
+        gate = threading.Event()
+        hasher.hash = lambda password: gate.wait(5) and "empreinte"
+        running = [asyncio.create_task(hasher.hash_async(PASSWORD)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+
+        # Act
+        with pytest.raises(ServiceUnavailableException) as exc_info:
+            await hasher.hash_async(PASSWORD)
+        stats = hasher.stats()
+        gate.set()
+        results = await asyncio.gather(*running)
+
+        # Assert
+        assert exc_info.value.status_code == 503
+        assert stats == {"workers": 1, "max_pending": 2, "pending": 2, "active": 1, "queued": 1, "rejected": 1}
+        assert results == ["empreinte", "empreinte"]
+        assert hasher.stats()["pending"] == 0
+        hasher.shutdown()
+
+
+class TestLoginRehash:
+    """Tests du recalcul transparent de l'empreinte à la connexion"""
+
+    def test_sync_login_rehashes_on_cost_change(self, db_session: Session, fast_hasher: PasswordHasher):
+        """Test du recalcul de l'empreinte par le service synchrone"""
+        # Arrange
+        user = _add_user(db_session, fast_hasher.hash(PASSWORD))
+        configure_password_hasher(rounds=5)
+
+        # Act
+        result = AuthService(db_session).authenticate_user(user.email, PASSWORD)
+
+        # Assert
+        assert result.id == user.id
+        db_session.refresh(user)
+        assert user.password_hash.startswith("$2b$05$")
+
+    @pytest.mark.asyncio
+    async def test_async_login_rehashes_on_cost_change(self, db_session: Session, fast_hasher: PasswordHasher):
+        """Test du recalcul de l'empreinte par le service asynchrone"""
+        # Arrange
+        user = _add_user(db_session, fast_hasher.hash(PASSWORD))
+        configure_password_hasher(rounds=5)
+        service = AsyncAuthService(SyncSessionAsyncAdapter(db_session))
+
+        # Act
+        result = await service.authenticate_user(user.email, PASSWORD)
+        rejected = await service.authenticate_user(user.email, "Mauvais123!")
+
+        # Assert
+        assert result.id == user.id
+        assert rejected is None
+        db_session.refresh(user)
+        assert user.password_hash.startswith("$2b$05$")
+
+    @pytest.mark.asyncio
+    async def test_async_registration_checks_email_once(self, db_session: Session, fast_hasher: PasswordHasher):
+        """Test d'une seule vérification de l'email lors de l'inscription asynchrone"""
+        # Arrange
+        service = AsyncAuthService(SyncSessionAsyncAdapter(db_session))
+        user_data = {"email": "nouveau@example.com", "password": PASSWORD, "first_name": "Jean", "last_name": "Dupont"}
+
+        # Act
+        with patch.object(AuthService, "check_new_user", autospec=True,
+                          side_effect=AuthService.check_new_user) as mock_check:
+            user = await service.create_user(user_data)
+
+        # Assert
+        assert mock_check.call_count == 1
+        assert user.email == "nouveau@example.com"
+        assert fast_hasher.verify(PASSWORD, user.hashed_password)
+
+    def test_login_returns_503_when_saturated(self, client: TestClient):
+        """Test de la réponse 503 lorsque le pool de hachage est saturé"""
+        # Arrange
+        with patch.object(AsyncAuthService, "authenticate_user",
+                          side_effect=ServiceUnavailableException("Service d'authentification saturé")):
+            # Act
+            response = client.post("/v1/auth/login", data={"username": "client@example.com", "password": PASSWORD})
+
+        # Assert
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
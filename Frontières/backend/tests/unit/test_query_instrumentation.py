@@ -0,0 +1,124 @@
+"""
+Tests unitaires pour l'instrumentation SQL - Millésime Sans Frontières
+"""
+
+import logging
+import pytest
+from unittest.mock import patch
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.monitoring import metric_key, metrics_collector
+from app.core.query_instrumentation import (
+    QueryInstrumentationMiddleware,
+    get_request_query_stats,
+    install_query_instrumentation,
+    statement_shape,
+    stop_tracking,
+    track_queries,
+    uninstall_query_instrumentation
+)
+from app.models.barrel import Barrel
+
+
+@pytest.fixture
+def instrumented_session(db_session: Session):
+    """Session dont le moteur est instrumenté le temps du test"""
+    engine = db_session.get_bind()
+    install_query_instrumentation(engine)
+    metrics_collector.reset()
+    yield db_session
+    uninstall_query_instrumentation(engine)
+    metrics_collector.reset()
+
+
+def _app_with_queries(db_session: Session, repeats: int, expose_headers: bool = True) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(QueryInstrumentationMiddleware, expose_headers=expose_headers)
+
+    @app.get("/barrels/{barrel_id}")
+    def read_barrel(barrel_id: str):
+        for _ in range(repeats):
+            db_session.query(Barrel).filter(Barrel.id == barrel_id).first()
+        return {"id": barrel_id}
+
+    return app
+
+
+class TestQueryInstrumentation:
+    """Tests du suivi des requêtes SQL par requête HTTP"""
+
+    def test_statement_shape_groups_expanded_lists(self):
+        """Test de normalisation des listes IN et des espaces"""
+        # Act
+        shapes = {
+            statement_shape("SELECT * FROM barrels\n WHERE id IN (?, ?, ?)"),
+            statement_shape("SELECT * FROM barrels WHERE id IN (?, ?)"),
+            statement_shape("SELECT * FROM barrels WHERE id IN (%(id_1)s, %(id_2)s)"),
+        }
+
+        # Assert
+        assert shapes == {"SELECT * FROM barrels WHERE id IN (?)"}
+
+    def test_counts_queries_and_n_plus_one(self, instrumented_session: Session):
+        """Test du comptage des requêtes et de la détection des formes répétées"""
+        # Arrange
+        token = track_queries("test")
+
+        # Act
+        for barrel_id in range(6):
+            instrumented_session.execute(text("SELECT :id"), {"id": barrel_id})
+        instrumented_session.execute(text("SELECT 1"))
+        stats = get_request_query_stats()
+        stop_tracking(token)
+
+        # Assert
+        assert stats.count == 7
+        assert stats.duration > 0
+        assert stats.n_plus_one_candidates() == {"SELECT ?": 6}
+        assert get_request_query_stats() is None
+
+    def test_slow_query_logged_with_parameters(self, instrumented_session: Session, caplog):
+        """Test de journalisation des requêtes lentes avec leurs paramètres"""
+        # Arrange
+        caplog.set_level(logging.WARNING, logger="app.core.query_instrumentation")
+
+        # Act
+        with patch("app.core.query_instrumentation.settings.SLOW_QUERY_THRESHOLD_MS", 0):
+            instrumented_session.execute(text("SELECT :valeur"), {"valeur": "fût-42"})
+
+        # Assert
+        assert "Requête SQL lente" in caplog.text
+        assert "fût-42" in caplog.text
+        assert metrics_collector.get_metric("db_slow_queries_total") == 1
+
+    def test_middleware_headers_and_metrics(self, instrumented_session: Session, test_barrel: Barrel):
+        """Test des en-têtes X-DB-* et des métriques par route"""
+        # Arrange
+        client = TestClient(_app_with_queries(instrumented_session, repeats=5))
+        metrics_collector.reset()
+
+        # Act
+        response = client.get(f"/barrels/{test_barrel.id}")
+
+        # Assert
+        assert response.status_code == 200
+        assert response.headers["X-DB-Query-Count"] == "5"
+        assert response.headers["X-DB-N-Plus-One"] == "1"
+        assert float(response.headers["X-DB-Time-Ms"]) > 0
+        assert metrics_collector.get_metric(metric_key("db_queries_total", route="/barrels/{barrel_id}")) == 5
+        assert metrics_collector.get_metric(metric_key("db_n_plus_one_total", route="/barrels/{barrel_id}")) == 1
+
+    def test_middleware_without_headers(self, instrumented_session: Session):
+        """Test de l'absence d'en-têtes hors mode développement"""
+        # Arrange
+        client = TestClient(_app_with_queries(instrumented_session, repeats=1, expose_headers=False))
+
+        # Act
+        response = client.get("/barrels/inconnu")
+
+        # Assert
+        assert response.status_code == 200
+        assert "X-DB-Query-Count" not in response.headers
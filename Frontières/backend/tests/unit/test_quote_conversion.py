@@ -0,0 +1,121 @@
+"""
+Tests unitaires pour la conversion des devis en commandes - Millésime Sans Frontières
+"""
+
+import pytest
+from datetime import datetime, timedelta
+from decimal import Decimal
+from sqlalchemy.orm import Session
+
+from app.core.constants import BarrelCondition, PreviousContent, QuoteStatus, WoodType
+from app.core.exceptions import BusinessLogicException, InsufficientStockException
+from app.core.query_instrumentation import (
+    get_request_query_stats,
+    install_query_instrumentation,
+    stop_tracking,
+    track_queries,
+    uninstall_query_instrumentation
+)
+from app.models.barrel import Barrel
+from app.models.order_item import OrderItem
+from app.models.quote import Quote
+from app.models.quote_item import QuoteItem
+from app.models.user import User
+from app.services.quote_service import QuoteService
+
+
+def _accepted_quote(db_session: Session, user: User, lines: int, stock: int = 10, number: int = 1) -> Quote:
+    """Devis accepté de `lines` lignes, chacune sur un fût distinct"""
+    barrels = [
+        Barrel(name=f"Fût {number}-{i}", wood_type=WoodType.OAK, previous_content=PreviousContent.RED_WINE,
+               condition=BarrelCondition.GOOD, volume_liters=Decimal("225.00"), price=Decimal("900.00"),
+               stock_quantity=stock)
+        for i in range(lines)
+    ]
+    quote = Quote(user_id=user.id, quote_number=f"QUO-TEST-{number:03d}", status=QuoteStatus.ACCEPTED,
+                  valid_until=datetime.now() + timedelta(days=30), discount_percentage=Decimal("10.00"),
+                  tax_percentage=Decimal("20.00"), shipping_cost=Decimal("50.00"))
+    db_session.add_all(barrels + [quote])
+    db_session.flush()
+    db_session.add_all([
+        QuoteItem(quote_id=quote.id, barrel_id=barrel.id, quantity=2, unit_price=Decimal("850.00"),
+                  total_price=Decimal("1700.00"))
+        for barrel in barrels
+    ])
+    db_session.commit()
+    return quote
+
+
+class TestQuoteConversion:
+    """Tests de la conversion transactionnelle d'un devis"""
+
+    def test_convert_creates_order_and_reserves_stock(self, db_session: Session, test_user: User):
+        """Test de création de la commande, de ses lignes et de la réservation du stock"""
+        # Arrange
+        quote = _accepted_quote(db_session, test_user, lines=3)
+
+        # Act
+        order = QuoteService(db_session).convert_quote_to_order(quote.id)
+        db_session.expire_all()
+
+        # Assert
+        items = db_session.query(OrderItem).filter(OrderItem.order_id == order.id).all()
+        assert len(items) == 3
+        assert all(item.unit_price == Decimal("850.00") and item.quantity == 2 for item in items)
+        assert order.subtotal == Decimal("5100.00")
+        assert order.total_amount == Decimal("5558.00")
+        assert db_session.get(Quote, quote.id).status == QuoteStatus.CONVERTED
+        assert {barrel.stock_quantity for barrel in db_session.query(Barrel)} == {8}
+
+    def test_round_trips_independent_of_line_count(self, db_session: Session, test_user: User):
+        """Test d'un nombre de requêtes SQL identique pour 3 et 120 lignes"""
+        # Arrange
+        small = _accepted_quote(db_session, test_user, lines=3, number=1)
+        large = _accepted_quote(db_session, test_user, lines=120, number=2)
+        engine = db_session.get_bind()
+        install_query_instrumentation(engine)
+        counts = []
+
+        # Act
+        try:
+            for quote in (small, large):
+                db_session.expire_all()
+                token = track_queries("conversion")
+                QuoteService(db_session).convert_quote_to_order(quote.id)
+                counts.append(get_request_query_stats().count)
+                stop_tracking(token)
+        finally:
+            uninstall_query_instrumentation(engine)
+
+        # Assert
+        assert counts[0] == counts[1]
+        assert db_session.query(OrderItem).count() == 123
+
+    def test_insufficient_stock_rolls_back_everything(self, db_session: Session, test_user: User):
+        """Test d'annulation complète (devis, stock, commande) si un fût est en rupture"""
+        # Arrange
+        quote = _accepted_quote(db_session, test_user, lines=3)
+        scarce = db_session.query(QuoteItem).filter(QuoteItem.quote_id == quote.id).first().barrel_id
+        db_session.get(Barrel, scarce).stock_quantity = 1
+        db_session.commit()
+
+        # Act
+        with pytest.raises(InsufficientStockException) as exc_info:
+            QuoteService(db_session).convert_quote_to_order(quote.id)
+        db_session.expire_all()
+
+        # Assert
+        assert exc_info.value.shortages == [{"barrel_id": scarce, "requested": 2, "available": 1}]
+        assert db_session.get(Quote, quote.id).status == QuoteStatus.ACCEPTED
+        assert sorted(barrel.stock_quantity for barrel in db_session.query(Barrel)) == [1, 10, 10]
+        assert db_session.query(OrderItem).count() == 0
+
+    def test_quote_converted_only_once(self, db_session: Session, test_user: User):
+        """Test du refus d'une seconde conversion du même devis"""
+        # Arrange
+        quote = _accepted_quote(db_session, test_user, lines=2)
+        QuoteService(db_session).convert_quote_to_order(quote.id)
+
+        # Act / Assert
+        with pytest.raises(BusinessLogicException):
+            QuoteService(db_session).convert_quote_to_order(quote.id)
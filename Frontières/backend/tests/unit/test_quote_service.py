@@ -27,16 +27,18 @@ class TestQuoteService:
     def test_generate_quote_number(self):
         """Test de génération de numéro de devis"""
         # Arrange
-        # Configurer le mock pour retourner un entier pour count()
-        self.mock_db.query.return_value.filter.return_value.count.return_value = 3
+        # Compteur du jour (table number_counters) simulé
+        self.mock_db.get_bind.return_value.dialect.name = "sqlite"
         
         # Act
-        quote_number = self.quote_service._generate_quote_number()
+        with patch("app.core.numbering.increment_counter", return_value=4):
+            quote_number = self.quote_service._generate_quote_number()
         
         # Assert
         assert isinstance(quote_number, str)
         assert quote_number.startswith("QUO-")
         assert len(quote_number) > 10
+        assert quote_number.endswith("-0004")
 
     def test_calculate_quote_amounts(self):
         """Test de calcul des montants de devis"""
@@ -0,0 +1,257 @@
+"""
+Tests unitaires pour la limitation de débit - Millésime Sans Frontières
+"""
+
+import multiprocessing
+import uuid
+import pytest
+from unittest.mock import patch
+
+from app.core.rate_limiting import (
+    RateLimiter,
+    MemoryRateLimitBackend,
+    RedisRateLimitBackend,
+    SharedMemoryRateLimitBackend
+)
+from app.core.security import MockRedisClient
+
+LIMITS = {
+    "default": {"requests": 10, "window": 60},
+    "/api/v1/auth": {"requests": 2, "window": 60},
+}
+
+
+def _hits(limiter: RateLimiter, count: int, client_id: str = "client", endpoint: str = "default") -> list:
+    return [limiter.hit(client_id, endpoint) for _ in range(count)]
+
+
+class TestRateLimiter:
+    """Tests pour le limiteur à fenêtre glissante"""
+
+    def test_blocks_after_limit(self):
+        """Test de blocage au-delà de la limite de l'endpoint"""
+        # Arrange
+        limiter = RateLimiter(limits=LIMITS, block_seconds=300)
+
+        # Act
+        with patch("app.core.rate_limiting.time.time", return_value=1000.0):
+            results = _hits(limiter, 3, endpoint="/api/v1/auth")
+            other_endpoint = limiter.hit("client", "default")
+        with patch("app.core.rate_limiting.time.time", return_value=1250.0):
+            still_blocked = limiter.hit("client", "/api/v1/auth")
+
+        # Assert
+        assert results == [True, True, False]
+        assert other_endpoint is True
+        assert still_blocked is False
+
+    def test_previous_window_weighted(self):
+        """Test de pondération de la fenêtre précédente (fenêtre glissante)"""
+        # Arrange
+        limiter = RateLimiter(limits=LIMITS, block_seconds=0)
+        with patch("app.core.rate_limiting.time.time", return_value=30.0):
+            _hits(limiter, 10)
+
+        # Act : 25 % de la fenêtre courante écoulée, la précédente compte pour 7,5 requêtes
+        with patch("app.core.rate_limiting.time.time", return_value=75.0):
+            results = _hits(limiter, 3)
+
+        # Assert
+        assert results == [True, True, False]
+
+    def test_info_and_active_keys(self):
+        """Test des informations de limitation et de la liste des clés actives"""
+        # Arrange
+        limiter = RateLimiter(limits=LIMITS)
+
+        # Act
+        with patch("app.core.rate_limiting.time.time", return_value=1000.0):
+            _hits(limiter, 4)
+            info = limiter.info("client")
+            unknown = limiter.info("inconnu", "/api/v1/auth")
+            active = limiter.active()
+
+        # Assert
+        assert info["current_requests"] == 4
+        assert info["remaining"] == 6
+        assert info["reset_time"] == 1020.0
+        assert unknown["limit"] == 2 and unknown["remaining"] == 2
+        assert list(active) == ["client:default"]
+
+    def test_lru_cap_bounds_memory(self):
+        """Test du plafond du nombre de clés (éviction de la moins récemment utilisée)"""
+        # Arrange
+        limiter = RateLimiter(limits=LIMITS, max_keys=100)
+
+        # Act
+        for index in range(1000):
+            limiter.hit(f"client-{index}")
+
+        # Assert
+        assert len(limiter) == 100
+        assert limiter.info("client-0")["current_requests"] == 0
+        assert limiter.info("client-999")["current_requests"] == 1
+
+    def test_sweeper_removes_idle_keys(self):
+        """Test du balayage des clés inactives, les clés bloquées étant conservées"""
+        # Arrange
+        limiter = RateLimiter(limits=LIMITS, block_seconds=3600, sweep_interval=60)
+        with patch("app.core.rate_limiting.time.time", return_value=0.0):
+            limiter.hit("inactif")
+            _hits(limiter, 3, client_id="bloque", endpoint="/api/v1/auth")
+
+        # Act : le balayage est déclenché par la requête suivante
+        with patch("app.core.rate_limiting.time.time", return_value=200.0):
+            limiter.hit("actif")
+            remaining_keys = len(limiter)
+            blocked = limiter.info("bloque", "/api/v1/auth")["is_blocked"]
+            reset = limiter.reset("bloque", "/api/v1/auth")
+            after_reset = limiter.hit("bloque", "/api/v1/auth")
+
+        # Assert
+        assert remaining_keys == 2
+        assert blocked is True
+        assert reset is True
+        assert after_reset is True
+
+
+@pytest.fixture(params=["memory", "redis", "shared"])
+def backend_factory(request, tmp_path):
+    """Fabrique de backends : chaque appel simule un worker partageant le même stockage"""
+    if request.param == "memory":
+        backend = MemoryRateLimitBackend()
+        yield lambda: backend
+    elif request.param == "redis":
+        client = MockRedisClient()
+        yield lambda: RedisRateLimitBackend(client)
+    else:
+        name = f"msf_test_{uuid.uuid4().hex[:12]}"
+        backends = []
+
+        def factory():
+            backends.append(SharedMemoryRateLimitBackend(name=name, slots=64, lock_path=str(tmp_path / "rl.lock")))
+            return backends[-1]
+
+        yield factory
+        backends[0].unlink()
+        for backend in backends:
+            backend.close()
+
+
+def _shared_memory_worker(name: str, lock_path: str, hits: int, results) -> None:
+    backend = SharedMemoryRateLimitBackend(name=name, lock_path=lock_path)
+    limiter = RateLimiter(limits=LIMITS, backend=backend)
+    results.put(sum(limiter.hit("client", "/api/v1/orders") for _ in range(hits)))
+    backend.close()
+
+
+class TestRateLimitBackends:
+    """Tests des backends de limitation (mémoire, Redis, mémoire partagée)"""
+
+    def test_limit_and_block(self, backend_factory):
+        """Test de blocage au-delà de la limite et de la pondération de la fenêtre précédente"""
+        # Arrange
+        limiter = RateLimiter(limits=LIMITS, block_seconds=300, backend=backend_factory())
+        with patch("app.core.rate_limiting.time.time", return_value=30.0):
+            _hits(limiter, 10)
+
+        # Act
+        with patch("app.core.rate_limiting.time.time", return_value=75.0):
+            results = _hits(limiter, 3)
+            info = limiter.info("client")
+        with patch("app.core.rate_limiting.time.time", return_value=300.0):
+            still_blocked = limiter.hit("client")
+
+        # Assert
+        assert results == [True, True, False]
+        assert info["is_blocked"] is True
+        assert info["current_requests"] == 9
+        assert still_blocked is False
+
+    def test_limits_shared_between_workers(self, backend_factory):
+        """Test de limite commune à plusieurs workers"""
+        # Arrange
+        workers = [RateLimiter(limits=LIMITS, backend=backend_factory()) for _ in range(3)]
+
+        # Act
+        with patch("app.core.rate_limiting.time.time", return_value=1000.0):
+            results = [worker.hit("client", "/api/v1/auth") for worker in workers]
+            active = workers[0].active()
+
+        # Assert
+        assert results == [True, True, False]
+        assert list(active) == ["client:/api/v1/auth"]
+
+    def test_reset(self, backend_factory):
+        """Test de réinitialisation d'une clé"""
+        # Arrange
+        limiter = RateLimiter(limits=LIMITS, backend=backend_factory())
+        _hits(limiter, 3, endpoint="/api/v1/auth")
+
+        # Act
+        reset = limiter.reset("client", "/api/v1/auth")
+
+        # Assert
+        assert reset is True
+        assert limiter.info("client", "/api/v1/auth")["current_requests"] == 0
+        assert limiter.hit("client", "/api/v1/auth") is True
+
+    def test_backend_error_fails_open(self):
+        """Test d'autorisation des requêtes lorsque le backend est indisponible"""
+        # Arrange
+        backend = RedisRateLimitBackend(MockRedisClient())
+        limiter = RateLimiter(limits=LIMITS, backend=backend)
+
+        # Act
+        with patch.object(backend, "_hit_script", side_effect=ConnectionError("Redis indisponible")):
+            result = limiter.hit("client")
+
+        # Assert
+        assert result is True
+
+    def test_redis_decision_in_one_script_call(self):
+        """Test d'une décision Redis en un seul appel, sans incrément sur refus"""
+        # Arrange
+        client = MockRedisClient()
+        backend = RedisRateLimitBackend(client)
+        limiter = RateLimiter(limits=LIMITS, block_seconds=0, backend=backend)
+        with patch("app.core.rate_limiting.time.time", return_value=1000.0):
+            _hits(limiter, 2, endpoint="/api/v1/auth")
+
+            # Act
+            with patch.object(client, "incr", wraps=client.incr) as mock_incr, \
+                    patch.object(client, "pipeline", side_effect=AssertionError("transaction inattendue")):
+                denied = limiter.hit("client", "/api/v1/auth")
+            info = limiter.info("client", "/api/v1/auth")
+
+        # Assert
+        assert denied is False
+        mock_incr.assert_not_called()
+        assert info["current_requests"] == 2
+
+    def test_shared_memory_across_processes(self, tmp_path):
+        """Test de limite commune à plusieurs processus (workers uvicorn) d'un même hôte"""
+        # Arrange
+        name = f"msf_test_{uuid.uuid4().hex[:12]}"
+        lock_path = str(tmp_path / "rl.lock")
+        owner = SharedMemoryRateLimitBackend(name=name, slots=1024, lock_path=lock_path)
+        context = multiprocessing.get_context("fork")
+        results = context.Queue()
+        limits = {"default": {"requests": 100, "window": 3600}}
+
+        # Act
+        with patch.dict(LIMITS, limits):
+            processes = [
+                context.Process(target=_shared_memory_worker, args=(name, lock_path, 50, results))
+                for _ in range(4)
+            ]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join(timeout=30)
+        allowed = sum(results.get(timeout=5) for _ in processes)
+        owner.unlink()
+        owner.close()
+
+        # Assert
+        assert allowed == 100
@@ -0,0 +1,128 @@
+"""
+Tests unitaires pour les cumuls quotidiens des statistiques - Millésime Sans Frontières
+"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.core.constants import OrderStatus, QuoteStatus
+from app.core.query_instrumentation import (
+    get_request_query_stats,
+    install_query_instrumentation,
+    stop_tracking,
+    track_queries,
+    uninstall_query_instrumentation
+)
+from app.core.rollups import backfill_rollups
+from app.models.address import Address
+from app.models.daily_rollup import OrderDailyRollup, QuoteDailyRollup
+from app.models.order import Order
+from app.models.quote import Quote
+from app.models.user import User
+from app.services.order_service import OrderService
+from app.services.quote_service import QuoteService
+
+
+def _order(user: User, number: int, address: Address = None, total: str = "100.00") -> Order:
+    return Order(user_id=user.id, order_number=f"ORD-TEST-{number:04d}",
+                 shipping_address_id=address.id if address else None,
+                 subtotal=Decimal(total), total_amount=Decimal(total))
+
+
+def _rollup_rows(db_session: Session, table) -> list:
+    return sorted(tuple(row) for row in db_session.execute(select(*table.__table__.c)).all())
+
+
+class TestOrderRollups:
+    """Tests de la maintenance incrémentale des cumuls de commandes"""
+
+    def test_statistics_follow_creation_status_change_and_deletion(self, db_session: Session, test_user: User,
+                                                                   test_address: Address):
+        """Test des statistiques après création, changement de statut et suppression"""
+        # Arrange
+        orders = [_order(test_user, i, test_address if i % 2 else None) for i in range(4)]
+        db_session.add_all(orders)
+        db_session.commit()
+
+        # Act
+        orders[0].status = OrderStatus.PROCESSING
+        orders[1].total_amount = Decimal("250.00")
+        db_session.delete(orders[3])
+        db_session.commit()
+        statistics = OrderService(db_session).get_order_statistics()
+
+        # Assert
+        assert statistics["total_orders"] == 3
+        assert statistics["total_revenue"] == Decimal("450.00")
+        assert statistics["orders_by_status"] == {"pending": 2, "processing": 1}
+        assert statistics["orders_by_country"] == {"": 2, test_address.country: 1}
+        assert statistics["monthly_orders"] == [{"month": datetime.utcnow().strftime("%Y-%m"), "count": 3}]
+
+    def test_backfill_matches_incremental_rollups(self, db_session: Session, test_user: User,
+                                                  test_address: Address):
+        """Test de la reconstruction des cumuls à l'identique"""
+        # Arrange
+        db_session.add_all([_order(test_user, i, test_address, total=f"{100 + i}.00") for i in range(5)])
+        db_session.commit()
+        incremental = _rollup_rows(db_session, OrderDailyRollup)
+        db_session.execute(delete(OrderDailyRollup))
+        db_session.commit()
+
+        # Act
+        counts = backfill_rollups(db_session)
+
+        # Assert
+        assert counts["order_daily_rollups"] == 5
+        assert _rollup_rows(db_session, OrderDailyRollup) == incremental
+
+    def test_statistics_query_count_independent_of_history(self, db_session: Session, test_user: User):
+        """Test d'un nombre de requêtes constant quel que soit le nombre de commandes"""
+        # Arrange
+        engine = db_session.get_bind()
+        counts = []
+
+        # Act
+        install_query_instrumentation(engine)
+        try:
+            for batch in range(2):
+                db_session.add_all([_order(test_user, batch * 1000 + i) for i in range(10 if batch == 0 else 300)])
+                db_session.commit()
+                token = track_queries("statistics")
+                OrderService(db_session).get_order_statistics()
+                counts.append(get_request_query_stats().count)
+                stop_tracking(token)
+        finally:
+            uninstall_query_instrumentation(engine)
+
+        # Assert
+        assert counts[0] == counts[1] == 3
+
+
+class TestQuoteRollups:
+    """Tests des cumuls de devis lors des mises à jour ensemblistes"""
+
+    def test_expiry_and_conversion_move_quotes_between_statuses(self, db_session: Session, test_user: User):
+        """Test du report de l'expiration et de la conversion dans les cumuls"""
+        # Arrange
+        now = datetime.now()
+        db_session.add_all([
+            Quote(user_id=test_user.id, quote_number=f"QUO-TEST-{i:03d}", status=QuoteStatus.SENT,
+                  valid_until=now - timedelta(days=1), total_amount=Decimal("300.00"))
+            for i in range(3)
+        ])
+        db_session.commit()
+
+        # Act
+        QuoteService(db_session).expire_quotes(now=now)
+        statistics = QuoteService(db_session).get_quote_statistics()
+
+        # Assert
+        assert statistics["total_quotes"] == 3
+        assert statistics["quotes_by_status"] == {"expired": 3}
+        assert statistics["total_value"] == Decimal("900.00")
+        assert _rollup_rows(db_session, QuoteDailyRollup) == [
+            (datetime.utcnow().date(), "expired", "", 3, Decimal("900.00")),
+            (datetime.utcnow().date(), "sent", "", 0, Decimal("0.00"))
+        ]
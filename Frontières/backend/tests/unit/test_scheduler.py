@@ -0,0 +1,250 @@
+"""
+Tests unitaires pour les tâches planifiées - Millésime Sans Frontières
+"""
+
+import asyncio
+import threading
+import pytest
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest.mock import Mock, patch
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.core.constants import QuoteStatus
+from app.core.database import Base
+from app.core.monitoring import metrics_collector
+from app.core.scheduler import JobLease, Scheduler
+from app.models.job_lock import JobLock
+from app.models.quote import Quote
+from app.models.user import User
+from app.services.quote_service import QuoteService
+
+
+@pytest.fixture
+def lock_engine(tmp_path):
+    """Base SQLite sur fichier partagée par plusieurs « workers »"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}")
+    Base.metadata.create_all(bind=engine, tables=[JobLock.__table__])
+    yield engine
+    engine.dispose()
+
+
+def _quote(user: User, number: int, status: QuoteStatus, valid_until: datetime) -> Quote:
+    return Quote(user_id=user.id, quote_number=f"QUO-TEST-{number:03d}", status=status,
+                 valid_until=valid_until, subtotal=Decimal("100.00"), total_amount=Decimal("120.00"))
+
+
+class TestJobLease:
+    """Tests du verrou des tâches (table job_locks)"""
+
+    def test_single_holder_until_release(self, lock_engine):
+        """Test d'exclusivité du verrou entre deux workers"""
+        # Arrange
+        first, second = JobLease(lock_engine, "quote_expiry", ttl=60), JobLease(lock_engine, "quote_expiry", ttl=60)
+        second.owner = "autre-hote:42"
+
+        # Act
+        first_acquired = first.acquire()
+        second_blocked = second.acquire()
+        first.release()
+        second_after_release = second.acquire()
+
+        # Assert
+        assert first_acquired is True
+        assert second_blocked is False
+        assert second_after_release is True
+
+    def test_expired_lease_taken_over(self, lock_engine):
+        """Test de reprise d'un bail échu (worker disparu)"""
+        # Arrange
+        crashed, survivor = JobLease(lock_engine, "quote_expiry", ttl=60), JobLease(lock_engine, "quote_expiry", ttl=60)
+        survivor.owner = "autre-hote:42"
+        crashed.acquire()
+
+        # Act
+        with patch("app.core.scheduler.datetime") as mock_datetime:
+            mock_datetime.now.return_value = datetime.now() + timedelta(seconds=61)
+            acquired = survivor.acquire()
+
+        # Assert
+        assert acquired is True
+
+
+def _advisory_connection(granted: bool) -> Mock:
+    """Connexion PostgreSQL simulée dont pg_try_advisory_lock répond `granted`"""
+    connection = Mock()
+    connection.execute.return_value.scalar.return_value = granted
+    return connection
+
+
+class TestAdvisoryJobLease:
+    """Tests du verrou consultatif PostgreSQL (connexions simulées)"""
+
+    @pytest.fixture
+    def postgres_engine(self):
+        """Moteur des requêtes sous PostgreSQL (simulé)"""
+        engine = Mock()
+        engine.dialect.name = "postgresql"
+        return engine
+
+    def test_lock_held_on_dedicated_engine(self, postgres_engine):
+        """Test de la connexion du verrou, ouverte par le moteur dédié et non par le pool des requêtes"""
+        # Arrange
+        lock_engine = Mock()
+        lock_engine.connect.return_value = _advisory_connection(granted=True)
+        lease = JobLease(postgres_engine, "quote_expiry", ttl=60, lock_engine=lock_engine)
+
+        # Act
+        acquired = lease.acquire()
+        kept = lease.acquire()
+
+        # Assert
+        assert acquired is True and kept is True
+        assert lock_engine.connect.call_count == 1
+        postgres_engine.connect.assert_not_called()
+
+    def test_invalidated_connection_reacquired(self, postgres_engine):
+        """Test de la reprise du verrou quand sa connexion a été coupée"""
+        # Arrange
+        dropped, fresh = _advisory_connection(granted=True), _advisory_connection(granted=True)
+        lock_engine = Mock()
+        lock_engine.connect.side_effect = [dropped, fresh]
+        lease = JobLease(postgres_engine, "quote_expiry", ttl=60, lock_engine=lock_engine)
+        lease.acquire()
+        dropped.execute.side_effect = OperationalError("SELECT 1", {}, Exception("server closed the connection"))
+
+        # Act
+        acquired = lease.acquire()
+
+        # Assert
+        assert acquired is True
+        dropped.close.assert_called_once()
+        assert lease._connection is fresh
+
+    def test_lock_lost_to_other_worker(self, postgres_engine):
+        """Test du tour passé quand un autre worker a pris le verrou après la coupure"""
+        # Arrange
+        dropped, refused = _advisory_connection(granted=True), _advisory_connection(granted=False)
+        lock_engine = Mock()
+        lock_engine.connect.side_effect = [dropped, refused]
+        lease = JobLease(postgres_engine, "quote_expiry", ttl=60, lock_engine=lock_engine)
+        lease.acquire()
+        dropped.execute.return_value.first.return_value = None
+
+        # Act
+        acquired = lease.acquire()
+
+        # Assert
+        assert acquired is False
+        dropped.close.assert_called_once()
+        refused.close.assert_called_once()
+        assert lease._connection is None
+
+
+class TestScheduler:
+    """Tests du planificateur"""
+
+    def test_job_skipped_when_locked_elsewhere(self, lock_engine):
+        """Test d'exécution unique lorsqu'un autre worker détient la tâche"""
+        # Arrange
+        calls = []
+        scheduler = Scheduler(lock_engine)
+        scheduler.add_job("quote_expiry", 300, lambda: calls.append(1) or 3)
+        other_worker = JobLease(lock_engine, "quote_expiry", ttl=60)
+        other_worker.owner = "autre-hote:42"
+        other_worker.acquire()
+        skipped_before = metrics_collector.get_metric('scheduled_job_runs_total{job="quote_expiry",status="skipped"}')
+
+        # Act
+        skipped = scheduler.run_job("quote_expiry")
+        other_worker.release()
+        result = scheduler.run_job("quote_expiry")
+
+        # Assert
+        assert skipped is None
+        assert result == 3
+        assert calls == [1]
+        assert metrics_collector.get_metric(
+            'scheduled_job_runs_total{job="quote_expiry",status="skipped"}'
+        ) == skipped_before + 1
+
+    def test_lease_kept_until_next_run(self, lock_engine):
+        """Test d'une seule exécution par intervalle, tous workers confondus"""
+        # Arrange
+        calls = []
+        first, second = Scheduler(lock_engine, owner="hote-a:1"), Scheduler(lock_engine, owner="hote-b:2")
+        for scheduler in (first, second):
+            scheduler.add_job("quote_expiry", 300, lambda: calls.append(1) or 0)
+
+        # Act
+        first_result = first.run_job("quote_expiry")
+        second_result = second.run_job("quote_expiry")
+        with patch("app.core.scheduler.datetime") as mock_datetime:
+            mock_datetime.now.return_value = datetime.now() + timedelta(seconds=301)
+            after_interval = second.run_job("quote_expiry")
+
+        # Assert
+        assert first_result == 0
+        assert second_result is None
+        assert after_interval == 0
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_stop_waits_for_running_job(self, lock_engine):
+        """Test de l'arrêt : l'exécution en cours se termine avant la fin de stop()"""
+        # Arrange
+        runs = []
+        started, finish = threading.Event(), threading.Event()
+
+        def job():
+            runs.append("start")
+            started.set()
+            finish.wait(5)
+            runs.append("end")
+
+        scheduler = Scheduler(lock_engine)
+        scheduler.add_job("tick", 0.01, job)
+        scheduler.start()
+        await asyncio.to_thread(started.wait, 5)
+
+        # Act
+        stopping = asyncio.create_task(scheduler.stop())
+        await asyncio.sleep(0.05)
+        stopped_early = stopping.done()
+        finish.set()
+        await stopping
+
+        # Assert
+        assert stopped_early is False
+        assert runs == ["start", "end"]
+        assert JobLease(lock_engine, "tick", ttl=60, owner="autre-hote:42").acquire() is True
+
+
+class TestQuoteExpiry:
+    """Tests de l'expiration ensembliste des devis"""
+
+    def test_expire_quotes_in_batches(self, db_session: Session, test_user: User):
+        """Test d'expiration par lots des seuls devis envoyés et échus"""
+        # Arrange
+        now = datetime.now()
+        due = [_quote(test_user, i, QuoteStatus.SENT, now - timedelta(days=1)) for i in range(5)]
+        still_valid = _quote(test_user, 10, QuoteStatus.SENT, now + timedelta(days=1))
+        draft = _quote(test_user, 11, QuoteStatus.DRAFT, now - timedelta(days=1))
+        db_session.add_all(due + [still_valid, draft])
+        db_session.commit()
+        expired_before = metrics_collector.get_metric("quotes_expired_total")
+
+        # Act
+        expired = QuoteService(db_session).expire_quotes(batch_size=2, now=now)
+        db_session.expire_all()
+
+        # Assert
+        assert expired == 5
+        assert all(quote.status == QuoteStatus.EXPIRED and quote.is_expired == "Y" for quote in due)
+        assert all(quote.expired_at is not None for quote in due)
+        assert still_valid.status == QuoteStatus.SENT
+        assert draft.status == QuoteStatus.DRAFT
+        assert metrics_collector.get_metric("quotes_expired_total") == expired_before + 5
+        assert len(QuoteService(db_session).get_expired_quotes()) == 5
@@ -0,0 +1,130 @@
+"""
+Tests unitaires pour la recherche plein texte - Millésime Sans Frontières
+"""
+
+from decimal import Decimal
+from unittest.mock import Mock
+from sqlalchemy.orm import Session
+
+from app.core.search import build_sqlite_match, build_postgres_tsquery, get_search_backend
+from app.core.constants import WoodType, PreviousContent, BarrelCondition
+from app.models.barrel import Barrel
+from app.schemas.barrel import BarrelFilter
+from app.services.barrel_service import BarrelService
+
+
+class TestSearchQueryBuilders:
+    """Tests pour la construction des requêtes plein texte"""
+
+    def test_sqlite_match_prefix_and_plural(self):
+        """Test de requête FTS5 par préfixe avec retrait du pluriel"""
+        assert build_sqlite_match("Fûts de chêne") == '"fût"* "de"* "chêne"*'
+        assert build_sqlite_match("tonneaux") == '"tonneau"*'
+
+    def test_sqlite_match_strips_operators(self):
+        """Test de neutralisation de la syntaxe FTS5 saisie par l'utilisateur"""
+        assert build_sqlite_match('chêne" OR NEAR(') == '"chêne"* "or"* "near"*'
+        assert build_sqlite_match("!!") is None
+
+    def test_single_letter_tokens_ignored(self):
+        """Test d'ignorance des mots d'une lettre lorsqu'il y a d'autres mots"""
+        assert build_sqlite_match("n°1234") == '"1234"*'
+        assert build_postgres_tsquery("a") == "a:*"
+
+    def test_postgres_tsquery(self):
+        """Test de requête tsquery par préfixe"""
+        assert build_postgres_tsquery("Chêne français") == "chêne:* & français:*"
+        assert build_postgres_tsquery("  ") is None
+
+    def test_backend_unknown_for_mock_session(self):
+        """Test de repli ILIKE hors moteur SQLAlchemy"""
+        assert get_search_backend(Mock(spec=Session).get_bind()) is None
+
+
+class TestBarrelFullTextSearch:
+    """Tests de la recherche plein texte sur une vraie base"""
+
+    def _add_barrel(self, db_session: Session, name: str, description: str = None,
+                    wood_type: WoodType = WoodType.OAK,
+                    previous_content: PreviousContent = PreviousContent.RED_WINE) -> Barrel:
+        barrel = Barrel(
+            name=name,
+            description=description,
+            wood_type=wood_type,
+            previous_content=previous_content,
+            condition=BarrelCondition.GOOD,
+            volume_liters=Decimal("225.00"),
+            price=Decimal("1000.00"),
+            stock_quantity=1
+        )
+        db_session.add(barrel)
+        db_session.commit()
+        return barrel
+
+    def test_search_ignores_accents_and_plurals(self, db_session: Session):
+        """Test de recherche insensible aux accents et au pluriel"""
+        # Arrange
+        self._add_barrel(db_session, "Fûts de chêne français", "Tonneaux bordelais")
+        service = BarrelService(db_session)
+
+        # Act & Assert
+        assert [b.name for b in service.search_barrels("chene")] == ["Fûts de chêne français"]
+        assert [b.name for b in service.search_barrels("fût")] == ["Fûts de chêne français"]
+        assert [b.name for b in service.search_barrels("tonneau")] == ["Fûts de chêne français"]
+
+    def test_search_matches_enum_labels(self, db_session: Session):
+        """Test de recherche sur les libellés du bois et du contenu précédent"""
+        # Arrange
+        self._add_barrel(db_session, "Barrique 1", wood_type=WoodType.CHESTNUT,
+                         previous_content=PreviousContent.COGNAC)
+        self._add_barrel(db_session, "Barrique 2")
+        service = BarrelService(db_session)
+
+        # Act & Assert
+        assert [b.name for b in service.search_barrels("châtaignier cognac")] == ["Barrique 1"]
+        assert [b.name for b in service.search_barrels("vin rouge")] == ["Barrique 2"]
+
+    def test_search_ranks_name_before_description(self, db_session: Session):
+        """Test de classement par pertinence (nom avant description)"""
+        # Arrange
+        self._add_barrel(db_session, "Barrique bordelaise", "Ancien fût de Cognac")
+        self._add_barrel(db_session, "Fût Cognac XO", "Barrique bordelaise")
+        service = BarrelService(db_session)
+
+        # Act
+        results = service.search_barrels("cognac")
+
+        # Assert
+        assert [b.name for b in results] == ["Fût Cognac XO", "Barrique bordelaise"]
+
+    def test_index_follows_updates_and_deletes(self, db_session: Session):
+        """Test de synchronisation de l'index lors des mises à jour et suppressions"""
+        # Arrange
+        barrel = self._add_barrel(db_session, "Fût acacia")
+        service = BarrelService(db_session)
+
+        # Act
+        barrel.name = "Fût whisky"
+        db_session.commit()
+        after_update = service.search_barrels("whisky")
+        db_session.delete(barrel)
+        db_session.commit()
+
+        # Assert
+        assert [b.id for b in after_update] == [barrel.id]
+        assert service.search_barrels("acacia") == []
+        assert service.search_barrels("whisky") == []
+
+    def test_filter_search_uses_full_text(self, db_session: Session):
+        """Test du filtre de recherche du catalogue"""
+        # Arrange
+        self._add_barrel(db_session, "Fûts de chêne français")
+        self._add_barrel(db_session, "Barrique neuve", wood_type=WoodType.ACACIA)
+        service = BarrelService(db_session)
+
+        # Act
+        barrels, total = service.get_barrels_with_filters(filters=BarrelFilter(search="chene"))
+
+        # Assert
+        assert total == 1
+        assert barrels[0].name == "Fûts de chêne français"
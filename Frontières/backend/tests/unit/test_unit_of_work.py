@@ -0,0 +1,143 @@
+"""
+Tests unitaires pour l'unité de travail par requête - Millésime Sans Frontières
+"""
+
+import pytest
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+from fastapi import APIRouter, Depends, FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.database import get_db
+from app.core.unit_of_work import (
+    UnitOfWorkRoute, begin_unit_of_work, commit_unit_of_work, end_unit_of_work, on_commit, save
+)
+from app.models.barrel import Barrel
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.models.user import User
+from app.services.order_service import OrderService
+
+
+def _session() -> MagicMock:
+    session = MagicMock(spec=Session)
+    session.info = {}
+    return session
+
+
+class TestUnitOfWork:
+    """Tests des primitives de l'unité de travail"""
+
+    def test_save_flushes_inside_unit_of_work(self):
+        """Test du flush (sans commit) dans une unité de travail et du commit hors unité"""
+        # Arrange
+        in_request, standalone = _session(), _session()
+        begin_unit_of_work(in_request)
+
+        # Act
+        save(in_request)
+        save(standalone)
+
+        # Assert
+        in_request.flush.assert_called_once()
+        in_request.commit.assert_not_called()
+        standalone.commit.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_callbacks_deferred_until_commit(self):
+        """Test des actions différées exécutées une seule fois, après le commit"""
+        # Arrange
+        session = _session()
+        calls = []
+        begin_unit_of_work(session)
+        on_commit(session, lambda: calls.append(session.commit.call_count))
+
+        # Act
+        deferred = list(calls)
+        await commit_unit_of_work(session)
+        await commit_unit_of_work(session)
+        end_unit_of_work(session)
+
+        # Assert
+        assert deferred == []
+        assert calls == [1]
+        assert session.commit.call_count == 2
+        assert session.info == {}
+
+
+class TestUnitOfWorkRoute:
+    """Tests du commit unique par requête"""
+
+    def _client(self, session: MagicMock) -> TestClient:
+        router = APIRouter(route_class=UnitOfWorkRoute)
+
+        @router.post("/ok")
+        def ok(db: Session = Depends(get_db)):
+            save(db)
+            save(db)
+            return {"ok": True}
+
+        @router.post("/error")
+        def error(db: Session = Depends(get_db)):
+            save(db)
+            raise HTTPException(status_code=409, detail="conflit")
+
+        app = FastAPI()
+        app.include_router(router)
+        return TestClient(app)
+
+    def test_single_commit_per_request(self):
+        """Test d'un seul commit pour plusieurs écritures de services"""
+        # Arrange
+        session = _session()
+
+        # Act
+        with patch("app.core.database.SessionLocal", return_value=session):
+            response = self._client(session).post("/ok")
+
+        # Assert
+        assert response.status_code == 200
+        assert session.flush.call_count == 2
+        session.commit.assert_called_once()
+        session.close.assert_called_once()
+
+    def test_failed_request_not_committed(self):
+        """Test d'absence de commit pour une route en erreur"""
+        # Arrange
+        session = _session()
+
+        # Act
+        with patch("app.core.database.SessionLocal", return_value=session):
+            response = self._client(session).post("/error")
+
+        # Assert
+        assert response.status_code == 409
+        session.commit.assert_not_called()
+
+
+class TestBulkOrderCreation:
+    """Tests de la création de commande en unité de travail"""
+
+    @pytest.mark.asyncio
+    async def test_order_lines_inserted_in_one_transaction(self, db_session: Session, test_user: User,
+                                                           test_barrel: Barrel):
+        """Test de l'insertion groupée des lignes et de l'invalidation du cache après commit"""
+        # Arrange
+        begin_unit_of_work(db_session)
+        items = [{"barrel_id": test_barrel.id, "quantity": 1, "unit_price": Decimal("1500.00")}
+                 for _ in range(3)]
+
+        # Act
+        with patch("app.services.order_service.get_catalog_cache") as get_cache:
+            order = OrderService(db_session).create_order({"items": items}, user_id=test_user.id)
+            invalidated_before_commit = get_cache.return_value.invalidate_barrels.called
+            await commit_unit_of_work(db_session)
+        end_unit_of_work(db_session)
+
+        # Assert
+        assert invalidated_before_commit is False
+        get_cache.return_value.invalidate_barrels.assert_called_once_with([test_barrel.id] * 3)
+        assert db_session.query(OrderItem).filter(OrderItem.order_id == order.id).count() == 3
+        assert db_session.get(Order, order.id).total_amount == Decimal("5400.00")
+        assert db_session.get(Barrel, test_barrel.id).stock_quantity == 2